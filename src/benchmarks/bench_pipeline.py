@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Бенчмарк конвейера анализа и REST API: пропускная способность (МБ/с, документов/с), пиковая память
+# перцентили задержки /analyze и пропускная способность пакетного /analyze/batch. Замеры выполняются на корпусе Gutenberg из data/text и на синтетических
+# корпусах, увеличенных в N раз копированием текстов. Каждый замер запускается в отдельном процессе,
+# поэтому пиковая память (RSS) относится только к нему.
+# Результаты сохраняются в JSON и могут сравниваться с сохраненной базовой линией:
+#     python benchmarks/bench_pipeline.py --scales 1 10 100 --output results/bench.json
+#     python benchmarks/bench_pipeline.py --baseline results/bench.json --threshold 0.2
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(SRC_DIR, "data", "text")
+
+# Замеры в порядке выполнения; filter_texts использует результаты analyze_texts
+CASES = ("extract_keywords", "analyze_text", "analyze_texts", "filter_texts", "api_analyze", "api_batch")
+
+# Замеры REST API не зависят от размера корпуса и выполняются только для первого масштаба
+API_CASES = ("api_analyze", "api_batch")
+
+# Для каждой метрики: больше — лучше (True) или меньше — лучше (False)
+METRICS = {
+    "mb_per_s": True,
+    "docs_per_s": True,
+    "requests_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def make_corpus(root, scale):
+    """
+    Создает в root/data/text корпус из scale копий текстов data/text и возвращает root.
+    Копии создаются жесткими ссылками, если файловая система их поддерживает.
+    """
+    text_dir = os.path.join(root, "data", "text")
+    os.makedirs(text_dir, exist_ok=True)
+    for copy in range(scale):
+        for file in sorted(os.listdir(CORPUS_DIR)):
+            src = os.path.join(CORPUS_DIR, file)
+            dst = os.path.join(text_dir, f"{copy:03d}-{file}" if scale > 1 else file)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copyfile(src, dst)
+    return root
+
+
+def _corpus_size(text_dir="data/text"):
+    """Возвращает количество документов и объем корпуса в мегабайтах."""
+    files = os.listdir(text_dir)
+    size = sum(os.path.getsize(os.path.join(text_dir, file)) for file in files)
+    return len(files), size / (1024 * 1024)
+
+
+def _peak_rss_mb():
+    """Пиковая память процесса и его дочерних процессов в мегабайтах (None, если недоступно)."""
+    if resource is None:
+        return None
+    # ru_maxrss — в килобайтах на Linux и в байтах на macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak * unit / (1024 * 1024), 1)
+
+
+def _throughput(seconds, docs, mb):
+    return {
+        "seconds": round(seconds, 4),
+        "docs": docs,
+        "mb": round(mb, 2),
+        "docs_per_s": round(docs / seconds, 2) if seconds else None,
+        "mb_per_s": round(mb / seconds, 3) if seconds else None,
+    }
+
+
+def _bench_per_document(func):
+    """Замеряет func(text) по всем документам корпуса; время чтения файлов не учитывается."""
+    from text_analyzer import load_resources
+
+    load_resources()
+    seconds = 0.0
+    files = os.listdir("data/text")
+    mb = 0.0
+    for file in files:
+        with open(os.path.join("data/text", file), "r", encoding="utf-8") as f:
+            text = f.read()
+        start = time.perf_counter()
+        func(text)
+        seconds += time.perf_counter() - start
+        mb += len(text.encode("utf-8")) / (1024 * 1024)
+    return _throughput(seconds, len(files), mb)
+
+
+def bench_extract_keywords(args):
+    from data_analysis_static import extract_keywords
+
+    return _bench_per_document(lambda text: extract_keywords(text, top_n=10))
+
+
+def bench_analyze_text(args):
+    from text_analyzer import analyze_text
+
+    return _bench_per_document(lambda text: analyze_text(text, top_n=10))
+
+
+def bench_analyze_texts(args):
+    from data_analysis_static import analyze_texts
+
+    docs, mb = _corpus_size()
+    start = time.perf_counter()
+    analyze_texts(workers=args.workers, streaming=args.streaming, export_excel=False)
+    return _throughput(time.perf_counter() - start, docs, mb)
+
+
+def bench_filter_texts(args):
+    from data_analysis_static import analyze_texts, filter_texts
+    import result_store
+
+    # filter_texts читает результаты analyze_texts; если их нет, анализ выполняется без замера
+    if result_store.find_format("data_analysis") is None:
+        analyze_texts(workers=args.workers, streaming=args.streaming, export_excel=False)
+
+    docs, mb = _corpus_size()
+    start = time.perf_counter()
+    filter_texts(workers=args.workers, streaming=args.streaming, export_excel=False)
+    return _throughput(time.perf_counter() - start, docs, mb)
+
+
+def bench_api_analyze(args):
+    """Нагрузочный тест /analyze через тестовый клиент Flask: абзацы корпуса отправляются по очереди, кеш отключен."""
+    from data_analysis_with_api import app
+
+    app.config["CACHE_MAX_BYTES"] = 0
+    client = app.test_client()
+
+    paragraphs = []
+    for file in sorted(os.listdir("data/text")):
+        with open(os.path.join("data/text", file), "r", encoding="utf-8") as f:
+            paragraphs.extend(paragraph for paragraph in f.read().split("\n\n") if len(paragraph) > 200)
+    paragraphs = paragraphs[:args.requests]
+    bodies = [json.dumps({"text": paragraph}) for paragraph in paragraphs]
+
+    # Прогрев: загрузка ресурсов NLTK не должна попадать в замер
+    client.post("/analyze", data=bodies[0], content_type="application/json")
+
+    latencies = []
+    start = time.perf_counter()
+    for body in bodies:
+        request_start = time.perf_counter()
+        response = client.post("/analyze", data=body, content_type="application/json")
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze вернул {response.status_code}")
+    seconds = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "seconds": round(seconds, 4),
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / seconds, 2),
+        "p50_ms": round(percentiles[49], 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+def bench_api_batch(args):
+    """
+    Пакетный /analyze/batch через тестовый клиент Flask с пулом из max(2, workers) процессов, кеш отключен:
+    пакет из batch_documents коротких документов (строк корпуса) отправляется repeat раз.
+    """
+    from data_analysis_with_api import app, get_dispatcher
+
+    app.config["CACHE_MAX_BYTES"] = 0
+    app.config["ANALYSIS_WORKERS"] = max(2, args.workers)
+    client = app.test_client()
+
+    lines = []
+    for file in sorted(os.listdir("data/text")):
+        with open(os.path.join("data/text", file), "r", encoding="utf-8") as f:
+            lines.extend(line.strip() for line in f if len(line.strip()) > 20)
+    documents = [{"text": line} for line in lines[:args.batch_documents]]
+    body = json.dumps({"documents": documents})
+
+    # Прогрев: запуск процессов пула не должен попадать в замер
+    client.post("/analyze/batch", data=json.dumps({"documents": documents[:10]}), content_type="application/json")
+
+    repeat = 5
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.post("/analyze/batch", data=body, content_type="application/json")
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze/batch вернул {response.status_code}")
+    seconds = time.perf_counter() - start
+    get_dispatcher().shutdown()
+    return {
+        "seconds": round(seconds, 4),
+        "docs": len(documents) * repeat,
+        "docs_per_s": round(len(documents) * repeat / seconds, 2),
+    }
+
+
+def run_case(name, args):
+    """Выполняет замер name в текущем процессе (в директории с корпусом) и возвращает метрики."""
+    # Сообщения конвейера о каждом файле не нужны в выводе бенчмарка
+    logging.disable(logging.INFO)
+    from text_analyzer import set_tokenizer
+
+    set_tokenizer(args.tokenizer)
+    result = globals()[f"bench_{name}"](args)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def run_in_subprocess(name, scale, workdir, args):
+    """Запускает замер name в новом процессе интерпретатора с рабочей директорией workdir."""
+    command = [sys.executable, os.path.abspath(__file__), "--case", name, "--workers", str(args.workers),
+               "--requests", str(args.requests), "--batch-documents", str(args.batch_documents),
+               "--tokenizer", args.tokenizer]
+    if args.streaming:
+        command.append("--streaming")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {"name": name, "scale": scale, **result}
+
+
+def compare(results, baseline, threshold):
+    """
+    Сравнивает результаты с базовой линией. Возвращает список регрессий: метрики,
+    ухудшившиеся больше чем на threshold (доля) относительно базовой линии.
+    """
+    reference = {(item["name"], item["scale"]): item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        base = reference.get((item["name"], item["scale"]))
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            value, base_value = item.get(metric), base.get(metric)
+            if not value or not base_value:
+                continue
+            change = (value - base_value) / base_value
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append({"name": item["name"], "scale": item["scale"], "metric": metric,
+                                    "baseline": base_value, "value": value, "change": round(change, 4)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера анализа текстов и REST API.")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="какие замеры выполнять")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1],
+                        help="во сколько раз увеличить корпус (например: 1 10 100)")
+    parser.add_argument("--workers", type=int, default=1, help="количество процессов для analyze_texts и filter_texts")
+    parser.add_argument("--streaming", action="store_true", help="потоковое чтение файлов в analyze_texts и filter_texts")
+    parser.add_argument("--requests", type=int, default=500, help="количество запросов к /analyze")
+    parser.add_argument("--batch-documents", type=int, default=2000, help="количество документов в пакете /analyze/batch")
+    parser.add_argument("--tokenizer", choices=["nltk", "regex"], default="nltk", help="токенизатор для ключевых слов")
+    parser.add_argument("--output", help="куда сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON с результатами прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимое ухудшение метрики относительно базовой линии (доля, по умолчанию 0.2)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Дочерний процесс: один замер в текущей директории
+    if args.case:
+        print(json.dumps(run_case(args.case, args)))
+        return 0
+
+    results = []
+    for scale in args.scales:
+        workdir = make_corpus(tempfile.mkdtemp(prefix=f"bench-{scale}x-"), scale)
+        try:
+            for name in args.cases:
+                # Замеры API не зависят от размера корпуса, выполняются один раз
+                if name in API_CASES and scale != args.scales[0]:
+                    continue
+                result = run_in_subprocess(name, scale, workdir, args)
+                print(json.dumps(result, ensure_ascii=False))
+                results.append(result)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": args.workers,
+            "streaming": args.streaming,
+            "tokenizer": args.tokenizer,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"Регрессия: {regression['name']} x{regression['scale']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['value']} ({regression['change']:+.1%})")
+        if regressions:
+            return 1
+        print("Регрессий относительно базовой линии нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
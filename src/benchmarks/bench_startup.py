@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Бенчмарк времени запуска: замеряет время импорта модулей проекта в новом процессе интерпретатора.
+# Запуск: python benchmarks/bench_startup.py [--repeat 10]
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Замер выполняется внутри дочернего процесса, чтобы не учитывать запуск самого интерпретатора
+SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "nltk_imported": "nltk" in sys.modules}}))
+"""
+
+
+def measure_import(module, repeat=10):
+    """Импортирует module в repeat новых процессах и возвращает медиану и минимум времени импорта (в мс)."""
+    timings = []
+    nltk_imported = False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module)],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"] * 1000)
+        nltk_imported = nltk_imported or result["nltk_imported"]
+
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "nltk_imported": nltk_imported,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк времени импорта модулей проекта.")
+    parser.add_argument("--repeat", type=int, default=10, help="количество замеров на модуль")
+    args = parser.parse_args()
+
+    # nltk — точка отсчета: столько стоил импорт до перехода на ленивую загрузку ресурсов
+    for module in ("nltk", "text_analyzer", "data_analysis_with_api", "data_analysis_static"):
+        print(json.dumps(measure_import(module, args.repeat), ensure_ascii=False))
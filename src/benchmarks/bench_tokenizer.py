@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(SRC_DIR, "data", "text")
+
+try:
+    from .. import text_analyzer
+except ImportError:
+    # Запуск скриптом: python benchmarks/bench_tokenizer.py
+    sys.path.insert(0, SRC_DIR)
+    import text_analyzer
+
+# Сравнение токенизаторов text_analyzer: скорость извлечения ключевых слов и расхождение рейтингов
+# быстрого токенизатора "regex" с эталонным "nltk" на корпусе Gutenberg из data/text:
+#     python benchmarks/bench_tokenizer.py --top-n 10 --output results/bench_tokenizer.json
+
+
+def load_corpus(text_dir=CORPUS_DIR, max_chars=None):
+    """Возвращает {имя файла: текст} для текстов корпуса; max_chars ограничивает длину каждого текста."""
+    texts = {}
+    for file in sorted(os.listdir(text_dir)):
+        with open(os.path.join(text_dir, file), "r", encoding="utf-8") as f:
+            texts[file] = f.read(max_chars) if max_chars else f.read()
+    return texts
+
+
+def keyword_rankings(texts, tokenizer, top_n=10, lemmatize=True):
+    """Возвращает ключевые слова каждого текста, извлеченные токенизатором tokenizer, и суммарное время в секундах."""
+    previous = text_analyzer.tokenizer
+    text_analyzer.set_tokenizer(tokenizer)
+    try:
+        rankings = {}
+        seconds = 0.0
+        for file, text in texts.items():
+            start = time.perf_counter()
+            rankings[file] = text_analyzer.extract_keywords(text, top_n=top_n, lemmatize=lemmatize)
+            seconds += time.perf_counter() - start
+        return rankings, seconds
+    finally:
+        text_analyzer.set_tokenizer(previous)
+
+
+def conformance(reference, rankings):
+    """
+    Сравнивает рейтинги ключевых слов с эталонными по каждому тексту: доля общих слов в топе (overlap)
+    и совпадение рейтинга целиком, вместе с частотами (identical).
+    """
+    result = {}
+    for file, expected in reference.items():
+        words = {word for word, _ in expected}
+        actual = rankings[file]
+        result[file] = {
+            "overlap": len(words & {word for word, _ in actual}) / len(words) if words else 1.0,
+            "identical": actual == expected,
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение токенизаторов: скорость и расхождение рейтингов ключевых слов.")
+    parser.add_argument("--top-n", type=int, default=10, help="размер рейтинга ключевых слов")
+    parser.add_argument("--no-lemmatize", dest="lemmatize", action="store_false", help="без лемматизации")
+    parser.add_argument("--output", help="куда сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    text_analyzer.load_resources()
+    texts = load_corpus()
+    mb = sum(len(text.encode("utf-8")) for text in texts.values()) / (1024 * 1024)
+
+    reference, nltk_seconds = keyword_rankings(texts, "nltk", args.top_n, args.lemmatize)
+    rankings, regex_seconds = keyword_rankings(texts, "regex", args.top_n, args.lemmatize)
+    files = conformance(reference, rankings)
+
+    for file, item in files.items():
+        print(f"{file:28s} общих слов в топе: {item['overlap']:.0%}{'' if item['identical'] else ' (рейтинг отличается)'}")
+    overlaps = [item["overlap"] for item in files.values()]
+    summary = {
+        "mb": round(mb, 2),
+        "nltk_mb_per_s": round(mb / nltk_seconds, 3),
+        "regex_mb_per_s": round(mb / regex_seconds, 3),
+        "speedup": round(nltk_seconds / regex_seconds, 2),
+        "mean_overlap": round(sum(overlaps) / len(overlaps), 4),
+        "min_overlap": min(overlaps),
+        "identical": sum(item["identical"] for item in files.values()),
+        "texts": len(files),
+    }
+    print(json.dumps(summary, ensure_ascii=False))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "files": files}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
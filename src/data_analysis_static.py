@@ -1,25 +1,35 @@
 import os
-import nltk
+import shutil
+import argparse
 import pandas as pd
-from collections import Counter
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from nltk.corpus import stopwords
 import logging
-
-# Инициализация лемматизатора и загрузка необходимых данных
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logging.info("Начало загрузки пакетов NLTK...")
-
-nltk.download('punkt')
-logging.info("Пакет punkt загружен.")
-nltk.download('stopwords')
-logging.info("Пакет stopwords загружен.")
-nltk.download('wordnet')
-logging.info("Пакет wordnet загружен.")
-
-lemmatizer = WordNetLemmatizer()
-from nltk.corpus import gutenberg
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import text_analyzer
+    from . import nltk_resources
+    from . import manifest as manifest_store
+    from . import result_store
+    from . import term_matrix
+    from . import inverted_index
+    from . import filter_rules
+    from . import metrics
+    from . import ingest
+    from . import shards
+    from . import minhash
+except ImportError:
+    import text_analyzer
+    import nltk_resources
+    import manifest as manifest_store
+    import result_store
+    import term_matrix
+    import inverted_index
+    import filter_rules
+    import metrics
+    import ingest
+    import shards
+    import minhash
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,169 +37,669 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 def extract_keywords(text, top_n=10):
     """Извлекает топ-N популярных слов из текста, исключая стоп-слова и знаки препинания"""
-    # Токенизация текста: делим на слова
-    words = word_tokenize(text.lower())  # Приводим к нижнему регистру
+    return text_analyzer.extract_keywords(text, top_n=top_n, lemmatize=True)
 
-    # Убираем знаки препинания и фильтруем стоп-слова
-    stop_words = set(stopwords.words("english"))
-    words = [word for word in words if word.isalpha() and word not in stop_words]
 
-    # Лемматизация слов
-    lemmatized_words = [lemmatizer.lemmatize(word) for word in words]
+def download_texts(sources=None, threads=ingest.THREADS):
+    """
+    Загружает тексты из источников sources (по умолчанию — корпус NLTK 'gutenberg') в директорию 'data/text'.
+    Источники — строки вида "nltk:gutenberg", путь к директории, архиву tar/zip или файлу .gz (см. ingest.py).
+    Файлы загружаются пулом из threads потоков; неизменные тексты не перезаписываются.
+    """
+    sources = sources or ["nltk:gutenberg"]
+    logging.info(f"Начало загрузки текстов из источников: {', '.join(map(str, sources))}.")
+    counts = ingest.ingest(sources, "data/text", threads=threads)
+    logging.info(f"Тексты сохранены в data/text: записано {counts['written']}, без изменений "
+                 f"{counts['unchanged'] + counts['skipped']}, с ошибками {counts['failed']}.")
+    return counts
 
-    # Подсчитываем частоту слов
-    word_counts = Counter(lemmatized_words)
 
-    # Получаем топ-N самых популярных слов
-    most_common_words = word_counts.most_common(top_n)
+def _map_files(func, items, workers=1, preload=True):
+    """
+    Применяет func к каждому элементу items и возвращает результаты в исходном порядке.
+    При workers > 1 обработка распределяется по пулу процессов, использующих тот же токенизатор, что и текущий;
+    при preload=True каждый процесс заранее загружает ресурсы NLTK (нужны для ключевых слов).
+    Метрики, собранные в процессах пула, добавляются к метрикам текущего процесса.
+    """
+    items = list(items)
+    if workers is None or workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
 
-    # Возвращаем список популярных слов
-    return most_common_words
+    # Крупные пачки снижают накладные расходы на передачу задач, но оставляют место для балансировки
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=text_analyzer.init_worker,
+                             initargs=(text_analyzer.tokenizer, preload)) as executor:
+        if not metrics.enabled:
+            return list(executor.map(func, items, chunksize=chunksize))
 
+        results = []
+        for result, collected in executor.map(metrics.Collected(func), items, chunksize=chunksize):
+            metrics.merge(collected)
+            results.append(result)
+        return results
 
 
-def download_texts():
+def _analyze_file(file, streaming=False, dedup=False, term_counts=False):
     """
-    Загружает тексты из корпуса NLTK 'gutenberg' и сохраняет их в директорию 'data/text' с именем файла.
+    Анализирует один файл из директории 'data/text'. Возвращает словарь с параметрами текста или None при ошибке.
+    При streaming=True файл читается кусками, а не целиком.
+    При dedup=True в словарь добавляется MinHash-сигнатура текста ("signature"), рассчитанная за тот же проход.
+    При term_counts=True за тот же проход считаются частоты лемм ("term_counts", см. _count_file_terms).
     """
-    logging.info("Начало загрузки текстов из корпуса Gutenberg.")
-    # Проверяем, существует ли директория для хранения текстов, если нет — создаем
-    os.makedirs("data/text", exist_ok=True)
-
-    # Перебираем все файлы в корпусе gutenberg
-    for file_id in gutenberg.fileids():
-        try:
-            logging.info(f"Загрузка текста {file_id}.")
-            # Считываем текст из файла корпуса
-            text = gutenberg.raw(file_id)
+    try:
+        logging.info(f"Анализ текста {file}.")
+        signature = minhash.MinHash() if dedup else None
+        with metrics.stage("analyze_file", histogram="file_seconds"), \
+                open(f"data/text/{file}", "r", encoding="utf-8") as f:
+            if streaming:
+                stats = text_analyzer.analyze_stream(f, minhash=signature, term_counts=term_counts)
+            else:
+                with metrics.stage("read"):
+                    text = f.read()
+                # Анализируем текст
+                stats = text_analyzer.analyze_text(text, minhash=signature, term_counts=term_counts)
+        if dedup:
+            stats["signature"] = signature.digest()
+        if metrics.enabled:
+            metrics.inc("bytes_read_total", os.path.getsize(f"data/text/{file}"), stage="analyze")
+            metrics.inc("documents_total", stage="analyze")
+
+        # Добавляем имя файла в результаты
+        stats["file"] = file
+
+        logging.info(f"Текст {file} успешно проанализирован.")
+        return stats
+    except Exception as e:
+        logging.error(f"Ошибка при анализе {file}: {e}")
+        return None
 
-            # Открываем файл для записи текста в директорию 'data/text'
-            with open(f"data/text/{file_id}", "w", encoding="utf-8") as f:
-                f.write(text)
 
-            logging.info(f"Текст {file_id} успешно сохранен.")
-        except Exception as e:
-            logging.error(f"Ошибка при загрузке {file_id}: {e}")
+def _load_lsh_index():
+    """Загружает сохраненный LSH-индекс или возвращает None, если его нет или он поврежден."""
+    if not os.path.exists(minhash.LSH_PATH):
+        return None
+    try:
+        return minhash.LSHIndex.load()
+    except Exception as e:
+        logging.warning(f"Не удалось загрузить LSH-индекс: {e}")
+        return None
 
-    logging.info("Все тексты успешно сохранены в data/text.")
 
+def _analyze_incremental(text_files, workers=1, streaming=False, dedup=False):
+    """
+    Инкрементальный анализ: статистика неизмененных файлов берется из манифеста,
+    анализируются только новые и измененные файлы, записи удаленных файлов удаляются из манифеста.
+    При dedup=True сигнатуры неизмененных файлов берутся из сохраненного LSH-индекса, если в записи манифеста
+    хеш текста, по которому посчитана сигнатура ("signature_sha256"), совпадает с хешем текущего текста:
+    запуск без dedup переписывает запись измененного файла, а сигнатуру в индексе оставляет прежней.
+    Остальные файлы анализируются заново, кроме файлов без слов (у них нет сигнатуры,
+    и в манифесте они отмечены признаком "no_shingles").
+    """
+    manifest = manifest_store.load_manifest()
+    lsh_index = _load_lsh_index() if dedup else None
 
-def analyze_texts():
+    results = {}
+    pending = []
+    for file in text_files:
+        entry = manifest_store.get_entry(manifest, f"data/text/{file}")
+        signature = None
+        if entry is not None and dedup:
+            signed = entry.get("signature_sha256") == entry["sha256"]
+            if signed and not entry.get("no_shingles"):
+                signature = lsh_index.signature_of(file) if lsh_index is not None else None
+                signed = signature is not None
+        if entry is not None and (not dedup or signed):
+            results[file] = dict(entry["stats"], signature=signature) if dedup else entry["stats"]
+        else:
+            pending.append(file)
+
+    logging.info(f"Инкрементальный анализ: изменено {len(pending)} из {len(text_files)} файлов.")
+
+    analyze = partial(_analyze_file, streaming=streaming, dedup=dedup)
+    for file, stats in zip(pending, _map_files(analyze, pending, workers, preload=False)):
+        if stats is not None:
+            # Сигнатура хранится в LSH-индексе, а не в манифесте
+            entry_stats = {key: value for key, value in stats.items() if key != "signature"}
+            entry = manifest_store.make_entry(f"data/text/{file}", entry_stats)
+            if dedup:
+                entry["signature_sha256"] = entry["sha256"]
+                if stats["signature"] is None:
+                    entry["no_shingles"] = True
+            manifest[f"data/text/{file}"] = entry
+            results[file] = stats
+
+    # Удаляем из манифеста записи о файлах, которых больше нет
+    current_paths = {f"data/text/{file}" for file in text_files}
+    manifest = {path: entry for path, entry in manifest.items() if path in current_paths}
+    manifest_store.save_manifest(manifest)
+
+    return [results[file] for file in text_files if file in results]
+
+
+def analyze_texts(workers=1, streaming=False, incremental=False, result_format=None, export_excel=True,
+                  build_index=False, dedup=False):
     """
-    Читает все тексты из директории 'data/text', анализирует их и сохраняет результаты в файл 'results/data_analysis.xlsx'.
+    Читает все тексты из директории 'data/text', анализирует их и сохраняет результаты в 'results/data_analysis'
+    в колоночном формате result_format (по умолчанию Parquet) и, при export_excel=True, в 'results/data_analysis.xlsx'.
     Для каждого текста собираются параметры: количество символов, количество символов без пробелов, количество слов и количество строк.
     Также рассчитывается заспамленность и количество ключевых слов.
+    При workers > 1 тексты анализируются параллельно в пуле из workers процессов.
+    При streaming=True файлы читаются кусками, и расход памяти не зависит от их размера.
+    При incremental=True анализируются только новые и измененные файлы (см. results/manifest.json).
+    При build_index=True по корпусу строится инвертированный индекс для поиска (см. inverted_index.py).
+    При dedup=True во время анализа считаются MinHash-сигнатуры текстов, LSH-индекс сохраняется
+    в results/lsh_index.npz, а в таблицу добавляется столбец duplicate_of — представитель группы почти
+    одинаковых текстов (пусто для представителей и текстов без дубликатов), см. minhash.py.
     """
     logging.info("Начало анализа текстов.")
 
-    def analyze_text(text):
-        """
-        Функция для анализа текста. Возвращает словарь с параметрами текста.
-        """
-        common_words = ["the", "and", "to", "a", "in", "of", "for", "on", "with"]
-        words = text.split()
-        spam_count = sum(1 for word in words if word.lower() in common_words)
-        spam_ratio = spam_count / len(words) * 100 if len(words) > 0 else 0
-
-        return {
-            "num_chars": len(text),
-            "num_chars_no_spaces": len(text.replace(" ", "")),
-            "num_words": len(words),
-            "num_lines": text.count("\n"),
-            "spam_ratio": spam_ratio,
-            "num_keywords": sum(1 for word in words if word.lower() in common_words),
-        }
-
-    # Список для хранения результатов анализа каждого текста
-    data = []
     text_files = os.listdir("data/text")
 
-    # Перебираем все файлы с текстами
-    for file in text_files:
-        try:
-            logging.info(f"Анализ текста {file}.")
-            with open(f"data/text/{file}", "r", encoding="utf-8") as f:
-                text = f.read()
+    # Список результатов анализа каждого текста (тексты с ошибками пропускаются)
+    if incremental:
+        data = _analyze_incremental(text_files, workers, streaming, dedup)
+    else:
+        analyze = partial(_analyze_file, streaming=streaming, dedup=dedup)
+        # Статистика считается без NLTK, поэтому ресурсы в процессах пула не загружаются
+        data = [stats for stats in _map_files(analyze, text_files, workers, preload=False) if stats is not None]
 
-            # Анализируем текст
-            stats = analyze_text(text)
+    if dedup:
+        with metrics.stage("dedup"):
+            duplicates = _find_duplicates(data)
 
-            # Добавляем имя файла в результаты
-            stats["file"] = file
+    # Преобразуем список данных в DataFrame
+    df = pd.DataFrame(data)
+    if dedup:
+        df["duplicate_of"] = pd.Series([duplicates.get(stats["file"]) for stats in data], dtype="string")
 
-            # Добавляем результат в общий список
-            data.append(stats)
+    # Сохраняем результаты анализа в колоночное хранилище
+    with metrics.stage("write_results"):
+        path = result_store.write_results(df, "data_analysis", result_format)
+    logging.info(f"Анализ завершён. Результаты сохранены в {path}.")
 
-            logging.info(f"Текст {file} успешно проанализирован.")
-        except Exception as e:
-            logging.error(f"Ошибка при анализе {file}: {e}")
+    # Экспорт в Excel
+    if export_excel:
+        with metrics.stage("excel_export"):
+            path = result_store.export_excel(df, "data_analysis")
+        logging.info(f"Результаты анализа экспортированы в {path}.")
 
-    # Преобразуем список данных в DataFrame
-    df = pd.DataFrame(data)
+    # Инвертированный индекс строится по матрице терминов корпуса
+    if build_index:
+        matrix, _ = _corpus_term_matrix(workers, streaming)
+        with metrics.stage("build_index"):
+            inverted_index.build_index(matrix)
+        logging.info(f"Инвертированный индекс сохранен в {inverted_index.INDEX_DIR}.")
 
-    # Сохраняем результаты анализа в Excel файл
-    os.makedirs("results", exist_ok=True)
-    df.to_excel("results/data_analysis.xlsx", index=False)
-    logging.info("Анализ завершён. Результаты сохранены в results/data_analysis.xlsx.")
 
+def _find_duplicates(data):
+    """
+    Извлекает сигнатуры из результатов анализа data, сохраняет по ним LSH-индекс
+    и возвращает {файл: представитель группы} для почти одинаковых текстов. Тексты без слов в индекс не попадают.
+    """
+    signed = [(stats["file"], stats.pop("signature")) for stats in data]
+    signed = [(file, signature) for file, signature in signed if signature is not None]
+    lsh_index = minhash.LSHIndex([file for file, _ in signed], [signature for _, signature in signed])
+    lsh_index.save()
 
-def filter_texts():
-    """Фильтрует тексты на основе анализа и добавляет аннотацию и ключевые слова в отфильтрованные файлы"""
-    logging.info("Начало фильтрации текстов.")
+    duplicates = lsh_index.clusters()
+    logging.info(f"Поиск почти дубликатов: {len(duplicates)} текстов в {len(set(duplicates.values()))} группах, "
+                 f"LSH-индекс сохранен в {minhash.LSH_PATH}.")
+    return duplicates
 
-    # Проверка существования Excel файла с результатами анализа
-    if not os.path.exists("results/data_analysis.xlsx"):
-        logging.error("Файл с результатами анализа не найден!")
-        return
 
-    # Чтение данных из Excel
-    df = pd.read_excel("results/data_analysis.xlsx")
+def _count_file_terms(file, streaming=False):
+    """
+    Подсчитывает частоты лемм в файле из директории 'data/text'. Возвращает Counter или None при ошибке.
+    При streaming=True файл читается кусками, а не целиком.
+    """
+    try:
+        if metrics.enabled:
+            metrics.inc("bytes_read_total", os.path.getsize(f"data/text/{file}"), stage="count_terms")
+        with metrics.stage("count_terms", histogram="file_seconds"), \
+                open(f"data/text/{file}", "r", encoding="utf-8") as f:
+            if streaming:
+                return text_analyzer.count_keywords_stream(f)
+            return text_analyzer.count_keywords(text_analyzer.tokenize(f.read()))
+    except Exception as e:
+        logging.error(f"Ошибка при подсчете слов в {file}: {e}")
+        return None
+
 
-    # Преобразование столбца 'num_keywords' в числовой формат, если необходимо
-    df["num_keywords"] = pd.to_numeric(df["num_keywords"], errors='coerce')
+def _file_fingerprint(path):
+    """Возвращает отпечаток файла: (размер, время изменения в наносекундах)."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
 
-    # Пример фильтрации: Количество символов больше 1000 и количество ключевых слов больше 5
-    filtered_df = df[(df["num_chars"] > 1000) & (df["num_keywords"] > 5)]
 
-    # Сохранение отфильтрованных данных в Excel
-    filtered_df.to_excel("results/filtered_data.xlsx", index=False)
-    logging.info("Фильтрация завершена. Результаты сохранены в results/filtered_data.xlsx.")
+def _corpus_term_matrix(workers=1, streaming=False):
+    """
+    Возвращает матрицу документ-термин по всем текстам 'data/text' и признак того, что она взята из results/term_matrix.npz.
+    Сохраненная матрица используется, если тексты не изменились и она посчитана текущим токенизатором;
+    иначе она строится заново и сохраняется.
+    """
+    text_files = sorted(os.listdir("data/text"))
+    fingerprints = [_file_fingerprint(f"data/text/{file}") for file in text_files]
 
-    # Сохранение отфильтрованных текстов с аннотацией и ключевыми словами
-    os.makedirs("data/processed_texts", exist_ok=True)
-    for file in filtered_df["file"]:
+    if os.path.exists(term_matrix.MATRIX_PATH):
         try:
-            logging.info(f"Обработка файла {file}.")
-            with open(f"data/text/{file}", "r", encoding="utf-8") as f:
-                content = f.read()
+            matrix = term_matrix.TermMatrix.load()
+            if (matrix.files == text_files and matrix.fingerprints.tolist() == fingerprints
+                    and matrix.tokenizer == text_analyzer.tokenizer):
+                logging.info(f"Матрица терминов загружена из {term_matrix.MATRIX_PATH}.")
+                return matrix, True
+        except Exception as e:
+            logging.warning(f"Не удалось загрузить матрицу терминов: {e}")
 
-            # Аннотация
-            annotation = f"--- Аннотация: Файл прошел фильтрацию. Количество символов: {filtered_df[filtered_df['file'] == file]['num_chars'].values[0]}, Количество ключевых слов: {filtered_df[filtered_df['file'] == file]['num_keywords'].values[0]} ---\n"
+    logging.info("Построение матрицы терминов по корпусу.")
+    counters = _map_files(partial(_count_file_terms, streaming=streaming), text_files, workers)
 
-            # Извлечение популярных слов
-            keywords = extract_keywords(content, top_n=10)
-            keywords_text = "Популярные слова: " + ", ".join([word[0] for word in keywords])
+    # Файлы с ошибками в матрицу не попадают
+    rows = [(file, counter, fingerprint) for file, counter, fingerprint in zip(text_files, counters, fingerprints)
+            if counter is not None]
+    matrix = term_matrix.TermMatrix.from_counters([row[0] for row in rows], [row[1] for row in rows],
+                                                  [row[2] for row in rows], text_analyzer.tokenizer)
+    matrix.save()
+    logging.info(f"Матрица терминов ({matrix.num_docs} документов, {len(matrix.vocabulary)} терминов) "
+                 f"сохранена в {term_matrix.MATRIX_PATH}.")
+    return matrix, False
 
-            # Добавляем аннотацию и ключевые слова к содержимому текста
-            content_with_annotation = annotation + keywords_text + "\n\n" + content
 
-            # Записываем текст с аннотацией и ключевыми словами в новый файл
-            with open(f"data/processed_texts/{file}", "w", encoding="utf-8") as f:
-                f.write(content_with_annotation)
+def _analyze_shard_file(file, streaming=False):
+    """
+    Анализирует файл шарда: возвращает (статистика, частоты лемм) или (None, None) при ошибке.
+    Статистика и частоты считаются за одно чтение файла.
+    """
+    stats = _analyze_file(file, streaming, term_counts=True)
+    if stats is None:
+        return None, None
+    return stats, stats.pop("term_counts")
 
-            logging.info(f"Текст {file} успешно отфильтрован и сохранен.")
-        except Exception as e:
-            logging.error(f"Ошибка при обработке {file}: {e}")
+
+def analyze_shard(shard, num_shards, method="hash", workers=1, streaming=False, result_format=None):
+    """
+    Анализирует один шард корпуса: файлы 'data/text', попавшие в шард shard из num_shards (см. shards.py).
+    Сохраняет в results/shards статистику текстов шарда и матрицу частот лемм для последующего объединения merge_shards().
+    """
+    files = shards.select_files(os.listdir("data/text"), shard, num_shards, method)
+    logging.info(f"Анализ шарда {shard} из {num_shards}: {len(files)} файлов.")
+
+    results = _map_files(partial(_analyze_shard_file, streaming=streaming), files, workers)
+    data = [stats for stats, _ in results if stats is not None]
+    counted = [(file, counter) for file, (_, counter) in zip(files, results) if counter is not None]
+    matrix = term_matrix.TermMatrix.from_counters([file for file, _ in counted], [counter for _, counter in counted],
+                                                  [_file_fingerprint(f"data/text/{file}") for file, _ in counted],
+                                                  text_analyzer.tokenizer)
+
+    with metrics.stage("write_results"):
+        shards.write_partial(shard, num_shards, method, files, pd.DataFrame(data), matrix, result_format)
+    logging.info(f"Шард {shard} из {num_shards} сохранен в {shards.SHARD_DIR}.")
+
+
+# Количество слов в рейтинге ключевых слов корпуса
+CORPUS_KEYWORDS_TOP_N = 100
+
+
+def merge_shards(num_shards, result_format=None, export_excel=True, build_index=False):
+    """
+    Объединяет частичные результаты num_shards шардов (см. analyze_shard): итоговая таблица сохраняется
+    в 'results/data_analysis' (и в Excel), объединенная матрица частот лемм — в results/term_matrix.npz,
+    рейтинг ключевых слов корпуса — в 'results/corpus_keywords'.
+    """
+    partials = shards.load_partials(num_shards)
+    result_format = result_format or partials[0][0]["format"]
+
+    files = sorted(file for meta, _, _ in partials for file in meta["files"])
+    if files != sorted(os.listdir("data/text")):
+        logging.warning("Список файлов шардов не совпадает с текущим содержимым data/text.")
+
+    # Строки упорядочиваются по имени файла, чтобы результат не зависел от деления на шарды
+    df = pd.concat([frame for _, frame, _ in partials], ignore_index=True)
+    df = df.sort_values("file", kind="stable").reset_index(drop=True) if len(df) else df
+    with metrics.stage("write_results"):
+        path = result_store.write_results(df, "data_analysis", result_format)
+    logging.info(f"Результаты {num_shards} шардов объединены и сохранены в {path}.")
+
+    if export_excel:
+        with metrics.stage("excel_export"):
+            path = result_store.export_excel(df, "data_analysis")
+        logging.info(f"Результаты анализа экспортированы в {path}.")
+
+    matrix = term_matrix.TermMatrix.merge([matrix for _, _, matrix in partials])
+    matrix.save()
+    keywords = pd.DataFrame(matrix.corpus_keywords(CORPUS_KEYWORDS_TOP_N), columns=["term", "count", "documents"])
+    path = result_store.write_results(keywords, "corpus_keywords", result_format)
+    logging.info(f"Матрица терминов сохранена в {term_matrix.MATRIX_PATH}, рейтинг ключевых слов корпуса — в {path}.")
+
+    if build_index:
+        with metrics.stage("build_index"):
+            inverted_index.build_index(matrix)
+        logging.info(f"Инвертированный индекс сохранен в {inverted_index.INDEX_DIR}.")
+
+
+# Правила фильтрации по умолчанию: Количество символов больше 1000 и количество ключевых слов больше 5
+# (выражения над столбцами таблицы результатов, см. filter_rules.py)
+FILTER_RULES = ["num_chars > 1000", "num_keywords > 5"]
+
+# Обработка почти дубликатов при фильтрации (по столбцу duplicate_of, см. analyze_texts(dedup=True)):
+# "keep" — как остальные тексты, "reuse" — с ключевыми словами представителя группы,
+# "skip" — не сохраняются, если представитель группы прошел фильтрацию
+DUPLICATE_MODES = ("keep", "reuse", "skip")
+
+
+def _process_file(row, streaming=False):
+    """
+    Добавляет аннотацию и ключевые слова к тексту и сохраняет его в 'data/processed_texts'.
+    row — кортеж (имя файла, количество символов, количество ключевых слов, ключевые слова или None).
+    Если ключевые слова уже известны, повторно они не извлекаются.
+    Возвращает список ключевых слов или None при ошибке.
+    При streaming=True текст не загружается в память целиком: после заголовка он копируется кусками.
+    """
+    file, num_chars, num_keywords, keywords = row
+    try:
+        logging.info(f"Обработка файла {file}.")
+
+        # Аннотация
+        annotation = f"--- Аннотация: Файл прошел фильтрацию. Количество символов: {num_chars}, Количество ключевых слов: {num_keywords} ---\n"
+
+        with metrics.stage("process_file", histogram="file_seconds"):
+            if streaming:
+                with open(f"data/text/{file}", "r", encoding="utf-8") as src:
+                    if keywords is None:
+                        keywords = text_analyzer.extract_keywords_stream(src, top_n=10)
+                        src.seek(0)
+                    keywords_text = "Популярные слова: " + ", ".join([word[0] for word in keywords])
+
+                    # Записываем заголовок, затем копируем исходный текст кусками
+                    with open(f"data/processed_texts/{file}", "w", encoding="utf-8") as dst:
+                        dst.write(annotation + keywords_text + "\n\n")
+                        shutil.copyfileobj(src, dst, text_analyzer.CHUNK_SIZE)
+            else:
+                with metrics.stage("read"), open(f"data/text/{file}", "r", encoding="utf-8") as f:
+                    content = f.read()
+
+                # Извлечение популярных слов
+                if keywords is None:
+                    keywords = extract_keywords(content, top_n=10)
+                keywords_text = "Популярные слова: " + ", ".join([word[0] for word in keywords])
+
+                # Добавляем аннотацию и ключевые слова к содержимому текста
+                content_with_annotation = annotation + keywords_text + "\n\n" + content
+
+                # Записываем текст с аннотацией и ключевыми словами в новый файл
+                with metrics.stage("write"), open(f"data/processed_texts/{file}", "w", encoding="utf-8") as f:
+                    f.write(content_with_annotation)
+
+        if metrics.enabled:
+            metrics.inc("bytes_read_total", os.path.getsize(f"data/text/{file}"), stage="filter")
+            metrics.inc("bytes_written_total", os.path.getsize(f"data/processed_texts/{file}"), stage="filter")
+            metrics.inc("documents_total", stage="filter")
+
+        logging.info(f"Текст {file} успешно отфильтрован и сохранен.")
+        return keywords
+    except Exception as e:
+        logging.error(f"Ошибка при обработке {file}: {e}")
+        return None
+
+
+def _process_rows(rows, duplicate_of, workers=1, streaming=False):
+    """
+    Обрабатывает строки rows (см. _process_file) и возвращает ключевые слова в том же порядке.
+    Почти дубликаты из duplicate_of ({файл: представитель}), чьи представители есть среди rows,
+    обрабатываются вторым проходом с ключевыми словами представителя, поэтому слова из них не извлекаются.
+    """
+    process = partial(_process_file, streaming=streaming)
+    positions = {row[0]: i for i, row in enumerate(rows)}
+    deferred = {i for i, row in enumerate(rows) if row[3] is None and duplicate_of.get(row[0]) in positions}
+
+    results = [None] * len(rows)
+    first = [i for i in range(len(rows)) if i not in deferred]
+    for i, keywords in zip(first, _map_files(process, [rows[i] for i in first], workers)):
+        results[i] = keywords
+
+    # Если представителя обработать не удалось, ключевые слова дубликата извлекаются как обычно
+    second = sorted(deferred)
+    second_rows = [rows[i][:3] + (results[positions[duplicate_of[rows[i][0]]]],) for i in second]
+    for i, keywords in zip(second, _map_files(process, second_rows, workers)):
+        results[i] = keywords
+    return results
+
+
+def filter_texts(workers=1, streaming=False, incremental=False, result_format=None, export_excel=True,
+                 keyword_ranking="count", rules=None, duplicates="keep"):
+    """
+    Фильтрует тексты на основе анализа и добавляет аннотацию и ключевые слова в отфильтрованные файлы.
+    Результаты анализа читаются из колоночного хранилища (формат result_format или найденный автоматически),
+    отфильтрованная таблица сохраняется в 'results/filtered_data' и, при export_excel=True, в Excel.
+    При workers > 1 файлы обрабатываются параллельно в пуле из workers процессов.
+    При streaming=True файлы читаются и копируются кусками, и расход памяти не зависит от их размера.
+    При incremental=True ключевые слова берутся из манифеста, а файлы, уже сохраненные
+    для текущей версии текста, не перезаписываются.
+    keyword_ranking — способ выбора популярных слов: "count" — по частоте в самом тексте,
+    "tfidf" или "bm25" — по весу относительно всего корпуса (см. term_matrix.py).
+    rules — правила фильтрации, выражения над столбцами таблицы результатов (по умолчанию FILTER_RULES).
+    duplicates — обработка почти дубликатов, найденных при анализе с dedup=True (см. DUPLICATE_MODES).
+    """
+    logging.info("Начало фильтрации текстов.")
+
+    # Правила проверяются до чтения данных
+    rules = FILTER_RULES if rules is None else rules
+    filter_rules.compile_rules(rules)
+
+    if keyword_ranking != "count" and keyword_ranking not in term_matrix.WEIGHTINGS:
+        raise ValueError(f"Неизвестный способ ранжирования ключевых слов: {keyword_ranking}")
+    if duplicates not in DUPLICATE_MODES:
+        raise ValueError(f"Неизвестный способ обработки почти дубликатов: {duplicates}")
+
+    # Отфильтрованная таблица сохраняется в том же формате, что и результаты анализа
+    result_format = result_format or result_store.find_format("data_analysis")
+    if result_format is not None:
+        # Чтение из колоночного хранилища; для Parquet простые сравнения применяются при чтении,
+        # затем все правила вычисляются одной маской
+        pushdown = None
+        if result_format == "parquet":
+            pushdown = filter_rules.pushdown_filters(rules, result_store.read_columns("data_analysis", result_format))
+        with metrics.stage("read_results"):
+            df = result_store.read_results("data_analysis", result_format, filters=pushdown)
+        with metrics.stage("filter"):
+            filtered_df = filter_rules.apply_rules(df, rules)
+    elif os.path.exists("results/data_analysis.xlsx"):
+        # Результаты прежних версий, сохраненные только в Excel
+        df = pd.read_excel("results/data_analysis.xlsx")
+
+        # Преобразование столбца 'num_keywords' в числовой формат, если необходимо
+        df["num_keywords"] = pd.to_numeric(df["num_keywords"], errors='coerce')
+
+        filtered_df = filter_rules.apply_rules(df, rules)
+    else:
+        logging.error("Файл с результатами анализа не найден!")
+        return
+
+    # Почти дубликаты, представители которых прошли фильтрацию
+    duplicate_of = {}
+    if duplicates != "keep":
+        if "duplicate_of" in filtered_df.columns:
+            passed = set(filtered_df["file"])
+            duplicate_of = {file: representative
+                            for file, representative in zip(filtered_df["file"], filtered_df["duplicate_of"])
+                            if not pd.isna(representative) and representative in passed}
+        else:
+            logging.warning("В результатах анализа нет столбца duplicate_of: запустите анализ с параметром --dedup.")
+    if duplicates == "skip" and duplicate_of:
+        filtered_df = filtered_df[~filtered_df["file"].isin(duplicate_of.keys())]
+        logging.info(f"Пропущено почти дубликатов: {len(duplicate_of)}.")
+        duplicate_of = {}
+
+    # Сохранение отфильтрованных данных
+    with metrics.stage("write_results"):
+        path = result_store.write_results(filtered_df, "filtered_data", result_format)
+    logging.info(f"Фильтрация завершена. Результаты сохранены в {path}.")
+    if export_excel:
+        with metrics.stage("excel_export"):
+            path = result_store.export_excel(filtered_df, "filtered_data")
+        logging.info(f"Отфильтрованные данные экспортированы в {path}.")
+
+    # Сохранение отфильтрованных текстов с аннотацией и ключевыми словами
+    os.makedirs("data/processed_texts", exist_ok=True)
+    rows = zip(filtered_df["file"], filtered_df["num_chars"].values, filtered_df["num_keywords"].values)
+
+    # Ключевые слова всех текстов по TF-IDF/BM25 вычисляются одним проходом по матрице терминов
+    corpus_keywords = None
+    matrix_reused = False
+    if keyword_ranking != "count":
+        matrix, matrix_reused = _corpus_term_matrix(workers, streaming)
+        with metrics.stage("rank_keywords"):
+            corpus_keywords = dict(zip(matrix.files, matrix.top_keywords(top_n=10, weighting=keyword_ranking)))
+
+    if not incremental:
+        _process_rows([row + (corpus_keywords.get(row[0]) if corpus_keywords is not None else None,) for row in rows],
+                      duplicate_of, workers, streaming)
+        _log_lemma_memo_stats(workers)
+        return
+
+    manifest = manifest_store.load_manifest()
+    pending = []
+    entries = []
+    for row in rows:
+        file = row[0]
+        entry = manifest_store.get_entry(manifest, f"data/text/{file}")
+
+        # Файл уже сохранен для текущей версии текста тем же способом ранжирования и токенизатором — пропускаем.
+        # Веса TF-IDF/BM25 зависят от всего корпуса, поэтому при изменении корпуса файлы сохраняются заново.
+        # Записи прежних версий, где токенизатор не указан, сделаны токенизатором "nltk"
+        same_tokenizer = entry is not None and entry.get("tokenizer", "nltk") == text_analyzer.tokenizer
+        if (same_tokenizer and entry.get("processed_sha256") == entry["sha256"]
+                and entry.get("processed_ranking", "count") == keyword_ranking
+                and (keyword_ranking == "count" or matrix_reused)
+                and os.path.exists(f"data/processed_texts/{file}")):
+            continue
+
+        if corpus_keywords is not None:
+            keywords = corpus_keywords.get(file)
+        else:
+            keywords = entry.get("keywords") if same_tokenizer else None
+        pending.append(row + (keywords,))
+        entries.append(entry)
+
+    logging.info(f"Инкрементальная фильтрация: обрабатывается {len(pending)} из {len(filtered_df)} файлов.")
+
+    pending_files = {row[0] for row in pending}
+    for row, entry, keywords in zip(pending, entries, _process_rows(pending, duplicate_of, workers, streaming)):
+        if entry is not None and keywords is not None:
+            # Ключевые слова, извлеченные другим токенизатором, устарели
+            if entry.get("tokenizer", "nltk") != text_analyzer.tokenizer:
+                entry.pop("keywords", None)
+            entry["tokenizer"] = text_analyzer.tokenizer
+            # В манифесте хранятся ключевые слова по частоте, извлеченные из самого текста;
+            # веса TF-IDF/BM25 берутся из матрицы терминов, а слова представителя группы дубликатов не сохраняются
+            if keyword_ranking == "count" and (row[3] is not None or duplicate_of.get(row[0]) not in pending_files):
+                entry["keywords"] = keywords
+            entry["processed_sha256"] = entry["sha256"]
+            entry["processed_ranking"] = keyword_ranking
+    manifest_store.save_manifest(manifest)
+    _log_lemma_memo_stats(workers)
+
+
+def _log_lemma_memo_stats(workers):
+    """Выводит в лог долю попаданий в таблицу мемоизации лемм (в параллельном режиме таблицы у каждого процесса свои)."""
+    if workers is not None and workers > 1:
+        return
+    stats = text_analyzer.lemma_memo_stats()
+    logging.info(f"Мемоизация лемм: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                 f"доля попаданий {stats['hit_rate']:.1%}, слов в таблице {stats['size']}.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка, анализ и фильтрация текстов корпуса Gutenberg.")
+    parser.add_argument("--source", dest="sources", action="append", metavar="SOURCE",
+                        help="источник текстов: nltk:gutenberg, директория, архив tar/zip или файл .gz "
+                             "(можно указать несколько раз; по умолчанию nltk:gutenberg)")
+    parser.add_argument("--download-threads", type=int, default=ingest.THREADS,
+                        help=f"количество потоков загрузки текстов (по умолчанию {ingest.THREADS})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="количество процессов для анализа и фильтрации (по умолчанию 1 — последовательно)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="читать файлы кусками, не загружая их в память целиком")
+    parser.add_argument("--incremental", action="store_true",
+                        help="обрабатывать только новые и измененные файлы (манифест results/manifest.json)")
+    parser.add_argument("--format", dest="result_format", choices=sorted(result_store.FORMATS),
+                        help="формат хранилища результатов (по умолчанию parquet, без pyarrow — csv)")
+    parser.add_argument("--no-excel", dest="export_excel", action="store_false",
+                        help="не экспортировать результаты в Excel")
+    parser.add_argument("--index", dest="build_index", action="store_true",
+                        help="построить инвертированный индекс для поиска (results/index)")
+    parser.add_argument("--ranking", dest="keyword_ranking", choices=["count", *term_matrix.WEIGHTINGS],
+                        default="count",
+                        help="ранжирование популярных слов: по частоте в тексте или по TF-IDF/BM25 относительно корпуса")
+    parser.add_argument("--tokenizer", choices=text_analyzer.TOKENIZERS, default=text_analyzer.tokenizer,
+                        help="токенизатор для ключевых слов: nltk (word_tokenize) или regex (быстрый, без NLTK)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="искать почти дубликаты текстов (MinHash/LSH) и отмечать их в столбце duplicate_of")
+    parser.add_argument("--duplicates", choices=DUPLICATE_MODES, default="keep",
+                        help="почти дубликаты при фильтрации: обрабатывать как остальные тексты, "
+                             "взять ключевые слова представителя группы или пропустить")
+    parser.add_argument("--filter", dest="rules", action="append", metavar="EXPR",
+                        help="правило фильтрации над столбцами результатов, например \"spam_ratio < 40\" "
+                             "(можно указать несколько раз; по умолчанию — num_chars > 1000 и num_keywords > 5)")
+    parser.add_argument("--filter-config", metavar="PATH",
+                        help="JSON-файл с правилами фильтрации: список выражений или {\"rules\": [...]}")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="проанализировать только шард I из N (с нуля) и сохранить частичные результаты в results/shards")
+    parser.add_argument("--shard-method", choices=shards.METHODS, default="hash",
+                        help="деление файлов на шарды: по хешу имени или по диапазонам отсортированного списка")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="объединить частичные результаты N шардов вместо анализа, затем выполнить фильтрацию")
+    parser.add_argument("--report", metavar="PATH",
+                        help="собрать метрики этапов (время, байты, токены, попадания в таблицу лемм) и сохранить отчет в JSON")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="профилировать запуск cProfile и сохранить статистику в PATH (формат pstats)")
+    parser.add_argument("--prepare", action="store_true",
+                        help="перед запуском скачать недостающие ресурсы NLTK")
+    args = parser.parse_args()
+
+    if args.report:
+        metrics.enable()
+    text_analyzer.set_tokenizer(args.tokenizer)
+
+    rules = args.rules
+    if args.filter_config:
+        rules = filter_rules.load_rules(args.filter_config) + (rules or [])
+
+    if args.prepare:
+        nltk_resources.prepare()
+
     # Запуск всех функций по очереди
     try:
-        logging.info("Запуск процесса загрузки текстов.")
-        download_texts()  # Загрузка текстов из NLTK
-        logging.info("Запуск анализа текстов.")
-        analyze_texts()  # Анализ текстов
-        logging.info("Запуск фильтрации текстов.")
-        filter_texts()  # Фильтрация текстов
+        with metrics.profiled(args.profile):
+            if args.shard:
+                # Шард только анализирует свою часть файлов общей директории data/text
+                with metrics.stage("analyze_shard"):
+                    analyze_shard(*shards.parse_shard(args.shard), method=args.shard_method, workers=args.workers,
+                                  streaming=args.streaming, result_format=args.result_format)
+            else:
+                if args.merge_shards:
+                    with metrics.stage("merge_shards"):
+                        merge_shards(args.merge_shards, result_format=args.result_format,
+                                     export_excel=args.export_excel, build_index=args.build_index)
+                else:
+                    logging.info("Запуск процесса загрузки текстов.")
+                    with metrics.stage("download_texts"):
+                        download_texts(args.sources, threads=args.download_threads)  # Загрузка текстов
+                    logging.info("Запуск анализа текстов.")
+                    with metrics.stage("analyze_texts"):
+                        analyze_texts(workers=args.workers, streaming=args.streaming, incremental=args.incremental,
+                                      result_format=args.result_format, export_excel=args.export_excel,
+                                      build_index=args.build_index, dedup=args.dedup)  # Анализ текстов
+                logging.info("Запуск фильтрации текстов.")
+                with metrics.stage("filter_texts"):
+                    filter_texts(workers=args.workers, streaming=args.streaming, incremental=args.incremental,
+                                 result_format=args.result_format, export_excel=args.export_excel,
+                                 keyword_ranking=args.keyword_ranking, rules=rules,
+                                 duplicates=args.duplicates)  # Фильтрация текстов
     except Exception as e:
         logging.error(f"Произошла ошибка: {e}")
+    finally:
+        # Отчет сохраняется и после ошибки: по нему видно, на каком этапе остановился запуск
+        if args.report:
+            metrics.write_report(args.report, workers=args.workers, streaming=args.streaming,
+                                 incremental=args.incremental, tokenizer=args.tokenizer)
+            logging.info(f"Отчет о запуске сохранен в {args.report}.")
@@ -1,16 +1,33 @@
 
-import nltk
-from collections import Counter
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+import os
+import json
+import time
+import argparse
 import logging
-from flask import Flask, request, jsonify
+import threading
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, TimeoutError, wait
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 
-# Скачиваем необходимые ресурсы из NLTK
-nltk.download('stopwords')
-nltk.download('punkt_tab')
-nltk.download('gutenberg')
-from nltk.corpus import gutenberg
+try:
+    from . import text_analyzer
+    from . import nltk_resources
+    from . import result_cache
+    from . import term_matrix
+    from . import inverted_index
+    from . import metrics
+    from . import minhash
+    from .serving import AnalysisDispatcher, Overloaded, serve
+except ImportError:
+    import text_analyzer
+    import nltk_resources
+    import result_cache
+    import term_matrix
+    import inverted_index
+    import metrics
+    import minhash
+    from serving import AnalysisDispatcher, Overloaded, serve
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,29 +35,119 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Инициализация Flask
 app = Flask(__name__)
 
+# Количество процессов для пакетного и потокового анализа (1 — анализ в процессе запроса)
+app.config.setdefault("ANALYSIS_WORKERS", os.cpu_count() or 1)
+# Сколько задач может одновременно выполняться и ждать в очереди пула (None — 4 * ANALYSIS_WORKERS)
+app.config.setdefault("MAX_PENDING", None)
+# Сколько секунд запрос ждет результата анализа в пуле (None — без ограничения)
+app.config.setdefault("REQUEST_TIMEOUT", None)
+# Тексты длиннее этого порога в /analyze отправляются в пул процессов, короткие анализируются в потоке запроса
+# (None — все тексты анализируются в потоке запроса)
+app.config.setdefault("INLINE_MAX_CHARS", None)
+
+# Кеш результатов /analyze: "memory" — в памяти процесса, "sqlite" — в файле CACHE_PATH, общем для процессов сервера
+app.config.setdefault("CACHE_BACKEND", "memory")
+app.config.setdefault("CACHE_PATH", "results/analysis_cache.sqlite")
+# Максимальный объем кеша в байтах (0 — кеш отключен) и срок жизни записей в секундах (None — бессрочно)
+app.config.setdefault("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+app.config.setdefault("CACHE_TTL", None)
+
+# Матрица терминов корпуса, по которой считается IDF для ранжирования ключевых слов по TF-IDF
+app.config.setdefault("TERM_MATRIX_PATH", term_matrix.MATRIX_PATH)
+# Инвертированный индекс корпуса для /search
+app.config.setdefault("INDEX_PATH", inverted_index.INDEX_DIR)
+# LSH-индекс MinHash-сигнатур корпуса для /similar
+app.config.setdefault("LSH_PATH", minhash.LSH_PATH)
+
+# Метрики сервера (/metrics): запрос обновляет лишь несколько счетчиков, что незаметно на фоне анализа.
+# Этапы анализа, выполненного в пуле процессов, в метриках сервера не учитываются.
+metrics.enable()
+
+# Пул процессов, кеш, таблица IDF и индексы создаются при первом обращении.
+# Таблица IDF и индексы хранятся вместе с версией файла, из которого загружены (см. _file_version),
+# и загружаются заново, когда data_analysis_static.py перестраивает файл
+_dispatcher = None
+_cache = None
+_idf = None
+_index = None
+_lsh_index = None
+# Защищает создание пула, кеша и загрузку индексов: в многопоточном сервере их могут одновременно запросить
+# несколько потоков
+_init_lock = threading.Lock()
+
+# Ответы при перегрузке и таймауте
+OVERLOADED_ERROR = "Сервер перегружен, повторите запрос позже"
+TIMEOUT_ERROR = "Превышено время обработки запроса"
+TOO_LARGE_ERROR = "Размер запроса превышает допустимый"
+NO_MATRIX_ERROR = "Матрица терминов не построена: запустите data_analysis_static.py с параметром --ranking tfidf"
+NO_INDEX_ERROR = "Индекс не построен: запустите data_analysis_static.py с параметром --index"
+NO_LSH_ERROR = "LSH-индекс не построен: запустите data_analysis_static.py с параметром --dedup"
+
+# Способы ранжирования ключевых слов: по частоте в тексте или по TF-IDF относительно корпуса
+RANKINGS = ("count", "tfidf")
+
 def extract_keywords(text, top_n=10):
     """Извлекает топ-N популярных слов из текста, исключая стоп-слова и знаки препинания."""
-    words = word_tokenize(text.lower())
-    words = [word for word in words if word.isalpha()]
-    stop_words = set(stopwords.words("english"))
-    filtered_words = [word for word in words if word not in stop_words]
-    word_counts = Counter(filtered_words)
-    return word_counts.most_common(top_n)
-
-def analyze_text(text):
+    return text_analyzer.extract_keywords(text, top_n=top_n, lemmatize=False)
+
+def _file_version(path):
+    """
+    Версия файла: путь, время изменения, inode и размер (или None вместо них, если файла нет).
+    Файлы результатов перезаписываются переименованием, поэтому перестроенный файл всегда получает новую версию.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return path, None
+    return path, st.st_mtime_ns, st.st_ino, st.st_size
+
+def _load_versioned(cached, version, load):
+    """
+    Возвращает (версия, объект): закешированную пару cached, если версия файла не изменилась,
+    иначе объект, заново загруженный функцией load().
+    """
+    if cached is not None and cached[0] == version:
+        return cached
+    return version, load()
+
+def get_idf():
+    """
+    Возвращает таблицу IDF корпуса и IDF неизвестного термина; матрица терминов читается заново, только если
+    она перестроена. Если матрица не построена, выбрасывает FileNotFoundError.
+    """
+    global _idf
+    path = app.config["TERM_MATRIX_PATH"]
+    version = _file_version(path)
+    cached = _idf
+    if cached is None or cached[0] != version:
+        def load():
+            matrix = term_matrix.TermMatrix.load(path)
+            return matrix.idf_table(), matrix.default_idf()
+        with _init_lock:
+            cached = _idf = _load_versioned(_idf, version, load)
+    return cached[1]
+
+def extract_keywords_tfidf(text, top_n=10):
+    """Извлекает топ-N слов текста по TF-IDF; частоты лемм берутся из текста, IDF — из матрицы терминов корпуса."""
+    idf_table, default_idf = get_idf()
+    counts = text_analyzer.count_keywords(text_analyzer.tokenize(text), lemmatize=True)
+    return [(term, round(weight, 4)) for term, weight in term_matrix.rank_terms(counts, idf_table, default_idf, top_n)]
+
+def analyze_text(text, top_n=10, ranking="count"):
     """Анализирует текст и возвращает статистику."""
-    common_words = ["the", "and", "to", "a", "in", "of", "for", "on", "with"]
-    words = text.split()
-    spam_count = sum(1 for word in words if word.lower() in common_words)
-    spam_ratio = spam_count / len(words) * 100 if len(words) > 0 else 0
+    if ranking == "tfidf":
+        stats = text_analyzer.analyze_text(text)
+        stats["keywords"] = extract_keywords_tfidf(text, top_n)
+    else:
+        stats = text_analyzer.analyze_text(text, top_n=top_n, lemmatize=False)
 
     return {
-        "num_chars": len(text),
-        "num_chars_no_spaces": len(text.replace(" ", "")),
-        "num_words": len(words),
-        "num_lines": text.count("\n"),
-        "spam_ratio": round(spam_ratio, 2),
-        "keywords": extract_keywords(text, top_n=10),
+        "num_chars": stats["num_chars"],
+        "num_chars_no_spaces": stats["num_chars_no_spaces"],
+        "num_words": stats["num_words"],
+        "num_lines": stats["num_lines"],
+        "spam_ratio": round(stats["spam_ratio"], 2),
+        "keywords": stats["keywords"],
     }
 
 @app.route("/analyze", methods=["POST"])
@@ -52,15 +159,462 @@ def analyze_api():
             return jsonify({"error": "Поле 'text' отсутствует в запросе"}), 400
 
         text = data["text"]
-        result = analyze_text(text)
+        top_n = data.get("top_n", 10)
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or top_n < 0:
+            return jsonify({"error": "Поле 'top_n' должно быть неотрицательным целым числом"}), 400
+        ranking = data.get("ranking", "count")
+        if ranking not in RANKINGS:
+            return jsonify({"error": f"Поле 'ranking' должно быть одним из: {', '.join(RANKINGS)}"}), 400
+        if ranking == "tfidf" and not os.path.exists(app.config["TERM_MATRIX_PATH"]):
+            return jsonify({"error": NO_MATRIX_ERROR}), 503
+
+        with metrics.stage("analyze_request"):
+            result = _run_analysis(text, top_n, ranking)
         return jsonify({"analysis": result}), 200
 
+    except RequestEntityTooLarge:
+        raise
+    except Overloaded:
+        return _overloaded_response()
+    except TimeoutError:
+        return jsonify({"error": TIMEOUT_ERROR}), 504
     except Exception as e:
         logging.error(f"Ошибка при обработке запроса: {e}")
         return jsonify({"error": "Произошла ошибка при обработке текста"}), 500
 
+def get_dispatcher():
+    """Возвращает пул процессов для анализа или None, если анализ выполняется в процессе запроса."""
+    global _dispatcher
+    workers = app.config["ANALYSIS_WORKERS"]
+    if workers <= 1:
+        return None
+    dispatcher = _dispatcher
+    if dispatcher is not None and dispatcher.workers == workers:
+        return dispatcher
+    with _init_lock:
+        if _dispatcher is None or _dispatcher.workers != workers:
+            if _dispatcher is not None:
+                _dispatcher.shutdown()
+            _dispatcher = AnalysisDispatcher(workers, max_pending=app.config["MAX_PENDING"],
+                                             timeout=app.config["REQUEST_TIMEOUT"],
+                                             initializer=partial(text_analyzer.init_worker, text_analyzer.tokenizer))
+        return _dispatcher
+
+def get_cache():
+    """Возвращает кеш результатов или None, если кеш отключен."""
+    global _cache
+    if app.config["CACHE_MAX_BYTES"] <= 0:
+        return None
+    if _cache is not None:
+        return _cache
+    with _init_lock:
+        if _cache is None:
+            if app.config["CACHE_BACKEND"] == "sqlite":
+                os.makedirs(os.path.dirname(app.config["CACHE_PATH"]) or ".", exist_ok=True)
+                _cache = result_cache.SQLiteCache(app.config["CACHE_PATH"], app.config["CACHE_MAX_BYTES"],
+                                                  app.config["CACHE_TTL"])
+            else:
+                _cache = result_cache.MemoryCache(app.config["CACHE_MAX_BYTES"], app.config["CACHE_TTL"])
+        return _cache
+
+def _run_analysis(text, top_n=10, ranking="count"):
+    """
+    Анализирует текст: результат берется из кеша, если текст уже анализировался;
+    длинные тексты анализируются в пуле процессов (если он настроен), короткие — в потоке запроса.
+    """
+    cache = get_cache()
+    if cache is not None:
+        matrix_version = None
+        if ranking == "tfidf":
+            # Веса TF-IDF зависят от матрицы терминов: ключ меняется при ее перестроении
+            _, *version = _file_version(app.config["TERM_MATRIX_PATH"])
+            matrix_version = "-".join(map(str, version))
+        key = result_cache.cache_key(text, top_n, ranking, text_analyzer.tokenizer, matrix_version)
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+    inline_max_chars = app.config["INLINE_MAX_CHARS"]
+    dispatcher = get_dispatcher() if inline_max_chars is not None and len(text) > inline_max_chars else None
+    if dispatcher is None:
+        result = analyze_text(text, top_n, ranking)
+    else:
+        result = dispatcher.run(analyze_text, text, top_n, ranking)
+
+    if cache is not None:
+        cache.set(key, result)
+    return result
+
+def _overloaded_response():
+    """Ответ 503 при заполненной очереди анализа."""
+    return jsonify({"error": OVERLOADED_ERROR}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """Ответ 413 при превышении MAX_CONTENT_LENGTH."""
+    return jsonify({"error": TOO_LARGE_ERROR}), 413
+
+def _analyze_document(document):
+    """Анализирует один документ вида {"text": ...}. Ошибка возвращается в поле "error" результата."""
+    if not isinstance(document, dict) or "text" not in document:
+        return {"error": "Поле 'text' отсутствует в документе"}
+    try:
+        return {"analysis": analyze_text(document["text"])}
+    except Exception as e:
+        logging.error(f"Ошибка при обработке документа: {e}")
+        return {"error": "Произошла ошибка при обработке текста"}
+
+def _analyze_documents(documents):
+    """Анализирует часть пакета документов в процессе пула (см. _analyze_document)."""
+    return [_analyze_document(document) for document in documents]
+
+def _analyze_line(line):
+    """Разбирает строку NDJSON и анализирует документ."""
+    try:
+        document = json.loads(line)
+    except ValueError:
+        return {"error": "Некорректный JSON в строке"}
+    return _analyze_document(document)
+
+def get_index():
+    """
+    Возвращает открытый инвертированный индекс или None, если индекс не построен.
+    Индекс открывается заново, если он перестроен (директория индекса заменяется целиком вместе с lexicon.json).
+    """
+    global _index
+    path = app.config["INDEX_PATH"]
+    version = _file_version(os.path.join(path, "lexicon.json"))
+    if version[1] is None:
+        return None
+    cached = _index
+    if cached is None or cached[0] != version:
+        with _init_lock:
+            cached = _index = _load_versioned(_index, version, lambda: inverted_index.InvertedIndex(path))
+    return cached[1]
+
+@app.route("/search", methods=["GET"])
+def search_api():
+    """
+    Поиск по инвертированному индексу корпуса. Параметры: q — запрос (термины, AND, OR, NOT, скобки),
+    k — количество документов в ответе (по умолчанию 10). Документы ранжируются по BM25.
+    """
+    query = request.args.get("q", "")
+    try:
+        top_k = int(request.args.get("k", 10))
+    except ValueError:
+        top_k = -1
+    if top_k < 0:
+        return jsonify({"error": "Параметр 'k' должен быть неотрицательным целым числом"}), 400
+
+    try:
+        index = get_index()
+        if index is None:
+            return jsonify({"error": NO_INDEX_ERROR}), 503
+
+        total, results = index.search(query, top_k)
+        return jsonify({
+            "query": query,
+            "total": total,
+            "results": [{"file": file, "score": round(score, 4)} for file, score in results],
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": f"Некорректный запрос: {e}"}), 400
+    except Exception as e:
+        logging.error(f"Ошибка при поиске: {e}")
+        return jsonify({"error": "Произошла ошибка при поиске"}), 500
+
+def get_lsh_index():
+    """Возвращает LSH-индекс сигнатур корпуса или None, если индекс не построен; перестроенный индекс загружается заново."""
+    global _lsh_index
+    path = app.config["LSH_PATH"]
+    version = _file_version(path)
+    if version[1] is None:
+        return None
+    cached = _lsh_index
+    if cached is None or cached[0] != version:
+        with _init_lock:
+            cached = _lsh_index = _load_versioned(_lsh_index, version, lambda: minhash.LSHIndex.load(path))
+    return cached[1]
+
+@app.route("/similar", methods=["POST"])
+def similar_api():
+    """
+    Поиск почти одинаковых текстов корпуса по LSH-индексу. Принимает JSON: text — текст (или file — имя
+    текста корпуса), k — количество текстов в ответе (по умолчанию 10), threshold — минимальная оценка
+    сходства Жаккара от 0 до 1 (по умолчанию 0.5).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("text", data.get("file")), str):
+        return jsonify({"error": "Поле 'text' или 'file' должно быть строкой"}), 400
+    top_k = data.get("k", 10)
+    if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 0:
+        return jsonify({"error": "Поле 'k' должно быть неотрицательным целым числом"}), 400
+    threshold = data.get("threshold", 0.5)
+    if not isinstance(threshold, (int, float)) or isinstance(threshold, bool) or not 0 <= threshold <= 1:
+        return jsonify({"error": "Поле 'threshold' должно быть числом от 0 до 1"}), 400
+
+    try:
+        lsh_index = get_lsh_index()
+        if lsh_index is None:
+            return jsonify({"error": NO_LSH_ERROR}), 503
+
+        if "text" in data:
+            with metrics.stage("minhash"):
+                signature = minhash.signature(data["text"].split())
+        else:
+            signature = lsh_index.signature_of(data["file"])
+            if signature is None:
+                return jsonify({"error": f"Текст {data['file']} не найден в LSH-индексе"}), 404
+
+        if signature is None:
+            results = []
+        elif "text" in data:
+            results = lsh_index.query(signature, top_k, threshold)
+        else:
+            # Сам текст корпуса в ответ не включается
+            results = [result for result in lsh_index.query(signature, top_k + 1, threshold)
+                       if result[0] != data["file"]][:top_k]
+        return jsonify({
+            "results": [{"file": file, "similarity": round(score, 4)} for file, score in results],
+        }), 200
+    except Exception as e:
+        logging.error(f"Ошибка при поиске похожих текстов: {e}")
+        return jsonify({"error": "Произошла ошибка при поиске похожих текстов"}), 500
+
+@app.before_request
+def start_request_timer():
+    """Запоминает время начала запроса."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Добавляет время обработки запроса в гистограмму и считает запросы по эндпоинтам и кодам ответа."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        endpoint = request.endpoint or "unknown"
+        metrics.observe("http_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    """Метрики сервера в формате Prometheus: этапы анализа, счетчики, задержки запросов, кеш и таблица лемм."""
+    gauges = {"lemma_memo_size": text_analyzer.lemma_memo_stats()["size"]}
+    cache = get_cache()
+    if cache is not None:
+        for name, value in cache.stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[f"cache_{name}"] = value
+    return Response(metrics.render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats_api():
+    """Возвращает счетчики кеша результатов: попадания, промахи, вытеснения, число записей и объем."""
+    cache = get_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+def _run_batch(dispatcher, documents):
+    """
+    Анализирует документы пакета в пуле. Документы отправляются частями (до max_pending / workers документов,
+    но не больше доли пакета на процесс), чтобы передача задачи в процесс пула оплачивалась один раз на часть,
+    а не на документ; каждый документ части по-прежнему занимает свое место в очереди.
+    Если очередь заполнена, пакет ждет завершения своих частей; если своих частей в работе нет, часть уменьшается,
+    а для единственного документа выбрасывается Overloaded.
+    Весь пакет ждет результатов не дольше dispatcher.timeout секунд (иначе TimeoutError).
+    """
+    deadline = time.monotonic() + dispatcher.timeout if dispatcher.timeout is not None else None
+    results = [None] * len(documents)
+    # future -> номер первого документа части
+    pending = {}
+    chunk_size = max(1, min(-(-len(documents) // dispatcher.workers), dispatcher.max_pending // dispatcher.workers))
+
+    def collect():
+        """Ждет завершения хотя бы одного документа пакета и сохраняет результаты завершившихся."""
+        timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError()
+        for future in done:
+            start = pending.pop(future)
+            chunk = future.result()
+            results[start:start + len(chunk)] = chunk
+
+    try:
+        start = 0
+        while start < len(documents):
+            chunk = documents[start:start + chunk_size]
+            try:
+                pending[dispatcher.submit(_analyze_documents, chunk, slots=len(chunk))] = start
+                start += len(chunk)
+            except Overloaded:
+                if pending:
+                    collect()
+                elif len(chunk) > 1:
+                    chunk_size = len(chunk) // 2
+                else:
+                    raise
+        while pending:
+            collect()
+    finally:
+        # Документы, до которых очередь не дошла, отменяются; выполняющиеся освободят места сами
+        for future in pending:
+            future.cancel()
+    return results
+
+@app.route("/analyze/batch", methods=["POST"])
+def analyze_batch_api():
+    """
+    REST API для пакетного анализа. Принимает {"documents": [{"text": ...}, ...]}
+    и возвращает {"results": [...]} в том же порядке; документы анализируются в пуле процессов.
+    """
+    try:
+        data = request.get_json()
+        documents = data.get("documents") if isinstance(data, dict) else None
+        if not isinstance(documents, list):
+            return jsonify({"error": "Поле 'documents' отсутствует в запросе или не является списком"}), 400
+
+        dispatcher = get_dispatcher()
+        if dispatcher is None:
+            results = [_analyze_document(document) for document in documents]
+        else:
+            results = _run_batch(dispatcher, documents)
+        return jsonify({"results": results}), 200
+
+    except RequestEntityTooLarge:
+        raise
+    except Overloaded:
+        return _overloaded_response()
+    except TimeoutError:
+        return jsonify({"error": TIMEOUT_ERROR}), 504
+    except Exception as e:
+        logging.error(f"Ошибка при обработке пакетного запроса: {e}")
+        return jsonify({"error": "Произошла ошибка при обработке текста"}), 500
+
+@app.route("/analyze/stream", methods=["POST"])
+def analyze_stream_api():
+    """
+    Потоковый REST API: тело запроса — NDJSON, по одному документу {"text": ...} в строке.
+    Результаты возвращаются в формате NDJSON по мере готовности, с номером строки документа в поле "index".
+    Одновременно в работе не больше 2 * ANALYSIS_WORKERS документов, поэтому расход памяти ограничен.
+    Документ, не проанализированный за REQUEST_TIMEOUT секунд, возвращается с ошибкой таймаута.
+    """
+    # Размер тела проверяется при обращении к потоку запроса (413 при превышении MAX_CONTENT_LENGTH)
+    body = request.stream
+    dispatcher = get_dispatcher()
+    window = 2 * app.config["ANALYSIS_WORKERS"]
+
+    # Поток занимает одно место в очереди до отправки последнего результата или закрытия ответа:
+    # если клиент отключится до начала чтения, генератор не запустится, и место освободит call_on_close
+    if dispatcher is not None:
+        try:
+            dispatcher.acquire()
+        except Overloaded:
+            return _overloaded_response()
+    release_lock = threading.Lock()
+    released = []
+
+    def release():
+        with release_lock:
+            if dispatcher is not None and not released:
+                released.append(True)
+                dispatcher.release()
+
+    def lines():
+        for index, line in enumerate(body):
+            if line.strip():
+                yield index, line
+
+    def to_ndjson(index, result):
+        return json.dumps({"index": index, **result}, ensure_ascii=False) + "\n"
+
+    # Документы в работе: future -> (номер строки, срок ожидания результата или None)
+    pending = {}
+    timeout = dispatcher.timeout if dispatcher is not None else None
+
+    def ready(limit):
+        """Отдает готовые результаты и ошибки таймаута, пока в работе не останется меньше limit документов."""
+        while pending and len(pending) >= limit:
+            wait_for = None
+            if timeout is not None:
+                wait_for = max(0.0, min(deadline for _, deadline in pending.values()) - time.monotonic())
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield to_ndjson(pending.pop(future)[0], future.result())
+            if timeout is not None:
+                now = time.monotonic()
+                for future in [future for future, (_, deadline) in pending.items()
+                               if deadline <= now and not future.done()]:
+                    future.cancel()
+                    yield to_ndjson(pending.pop(future)[0], {"error": TIMEOUT_ERROR})
+
+    def generate():
+        if dispatcher is None:
+            for index, line in lines():
+                yield to_ndjson(index, _analyze_line(line))
+            return
+
+        try:
+            for index, line in lines():
+                # Ждем освобождения места в окне, отдавая готовые результаты
+                yield from ready(window)
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                pending[dispatcher.executor.submit(_analyze_line, line)] = (index, deadline)
+            yield from ready(1)
+        finally:
+            for future in pending:
+                future.cancel()
+            release()
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.call_on_close(release)
+    return response
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="REST API для анализа текста.")
+    parser.add_argument("--prepare", action="store_true",
+                        help="перед запуском скачать недостающие ресурсы NLTK")
+    parser.add_argument("--workers", type=int, default=app.config["ANALYSIS_WORKERS"],
+                        help="количество процессов для анализа")
+    parser.add_argument("--serve", action="store_true",
+                        help="продакшн-режим: многопоточный сервер, анализ длинных текстов в пуле процессов")
+    parser.add_argument("--threads", type=int, default=16, help="количество потоков сервера (режим --serve)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="сколько задач может выполняться и ждать в очереди пула (по умолчанию 4 * workers)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="сколько секунд запрос ждет результата анализа (режим --serve)")
+    parser.add_argument("--max-request-size", type=int, default=16,
+                        help="максимальный размер тела запроса в мегабайтах (режим --serve)")
+    parser.add_argument("--inline-max-chars", type=int, default=20000,
+                        help="тексты не длиннее этого порога анализируются в потоке запроса (режим --serve)")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite"], default=app.config["CACHE_BACKEND"],
+                        help="хранилище кеша результатов: в памяти процесса или в общем файле SQLite")
+    parser.add_argument("--cache-size", type=int, default=64,
+                        help="максимальный объем кеша результатов в мегабайтах (0 — без кеша)")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="срок жизни записей кеша в секундах")
+    parser.add_argument("--tokenizer", choices=text_analyzer.TOKENIZERS, default=text_analyzer.tokenizer,
+                        help="токенизатор для ключевых слов: nltk (word_tokenize) или regex (быстрый, без NLTK)")
+    args = parser.parse_args()
+    text_analyzer.set_tokenizer(args.tokenizer)
+    app.config["ANALYSIS_WORKERS"] = args.workers
+    app.config["MAX_PENDING"] = args.max_pending
+    app.config["CACHE_BACKEND"] = args.cache_backend
+    app.config["CACHE_MAX_BYTES"] = args.cache_size * 1024 * 1024
+    app.config["CACHE_TTL"] = args.cache_ttl
+
+    # Ресурсы NLTK скачиваются только по явному запросу; WordNet нужен для лемматизации
+    # при ранжировании по TF-IDF и нормализации поисковых запросов
+    if args.prepare:
+        nltk_resources.prepare(["punkt_tab", "stopwords", "wordnet"])
+
     try:
-        app.run(debug=True, host="0.0.0.0", port=5000)
+        if args.serve:
+            app.config["REQUEST_TIMEOUT"] = args.timeout
+            app.config["MAX_CONTENT_LENGTH"] = args.max_request_size * 1024 * 1024
+            app.config["INLINE_MAX_CHARS"] = args.inline_max_chars
+            serve(app, host="0.0.0.0", port=5000, threads=args.threads)
+        else:
+            app.run(debug=True, host="0.0.0.0", port=5000)
     except Exception as e:
         logging.error(f"Ошибка при запуске приложения: {e}")
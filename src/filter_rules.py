@@ -0,0 +1,190 @@
+import ast
+import json
+import operator
+import numpy as np
+
+# Декларативные правила фильтрации таблицы результатов анализа.
+# Правило — выражение над столбцами таблицы, например "num_chars > 1000" или "num_words >= 20 * num_lines and spam_ratio < 50".
+# Выражение разбирается один раз, проверяется (разрешены только столбцы, числа, строки, арифметика без возведения
+# в степень, сравнения и логические операции) и вычисляется векторно над массивами NumPy: все правила дают одну маску за один проход.
+# Простые сравнения "столбец оператор значение" дополнительно передаются в pyarrow при чтении Parquet.
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+}
+
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+}
+
+# Обозначения операторов сравнения для фильтров pyarrow (см. result_store.OPERATORS)
+_PUSHDOWN_OPERATORS = {ast.Eq: "==", ast.NotEq: "!=", ast.Gt: ">", ast.GtE: ">=", ast.Lt: "<", ast.LtE: "<="}
+
+
+def _to_expression(rule):
+    """Приводит правило к строке; поддерживаются и условия прежнего вида (столбец, оператор, значение)."""
+    if isinstance(rule, (tuple, list)):
+        column, op, value = rule
+        return f"{column} {op} {value!r}"
+    return rule
+
+
+def parse_rule(rule):
+    """
+    Разбирает правило и проверяет, что в нем только разрешенные конструкции.
+    Возвращает дерево выражения (ast) или выбрасывает ValueError.
+    """
+    expression = _to_expression(rule)
+    try:
+        tree = ast.parse(expression, mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Синтаксическая ошибка в правиле '{expression}': {e.msg}") from None
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Compare, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Name, ast.Load,
+                             ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Invert)):
+            continue
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+            continue
+        if type(node) in _COMPARISONS or type(node) in _ARITHMETIC:
+            continue
+        raise ValueError(f"Недопустимая конструкция {type(node).__name__} в правиле '{expression}'")
+
+    # Возведение в степень не поддерживается, а строки не участвуют в арифметике: иначе константное выражение
+    # вроде "a" * 10000000000 вычислялось бы бесконечно долго или исчерпало бы память
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and any(isinstance(operand, ast.Constant) and isinstance(operand.value, str)
+                                               for operand in (node.left, node.right)):
+            raise ValueError(f"Строки нельзя использовать в арифметике в правиле '{expression}'")
+    return tree
+
+
+def _check_columns(trees, columns):
+    """Проверяет, что правила используют только столбцы из списка columns, иначе выбрасывает ValueError."""
+    names = {node.id for tree in trees for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    missing = sorted(names - set(columns))
+    if missing:
+        raise ValueError(f"Неизвестный столбец '{missing[0]}' (доступны: {', '.join(columns)})")
+    return names
+
+
+def _evaluate(node, columns):
+    """Вычисляет дерево выражения над словарем массивов столбцов."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id not in columns:
+            raise ValueError(f"Неизвестный столбец '{node.id}' (доступны: {', '.join(columns)})")
+        return columns[node.id]
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        result = _evaluate(node.values[0], columns)
+        for value in node.values[1:]:
+            result = combine(result, _evaluate(value, columns))
+        return result
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, columns)
+        if isinstance(node.op, ast.Not):
+            return np.logical_not(operand)
+        if isinstance(node.op, ast.Invert):
+            return np.invert(operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp):
+        return _ARITHMETIC[type(node.op)](_evaluate(node.left, columns), _evaluate(node.right, columns))
+
+    # Цепочка сравнений: a < b < c — это (a < b) and (b < c)
+    result = None
+    left = _evaluate(node.left, columns)
+    for op, comparator in zip(node.ops, node.comparators):
+        right = _evaluate(comparator, columns)
+        step = _COMPARISONS[type(op)](left, right)
+        result = step if result is None else np.logical_and(result, step)
+        left = right
+    return result
+
+
+def _column_values(series):
+    """
+    Массив NumPy значений столбца. Пропуски (pd.NA) в столбцах nullable-типов, например duplicate_of,
+    заменяются на NaN в числовых столбцах и на None в остальных: NA в сравнениях вызывает исключение,
+    а None, как и NaN, дает False для "==" и True для "!=".
+    """
+    if isinstance(series.dtype, np.dtype) or not series.hasnans:
+        return series.to_numpy()
+    if series.dtype.kind in "iuf":
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    return series.to_numpy(dtype=object, na_value=None)
+
+
+def compile_rules(rules):
+    """
+    Разбирает список правил и возвращает функцию, вычисляющую по таблице общую маску (все правила через "и").
+    Ошибки в правилах обнаруживаются при компиляции, до чтения данных.
+    """
+    trees = [parse_rule(rule) for rule in rules]
+
+    def mask(df):
+        # Столбцы извлекаются из таблицы один раз, только используемые в правилах
+        names = _check_columns(trees, df.columns)
+        columns = {name: _column_values(df[name]) for name in names}
+
+        result = np.ones(len(df), dtype=bool)
+        for tree in trees:
+            try:
+                value = np.asarray(_evaluate(tree, columns))
+            except ArithmeticError as e:
+                # Деление на ноль в константах (например, "num_words > 1 // 0") — ошибка в правиле
+                raise ValueError(f"Ошибка вычисления правила '{ast.unparse(tree)}': {e}") from None
+            if value.dtype != bool:
+                raise ValueError(f"Правило '{ast.unparse(tree)}' должно давать логическое значение")
+            result &= value
+        return result
+
+    return mask
+
+
+def apply_rules(df, rules):
+    """Оставляет строки таблицы, удовлетворяющие всем правилам."""
+    if not rules:
+        return df
+    return df[compile_rules(rules)(df)].reset_index(drop=True)
+
+
+def pushdown_filters(rules, columns=None):
+    """
+    Возвращает условия (столбец, оператор, значение) для правил вида "столбец оператор значение",
+    которые можно применить при чтении Parquet. Остальные правила применяются после чтения.
+    columns — столбцы файла (схема Parquet): если правило использует другой столбец, выбрасывается ValueError
+    до передачи условий в pyarrow.
+    """
+    trees = [parse_rule(rule) for rule in rules]
+    if columns is not None:
+        _check_columns(trees, columns)
+    filters = []
+    for tree in trees:
+        if (isinstance(tree, ast.Compare) and len(tree.ops) == 1 and isinstance(tree.left, ast.Name)
+                and isinstance(tree.comparators[0], ast.Constant)):
+            filters.append((tree.left.id, _PUSHDOWN_OPERATORS[type(tree.ops[0])], tree.comparators[0].value))
+    return filters
+
+
+def load_rules(path):
+    """Читает правила из JSON-файла: список выражений или объект {"rules": [...]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rules = config.get("rules") if isinstance(config, dict) else config
+    if not isinstance(rules, list) or not all(isinstance(rule, str) for rule in rules):
+        raise ValueError(f"Файл {path} должен содержать список правил или объект {{\"rules\": [...]}}")
+    return rules
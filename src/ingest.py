@@ -0,0 +1,321 @@
+import os
+import gzip
+import time
+import fnmatch
+import hashlib
+import logging
+import tarfile
+import zipfile
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import metrics
+    from . import nltk_resources
+    from . import manifest as manifest_store
+except ImportError:
+    import metrics
+    import nltk_resources
+    import manifest as manifest_store
+
+# Загрузка корпуса в data/text из подключаемых источников: корпусов NLTK, дерева директорий,
+# архивов tar/zip и сжатых файлов .gz. Документы читаются и записываются пулом потоков; запись атомарная
+# (временный файл и переименование), файлы с тем же содержимым не перезаписываются.
+# Контрольная точка results/ingest_checkpoint.json хранит отпечатки источников и записанных файлов:
+# повторная загрузка неизмененного корпуса не читает источники, а прерванная — продолжается с места остановки.
+# Источник задается строкой:
+#     nltk:gutenberg           корпус NLTK
+#     path/to/dir              все файлы директории (рекурсивно; файлы .gz распаковываются)
+#     path/to/texts.tar.gz     архив tar (любое сжатие) или zip
+#     path/to/text.txt.gz      один сжатый файл
+
+CHECKPOINT_PATH = "results/ingest_checkpoint.json"
+
+# Количество потоков загрузки по умолчанию
+THREADS = 8
+
+# Контрольная точка сохраняется не реже чем раз в CHECKPOINT_INTERVAL документов или секунд
+CHECKPOINT_INTERVAL = 200
+CHECKPOINT_SECONDS = 5.0
+
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip")
+
+
+class Document:
+    """
+    Документ источника: имя файла в data/text, отпечаток в источнике (меняется вместе с содержимым)
+    и функция read(), возвращающая содержимое в байтах.
+    """
+
+    __slots__ = ("name", "fingerprint", "read")
+
+    def __init__(self, name, fingerprint, read):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.read = read
+
+
+class Source:
+    """
+    Базовый класс источника. Наследники реализуют documents() — список документов источника —
+    и, если держат открытые файлы, close().
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def documents(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _stat_fingerprint(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_gzip(path):
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+class NLTKCorpusSource(Source):
+    """Корпус NLTK (например gutenberg); тексты сохраняются в UTF-8 под своими идентификаторами."""
+
+    def __init__(self, spec, name):
+        super().__init__(spec)
+        self.name = name
+
+    def documents(self):
+        if self.name == "gutenberg":
+            corpus = nltk_resources.get_gutenberg()
+        else:
+            import nltk.corpus
+
+            if self.name in nltk_resources.RESOURCES:
+                nltk_resources.require(self.name)
+            corpus = getattr(nltk.corpus, self.name)
+        # Список файлов запрашивается здесь, в основном потоке: ленивый загрузчик корпуса не потокобезопасен
+        return [Document(file_id, _stat_fingerprint(str(corpus.abspath(file_id))),
+                         lambda file_id=file_id: corpus.raw(file_id).encode("utf-8"))
+                for file_id in corpus.fileids()]
+
+
+class DirectorySource(Source):
+    """
+    Все файлы дерева директорий (кроме скрытых). Вложенные пути сохраняются в плоскую data/text
+    с "__" вместо разделителя директорий; файлы .gz распаковываются и сохраняются без расширения .gz.
+    """
+
+    def __init__(self, spec, pattern="*"):
+        super().__init__(spec)
+        self.pattern = pattern
+
+    def documents(self):
+        documents = []
+        for root, dirs, files in os.walk(self.spec):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for file in sorted(files):
+                if file.startswith(".") or not fnmatch.fnmatch(file, self.pattern):
+                    continue
+                path = os.path.join(root, file)
+                name = os.path.relpath(path, self.spec).replace(os.sep, "__")
+                if file.endswith(".gz"):
+                    documents.append(Document(name[:-3], _stat_fingerprint(path), partial(_read_gzip, path)))
+                else:
+                    documents.append(Document(name, _stat_fingerprint(path), partial(_read_file, path)))
+        return documents
+
+
+class GzipFileSource(Source):
+    """Один сжатый файл .gz; сохраняется под своим именем без расширения .gz."""
+
+    def documents(self):
+        name = os.path.basename(self.spec)[:-3]
+        return [Document(name, _stat_fingerprint(self.spec), partial(_read_gzip, self.spec))]
+
+
+class ArchiveSource(Source):
+    """
+    Архив tar (с любым сжатием, которое поддерживает tarfile) или zip. Файлы архива сохраняются, как в DirectorySource.
+    Члены tar-архива читаются по очереди (объект tarfile не потокобезопасен), zip — параллельно.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self._lock = threading.Lock()
+        self._archive = None
+
+    def documents(self):
+        if zipfile.is_zipfile(self.spec):
+            archive = self._archive = zipfile.ZipFile(self.spec)
+            members = [(info.filename, f"{info.file_size}:{info.CRC}", info) for info in archive.infolist()
+                       if not info.is_dir()]
+            read = archive.read
+        else:
+            archive = self._archive = tarfile.open(self.spec)
+            members = [(info.name, f"{info.size}:{info.mtime}", info) for info in archive.getmembers() if info.isfile()]
+            read = self._read_tar_member(archive)
+
+        documents = []
+        for path, fingerprint, info in members:
+            if os.path.basename(path).startswith("."):
+                continue
+            name = path.strip("/").replace("/", "__")
+            if name.endswith(".gz"):
+                documents.append(Document(name[:-3], fingerprint,
+                                          lambda info=info: gzip.decompress(read(info))))
+            else:
+                documents.append(Document(name, fingerprint, lambda info=info: read(info)))
+        return documents
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _read_tar_member(self, archive):
+        def read(info):
+            with self._lock:
+                return archive.extractfile(info).read()
+        return read
+
+
+def open_source(spec):
+    """Создает источник по строке (см. описание модуля). Если источник не найден, выбрасывает ValueError."""
+    if spec.startswith("nltk:"):
+        return NLTKCorpusSource(spec, spec[len("nltk:"):])
+    if os.path.isdir(spec):
+        return DirectorySource(spec)
+    if not os.path.isfile(spec):
+        raise ValueError(f"Источник текстов не найден: {spec}")
+    if spec.endswith(ARCHIVE_SUFFIXES) or zipfile.is_zipfile(spec) or tarfile.is_tarfile(spec):
+        return ArchiveSource(spec)
+    if spec.endswith(".gz"):
+        return GzipFileSource(spec)
+    raise ValueError(f"Неподдерживаемый источник текстов: {spec}")
+
+
+def _target_state(path):
+    """Размер и время изменения файла или None, если файла нет."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _write_atomic(path, data):
+    """Записывает данные во временный файл рядом с path и переименовывает его в path."""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _ingest_document(document, target_dir, entry):
+    """
+    Загружает документ в target_dir и возвращает (статус, запись контрольной точки).
+    Статусы: "skipped" — источник и файл не менялись с прошлой загрузки (источник не читается),
+    "unchanged" — содержимое совпало с файлом, "written" — файл записан.
+    """
+    path = os.path.join(target_dir, document.name)
+    state = _target_state(path)
+    if (entry is not None and entry["source"] == document.fingerprint and state is not None
+            and [entry["size"], entry["mtime_ns"]] == list(state)):
+        return "skipped", entry
+
+    with metrics.stage("download", histogram="file_seconds"):
+        data = document.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        # Хеш существующего файла берется из контрольной точки, если файл не менялся, иначе считается заново
+        if state is not None and state[0] == len(data):
+            if entry is not None and [entry["size"], entry["mtime_ns"]] == list(state):
+                existing = entry["sha256"]
+            else:
+                existing = manifest_store.file_hash(path)
+            status = "unchanged" if existing == sha256 else "written"
+        else:
+            status = "written"
+
+        if status == "written":
+            _write_atomic(path, data)
+            if metrics.enabled:
+                metrics.inc("bytes_written_total", len(data), stage="download")
+        if metrics.enabled:
+            metrics.inc("documents_total", stage="download")
+
+    size, mtime_ns = _target_state(path)
+    return status, {"source": document.fingerprint, "sha256": sha256, "size": size, "mtime_ns": mtime_ns}
+
+
+def ingest(sources, target_dir="data/text", threads=THREADS, checkpoint_path=CHECKPOINT_PATH):
+    """
+    Загружает документы источников sources (строки или объекты Source) в target_dir пулом из threads потоков.
+    Возвращает количество документов по статусам: written, unchanged, skipped, failed.
+    Документы с одинаковыми именами загружаются из первого источника, остальные пропускаются с предупреждением.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    checkpoint = manifest_store.load_manifest(checkpoint_path) if checkpoint_path else {}
+    entries = checkpoint.get("documents", {}) if checkpoint.get("target") == os.path.abspath(target_dir) else {}
+
+    sources = [open_source(source) if isinstance(source, str) else source for source in sources]
+    documents = {}
+    for source in sources:
+        for document in source.documents():
+            if document.name in documents:
+                logging.warning(f"Документ {document.name} из {source.spec} уже загружается из другого источника, пропущен.")
+                continue
+            documents[document.name] = document
+
+    counts = {"written": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+    saved_at = time.monotonic()
+    since_save = 0
+
+    def save_checkpoint():
+        if checkpoint_path:
+            manifest_store.save_manifest({"target": os.path.abspath(target_dir), "documents": entries}, checkpoint_path)
+
+    def task(document):
+        try:
+            return _ingest_document(document, target_dir, entries.get(document.name))
+        except Exception as e:
+            logging.error(f"Ошибка при загрузке {document.name}: {e}")
+            return "failed", None
+
+    executor = ThreadPoolExecutor(max_workers=max(1, threads))
+    try:
+        for document, (status, entry) in zip(documents.values(), executor.map(task, documents.values())):
+            counts[status] += 1
+            if entry is None or status == "skipped":
+                continue
+            logging.info(f"Текст {document.name} {'сохранен' if status == 'written' else 'не изменился'}.")
+            entries[document.name] = entry
+            since_save += 1
+            if since_save >= CHECKPOINT_INTERVAL or time.monotonic() - saved_at >= CHECKPOINT_SECONDS:
+                save_checkpoint()
+                saved_at = time.monotonic()
+                since_save = 0
+    finally:
+        # При прерывании оставшиеся документы не загружаются, а загруженные попадают в контрольную точку:
+        # следующий запуск продолжит с места остановки, не читая их источники
+        executor.shutdown(wait=True, cancel_futures=True)
+        if since_save:
+            save_checkpoint()
+        for source in sources:
+            source.close()
+    return counts
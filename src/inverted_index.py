@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import shutil
+import numpy as np
+
+try:
+    from . import text_analyzer
+    from .term_matrix import BM25_B, BM25_K1
+except ImportError:
+    import text_analyzer
+    from term_matrix import BM25_B, BM25_K1
+
+# Инвертированный индекс корпуса: термин -> список документов (posting list) с частотами термина.
+# Списки хранятся на диске в results/index/ в сжатом виде: пары (разность номеров документов, частота)
+# кодируются varint и при поиске читаются через отображение файла в память, без повторного чтения текстов.
+#     postings.npy  — байты всех списков подряд
+#     offsets.npy   — начало списка каждого термина в postings.npy
+#     doc_freq.npy  — количество документов с термином
+#     doc_lengths.npy — количество слов в каждом документе (для BM25)
+#     lexicon.json  — имена файлов и словарь терминов
+
+INDEX_DIR = "results/index"
+
+# Запрос: термины, операторы AND, OR, NOT и скобки; термины без оператора объединяются через AND
+_QUERY_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+OPERATORS = ("AND", "OR", "NOT")
+
+
+def encode_varints(values):
+    """
+    Кодирует неотрицательные целые числа в формате varint (по 7 бит в байте, старший бит — продолжение).
+    Возвращает массив байтов и смещения начала каждого числа (длина len(values) + 1).
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    data = np.empty(offsets[-1], dtype=np.uint8)
+
+    # Байты с одинаковым номером внутри числа записываются для всех чисел сразу
+    for k in range(int(sizes.max()) if len(values) else 0):
+        mask = sizes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= (sizes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        data[offsets[:-1][mask] + k] = byte
+    return data, offsets
+
+
+def decode_varints(data):
+    """Декодирует последовательность чисел varint в массив uint64."""
+    data = np.asarray(data, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+    if len(ends) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    # Все числа однобайтовые (частый случай для списков частых терминов)
+    if len(ends) == len(data):
+        return data.astype(np.uint64)
+
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    sizes = ends - starts + 1
+
+    # Сдвиг каждого байта — 7 бит на его позицию внутри числа
+    shifts = np.arange(len(data)) - np.repeat(starts, sizes)
+    parts = (data & 0x7F).astype(np.uint64) << (7 * shifts).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+def build_index(matrix, path=INDEX_DIR):
+    """
+    Строит инвертированный индекс по матрице документ-термин (term_matrix.TermMatrix) и сохраняет его в директорию path.
+    Списки всех терминов кодируются одним проходом; старый индекс заменяется новым целиком.
+    """
+    num_terms = len(matrix.vocabulary)
+    rows = np.repeat(np.arange(matrix.num_docs), np.diff(matrix.indptr))
+
+    # Устойчивая сортировка по термину сохраняет возрастающий порядок документов внутри каждого списка
+    order = np.argsort(matrix.indices, kind="stable")
+    doc_ids = rows[order]
+    freqs = matrix.counts[order]
+    doc_freq = np.bincount(matrix.indices, minlength=num_terms)
+    term_starts = np.zeros(num_terms + 1, dtype=np.int64)
+    np.cumsum(doc_freq, out=term_starts[1:])
+
+    # Номера документов хранятся разностями с предыдущим номером в том же списке
+    deltas = doc_ids.copy()
+    deltas[1:] -= doc_ids[:-1]
+    first = term_starts[:-1][doc_freq > 0]
+    deltas[first] = doc_ids[first]
+
+    values = np.empty(2 * len(doc_ids), dtype=np.int64)
+    values[0::2] = deltas
+    values[1::2] = freqs
+    postings, value_offsets = encode_varints(values)
+    offsets = value_offsets[2 * term_starts]
+
+    doc_lengths = np.bincount(rows, weights=matrix.counts, minlength=matrix.num_docs).astype(np.int64)
+
+    # Индекс собирается во временной директории и подменяет старый после записи всех файлов
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "postings.npy"), postings)
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_path, "doc_freq.npy"), doc_freq.astype(np.int64))
+    np.save(os.path.join(tmp_path, "doc_lengths.npy"), doc_lengths)
+    with open(os.path.join(tmp_path, "lexicon.json"), "w", encoding="utf-8") as f:
+        json.dump({"files": matrix.files, "terms": matrix.vocabulary}, f, ensure_ascii=False)
+
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def normalize_term(term):
+    """Приводит термин запроса к виду, в котором он хранится в индексе: нижний регистр и лемма."""
+    return text_analyzer.lemmatize_word(term.lower())
+
+
+def parse_query(query):
+    """
+    Разбирает запрос в дерево: ("term", термин), ("and", a, b), ("or", a, b), ("not", a).
+    Приоритет операторов: NOT, затем AND, затем OR. При синтаксической ошибке выбрасывает ValueError.
+    """
+    tokens = _QUERY_TOKEN_RE.findall(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() is not None and peek() not in ("OR", ")"):
+            if peek() == "AND":
+                take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token is None:
+            raise ValueError("Запрос неполный")
+        if token in OPERATORS or token == ")":
+            raise ValueError(f"Неожиданный оператор '{token}' в запросе")
+        take()
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError("Не хватает закрывающей скобки")
+            take()
+            return node
+        return ("term", token)
+
+    if not tokens:
+        raise ValueError("Пустой запрос")
+    node = parse_or()
+    if peek() is not None:
+        raise ValueError(f"Неожиданный токен '{peek()}' в запросе")
+    return node
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс, открытый для поиска. Байты списков отображаются в память,
+    поэтому в памяти процесса находится только словарь, а запрос читает с диска лишь списки своих терминов.
+    """
+
+    def __init__(self, path=INDEX_DIR):
+        self.path = path
+        self.postings_data = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.doc_freq = np.load(os.path.join(path, "doc_freq.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"))
+        with open(os.path.join(path, "lexicon.json"), "r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+        self.files = lexicon["files"]
+        self.term_ids = {term: term_id for term_id, term in enumerate(lexicon["terms"])}
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.files) else 0.0
+
+    @property
+    def num_docs(self):
+        return len(self.files)
+
+    def postings(self, term):
+        """Возвращает список документов с термином: (номера документов по возрастанию, частоты термина)."""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        values = decode_varints(self.postings_data[self.offsets[term_id]:self.offsets[term_id + 1]]).astype(np.int64)
+        return np.cumsum(values[0::2]), values[1::2]
+
+    def _evaluate(self, node, fetch):
+        """
+        Вычисляет дерево запроса: возвращает маску подходящих документов и положительные термины запроса.
+        Операции над масками длины num_docs не требуют сортировки и объединения списков.
+        """
+        kind = node[0]
+        if kind == "term":
+            mask = np.zeros(self.num_docs, dtype=bool)
+            mask[fetch(node[1])[0]] = True
+            return mask, [node[1]]
+        if kind == "not":
+            mask, _ = self._evaluate(node[1], fetch)
+            return ~mask, []
+
+        left, left_terms = self._evaluate(node[1], fetch)
+        right, right_terms = self._evaluate(node[2], fetch)
+        if kind == "and":
+            return left & right, left_terms + right_terms
+        return left | right, left_terms + right_terms
+
+    def search(self, query, top_k=10, normalize=normalize_term):
+        """
+        Выполняет запрос и возвращает (количество найденных документов, [(файл, вес BM25), ...] — топ-k по убыванию веса).
+        Вес документа — сумма весов BM25 терминов запроса, не стоящих под NOT.
+        """
+        # Список каждого термина декодируется один раз за запрос
+        postings = {}
+
+        def fetch(term):
+            term = normalize(term)
+            if term not in postings:
+                postings[term] = self.postings(term)
+            return postings[term]
+
+        mask, terms = self._evaluate(parse_query(query), fetch)
+        docs = np.flatnonzero(mask)
+        if len(docs) == 0:
+            return 0, []
+
+        # Веса начисляются по спискам терминов, затем выбираются для найденных документов
+        scores = np.zeros(self.num_docs)
+        for term in {normalize(term) for term in terms}:
+            term_docs, freqs = postings[term]
+            if len(term_docs) == 0:
+                continue
+            tf = freqs.astype(np.float64)
+            lengths = self.doc_lengths[term_docs]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self.avg_length) if self.avg_length else BM25_K1
+            idf = np.log(1 + (self.num_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            scores[term_docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores = scores[docs]
+
+        # Топ-k без полной сортировки; при равных весах — в порядке номеров документов.
+        # argpartition выбирает из равных k-му весу документов произвольные, поэтому берутся все документы
+        # не ниже k-го веса, а лишние отсекаются после сортировки с учетом номеров
+        if len(docs) > top_k:
+            if top_k > 0:
+                kth = np.partition(-scores, top_k - 1)[top_k - 1]
+                top = np.flatnonzero(-scores <= kth)
+            else:
+                top = np.zeros(0, dtype=np.int64)
+        else:
+            top = np.arange(len(docs))
+        top = top[np.lexsort((docs[top], -scores[top]))][:top_k]
+        return len(docs), [(self.files[docs[i]], float(scores[i])) for i in top]
@@ -0,0 +1,70 @@
+import os
+import json
+import hashlib
+
+# Манифест инкрементального анализа: для каждого файла хранит размер, время изменения, хеш содержимого,
+# рассчитанную статистику и ключевые слова (с токенизатором, которым они извлечены),
+# чтобы при повторном запуске обрабатывать только измененные файлы
+
+MANIFEST_PATH = "results/manifest.json"
+
+# Размер блока при вычислении хеша (в байтах)
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Загружает манифест из JSON файла. Если файла нет, возвращает пустой манифест."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Атомарно сохраняет манифест: запись во временный файл и последующее переименование."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def file_hash(path):
+    """Вычисляет SHA-256 содержимого файла, читая его блоками."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_entry(manifest, path):
+    """
+    Возвращает запись манифеста для файла, если файл не изменился, иначе None.
+    Если совпадают размер и время изменения, хеш не пересчитывается; если изменилось только время,
+    сравнивается хеш содержимого и при совпадении время в записи обновляется.
+    """
+    entry = manifest.get(path)
+    if entry is None:
+        return None
+
+    st = os.stat(path)
+    if entry["size"] != st.st_size:
+        return None
+    if entry["mtime_ns"] == st.st_mtime_ns:
+        return entry
+    if file_hash(path) == entry["sha256"]:
+        entry["mtime_ns"] = st.st_mtime_ns
+        return entry
+    return None
+
+
+def make_entry(path, stats):
+    """Создает запись манифеста для файла с рассчитанной статистикой."""
+    st = os.stat(path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": file_hash(path),
+        "stats": stats,
+    }
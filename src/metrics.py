@@ -0,0 +1,251 @@
+import json
+import time
+import bisect
+import logging
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Инструментирование конвейера и REST API: таймеры этапов (время по часам и процессорное), счетчики
+# (прочитанные байты, токены, уникальные слова, попадания в таблицу лемм) и гистограммы задержек.
+# По умолчанию выключено: таймер этапа возвращает пустой контекст, счетчики не обновляются.
+# Включается вызовом enable() — REST API включает его при импорте, пакетный режим — параметром --report.
+# Метрики отдаются в формате Prometheus (render_prometheus, эндпоинт /metrics) и в виде JSON-отчета (write_report).
+
+PREFIX = "text_analysis_"
+
+# Границы корзин гистограмм задержек в секундах
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Описания метрик для формата Prometheus
+HELP = {
+    "stage_wall_seconds_total": "Время выполнения этапа по часам",
+    "stage_cpu_seconds_total": "Процессорное время этапа",
+    "stage_calls_total": "Количество выполнений этапа",
+    "bytes_read_total": "Прочитано байтов текстов",
+    "bytes_written_total": "Записано байтов текстов",
+    "documents_total": "Обработано документов",
+    "tokens_total": "Количество токенов",
+    "unique_words_total": "Количество уникальных токенов (сумма по документам и фрагментам)",
+    "lemma_cache_hits_total": "Попадания в таблицу мемоизации лемм",
+    "lemma_cache_misses_total": "Промахи таблицы мемоизации лемм",
+    "file_seconds": "Время обработки одного файла",
+    "http_request_seconds": "Время обработки HTTP-запроса",
+    "http_requests_total": "Количество HTTP-запросов",
+}
+
+enabled = False
+
+_lock = threading.Lock()
+_counters = {}    # (имя, метки) -> значение
+_histograms = {}  # (имя, метки) -> [счетчики корзин..., сумма, количество]
+
+
+def enable(value=True):
+    """Включает или выключает сбор метрик в текущем процессе."""
+    global enabled
+    enabled = value
+
+
+def reset():
+    """Удаляет все собранные метрики."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Увеличивает счетчик name на value."""
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Добавляет значение value в гистограмму name."""
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+        histogram[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+
+@contextmanager
+def _timed(stage, histogram):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        inc("stage_wall_seconds_total", wall, stage=stage)
+        inc("stage_cpu_seconds_total", time.process_time() - cpu, stage=stage)
+        inc("stage_calls_total", stage=stage)
+        if histogram is not None:
+            observe(histogram, wall, stage=stage)
+
+
+_NO_TIMER = nullcontext()
+
+
+def stage(name, histogram=None):
+    """
+    Контекст, замеряющий время этапа name (по часам и процессорное).
+    Если задан histogram, время каждого выполнения добавляется еще и в эту гистограмму.
+    При выключенных метриках возвращается пустой контекст.
+    """
+    if not enabled:
+        return _NO_TIMER
+    return _timed(name, histogram)
+
+
+def snapshot():
+    """Возвращает копию собранных метрик (для передачи из дочернего процесса и для отчета)."""
+    with _lock:
+        return {
+            "counters": [[name, list(labels), value] for (name, labels), value in _counters.items()],
+            "histograms": [[name, list(labels), list(values)] for (name, labels), values in _histograms.items()],
+        }
+
+
+def merge(data):
+    """Добавляет к метрикам процесса метрики из snapshot() другого процесса."""
+    with _lock:
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            _counters[key] = _counters.get(key, 0) + value
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            histogram = _histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                histogram[i] += value
+
+
+class Collected:
+    """
+    Обертка функции для пула процессов: выполняет func в дочернем процессе со включенными метриками
+    и возвращает (результат, метрики этого вызова), чтобы родительский процесс добавил их к своим через merge().
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, item):
+        enable()
+        reset()
+        result = self.func(item)
+        return result, snapshot()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def render_prometheus(extra_gauges=None):
+    """
+    Возвращает метрики в текстовом формате Prometheus.
+    extra_gauges — дополнительные значения {имя: значение}, например статистика кеша.
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+
+    lines = []
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            short = name[len(PREFIX):]
+            if short in HELP:
+                lines.append(f"# HELP {name} {HELP[short]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        declare(PREFIX + name, "counter")
+        lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), values in histograms:
+        declare(PREFIX + name, "histogram")
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), values):
+            cumulative += count
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {values[-2]}")
+        lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {values[-1]}")
+
+    for name, value in sorted((extra_gauges or {}).items()):
+        declare(PREFIX + name, "gauge")
+        lines.append(f"{PREFIX}{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def report():
+    """
+    Возвращает отчет о запуске: этапы {этап: {calls, wall_seconds, cpu_seconds}}, счетчики
+    и гистограммы времени обработки файлов (корзины, сумма, количество).
+    """
+    data = snapshot()
+    stages = {}
+    counters = {}
+    fields = {"stage_calls_total": "calls", "stage_wall_seconds_total": "wall_seconds",
+              "stage_cpu_seconds_total": "cpu_seconds"}
+    for name, labels, value in data["counters"]:
+        labels = dict(labels)
+        if name in fields:
+            stages.setdefault(labels["stage"], {})[fields[name]] = round(value, 6)
+        else:
+            counters[name + "".join(f"[{k}={v}]" for k, v in sorted(labels.items()))] = value
+
+    histograms = {}
+    for name, labels, values in data["histograms"]:
+        histograms[name + "".join(f"[{k}={v}]" for k, v in labels)] = {
+            "buckets": dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], values[:-2])),
+            "sum": round(values[-2], 6),
+            "count": values[-1],
+        }
+    return {"stages": stages, "counters": counters, "histograms": histograms}
+
+
+def write_report(path, **extra):
+    """Сохраняет отчет о запуске в JSON; extra добавляется в отчет как есть."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**extra, **report()}, f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profiled(path=None, top=20):
+    """
+    Профилирует блок cProfile, если задан path: статистика сохраняется в path (формат pstats),
+    а top самых долгих функций (по суммарному времени) выводится в лог. Без path профилирование не выполняется.
+    """
+    if path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        summary = "\n".join(f"{values[3]:10.3f} s  {func[2]} ({func[0]}:{func[1]})" for func, values in rows)
+        logging.info(f"Профиль сохранен в {path}. Самые долгие функции (суммарное время):\n{summary}")
@@ -0,0 +1,210 @@
+import os
+import zlib
+import numpy as np
+
+# Поиск почти одинаковых документов: MinHash-сигнатуры по шинглам (последовательностям из SHINGLE_SIZE слов)
+# и LSH-индекс по полосам сигнатур. Сигнатура строится однопроходным MinHash (one permutation hashing):
+# каждый шингл хешируется один раз и попадает в одну из NUM_BINS корзин, в корзине хранится минимальный хеш.
+# Поэтому сигнатура считается за линейное время попутно с разбиением текста на слова и обновляется по фрагментам.
+# Документы, совпавшие хотя бы в одной полосе сигнатуры (BANDS полос по NUM_BINS // BANDS значений),
+# считаются кандидатами; почти дубликаты — кандидаты с оценкой сходства Жаккара не ниже THRESHOLD.
+
+LSH_PATH = "results/lsh_index.npz"
+
+NUM_BINS = 128
+BANDS = 16
+SHINGLE_SIZE = 5
+THRESHOLD = 0.8
+
+# Значение пустой корзины (больше любого 32-битного хеша)
+EMPTY = np.uint64(1 << 63)
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+
+def _word_hashes(words):
+    """32-битные хеши слов (CRC32 не зависит от процесса, в отличие от hash())."""
+    return np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+
+
+class MinHash:
+    """
+    Сигнатура документа. update(words) добавляет очередной фрагмент текста (список слов);
+    шинглы на стыке фрагментов учитываются. Слова не нормализуются: сравниваются тексты как есть.
+    """
+
+    def __init__(self, num_bins=NUM_BINS, shingle_size=SHINGLE_SIZE):
+        if num_bins & (num_bins - 1):
+            raise ValueError("Количество корзин MinHash должно быть степенью двойки")
+        self.num_bins = num_bins
+        self.shingle_size = shingle_size
+        self.bins = np.full(num_bins, EMPTY, dtype=np.uint64)
+        self._tail = np.zeros(0, dtype=np.uint64)
+        self._shingles = 0
+
+    def update(self, words):
+        hashes = _word_hashes(words)
+        if len(self._tail):
+            hashes = np.concatenate([self._tail, hashes])
+        count = len(hashes) - self.shingle_size + 1
+        if count <= 0:
+            self._tail = hashes
+            return
+
+        # Полиномиальный хеш каждого окна из shingle_size слов (переполнение uint64 — деление по модулю 2^64)
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles = shingles * _MULTIPLIER + hashes[offset:offset + count]
+        self._add(shingles)
+        self._shingles += count
+        self._tail = hashes[count:]
+
+    def _add(self, shingles):
+        shingles ^= shingles >> np.uint64(33)
+        shingles *= _MIX
+        shingles ^= shingles >> np.uint64(33)
+        # Старшие биты выбирают корзину, младшие 32 бита — значение
+        bins = (shingles >> np.uint64(64 - self.num_bins.bit_length() + 1)).astype(np.intp)
+        np.minimum.at(self.bins, bins, shingles & np.uint64(0xFFFFFFFF))
+
+    def digest(self):
+        """
+        Возвращает сигнатуру (uint64, num_bins значений) или None, если в тексте нет слов.
+        Пустые корзины заполняются значением ближайшей непустой корзины справа со сдвигом на расстояние до нее.
+        """
+        if not self._shingles and len(self._tail):
+            # Текст короче одного шингла: весь текст — один шингл
+            shingles = np.zeros(1, dtype=np.uint64)
+            for value in self._tail:
+                shingles = shingles * _MULTIPLIER + value
+            self._add(shingles)
+            self._shingles = 1
+            self._tail = np.zeros(0, dtype=np.uint64)
+
+        bins = self.bins
+        filled = np.flatnonzero(bins != EMPTY)
+        if not len(filled):
+            return None
+        if len(filled) == self.num_bins:
+            return bins.copy()
+
+        positions = np.arange(self.num_bins)
+        nearest = np.searchsorted(filled, positions) % len(filled)
+        source = filled[nearest]
+        distance = (source - positions) % self.num_bins
+        return bins[source] + distance.astype(np.uint64) * np.uint64(1 << 32)
+
+
+def signature(words, num_bins=NUM_BINS, shingle_size=SHINGLE_SIZE):
+    """Сигнатура списка слов (см. MinHash.digest)."""
+    minhash = MinHash(num_bins, shingle_size)
+    minhash.update(words)
+    return minhash.digest()
+
+
+def similarity(a, b):
+    """Оценка сходства Жаккара по сигнатурам: доля совпавших корзин."""
+    return float(np.mean(a == b))
+
+
+class LSHIndex:
+    """
+    LSH-индекс сигнатур документов: files — имена документов, signatures — матрица (документ x корзина).
+    Корзины LSH хранятся в словарях {полоса сигнатуры: [номера документов]}, по одному на полосу.
+    """
+
+    def __init__(self, files, signatures, bands=BANDS):
+        self.files = list(files)
+        self.positions = {file: doc for doc, file in enumerate(self.files)}
+        if self.files:
+            self.signatures = np.asarray(signatures, dtype=np.uint64).reshape(len(self.files), -1)
+        else:
+            self.signatures = np.empty((0, NUM_BINS), dtype=np.uint64)
+        # Файл, из которого загружен индекс (None, если индекс построен в памяти)
+        self.path = None
+        if self.signatures.shape[1] % bands:
+            raise ValueError("Длина сигнатуры должна делиться на количество полос")
+        self.bands = bands
+        self.rows = self.signatures.shape[1] // bands
+        self.buckets = [{} for _ in range(bands)]
+        for doc, sig in enumerate(self.signatures):
+            for band, key in enumerate(self._keys(sig)):
+                self.buckets[band].setdefault(key, []).append(doc)
+
+    def _keys(self, sig):
+        return [sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def candidates(self, sig):
+        """Номера документов, совпавших с сигнатурой sig хотя бы в одной полосе."""
+        docs = set()
+        for band, key in enumerate(self._keys(sig)):
+            docs.update(self.buckets[band].get(key, ()))
+        return sorted(docs)
+
+    def query(self, sig, top_k=10, threshold=0.0):
+        """Возвращает до top_k документов-кандидатов [(имя, сходство), ...] со сходством не ниже threshold."""
+        docs = np.array(self.candidates(sig), dtype=np.intp)
+        if not len(docs):
+            return []
+        scores = np.mean(self.signatures[docs] == sig, axis=1)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [(self.files[docs[i]], float(scores[i])) for i in order if scores[i] >= threshold]
+
+    def clusters(self, threshold=THRESHOLD):
+        """
+        Группы почти одинаковых документов: возвращает {документ: представитель группы} для всех документов,
+        у которых нашелся почти дубликат, кроме самих представителей. Представитель — первый по имени документ группы.
+        Для каждой корзины LSH каждый документ сравнивается только с первым документом корзины,
+        поэтому время линейно по количеству документов.
+        """
+        parent = list(range(len(self.files)))
+
+        def find(doc):
+            while parent[doc] != doc:
+                parent[doc] = parent[parent[doc]]
+                doc = parent[doc]
+            return doc
+
+        for buckets in self.buckets:
+            for docs in buckets.values():
+                if len(docs) < 2:
+                    continue
+                first = docs[0]
+                scores = np.mean(self.signatures[docs[1:]] == self.signatures[first], axis=1)
+                for doc, score in zip(docs[1:], scores):
+                    if score >= threshold:
+                        a, b = find(first), find(doc)
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+
+        groups = {}
+        for doc in range(len(self.files)):
+            groups.setdefault(find(doc), []).append(self.files[doc])
+        result = {}
+        for members in groups.values():
+            if len(members) > 1:
+                representative = min(members)
+                result.update({member: representative for member in members if member != representative})
+        return result
+
+    def save(self, path=LSH_PATH):
+        """Сохраняет сигнатуры в файл NumPy (.npz); корзины строятся заново при загрузке."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, files=np.array(self.files, dtype=str), signatures=self.signatures,
+                            bands=np.array(self.bands))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LSH_PATH):
+        """Загружает индекс из файла, сохраненного save()."""
+        with np.load(path) as data:
+            index = cls(data["files"].tolist(), data["signatures"], int(data["bands"]))
+        index.path = path
+        return index
+
+    def signature_of(self, file):
+        """Сигнатура документа file или None, если его нет в индексе."""
+        doc = self.positions.get(file)
+        return self.signatures[doc] if doc is not None else None
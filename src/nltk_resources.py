@@ -0,0 +1,116 @@
+import sys
+import logging
+from functools import lru_cache
+
+# Менеджер ресурсов NLTK: ресурсы загружаются лениво при первом использовании и кешируются на процесс.
+# При импорте модулей проекта сетевых запросов нет — скачивание выполняется только явно:
+#     python nltk_resources.py            # скачать все недостающие ресурсы
+#     python nltk_resources.py wordnet    # скачать только указанные
+
+# Ресурсы, используемые проектом, и их пути в nltk.data
+RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+    "gutenberg": "corpora/gutenberg",
+}
+
+# Результаты проверки наличия ресурсов на диске (проверка выполняется один раз на ресурс)
+_available = {}
+
+
+def is_available(name):
+    """Проверяет, есть ли ресурс name в локальных путях nltk.data. Результат кешируется."""
+    if name not in _available:
+        import nltk
+
+        try:
+            nltk.data.find(RESOURCES[name])
+            _available[name] = True
+        except LookupError:
+            _available[name] = False
+    return _available[name]
+
+
+def missing_resources(names=None):
+    """Возвращает список ресурсов из names (по умолчанию всех), отсутствующих локально."""
+    return [name for name in (names or RESOURCES) if not is_available(name)]
+
+
+def require(*names):
+    """
+    Проверяет, что локально есть хотя бы один из ресурсов names,
+    иначе выбрасывает LookupError с подсказкой, как его скачать.
+    """
+    if not any(is_available(name) for name in names):
+        raise LookupError(f"Ресурс NLTK '{names[0]}' не найден. Скачайте его командой: python nltk_resources.py {names[0]}")
+
+
+def prepare(names=None):
+    """
+    Скачивает недостающие ресурсы NLTK (по умолчанию все из RESOURCES).
+    Уже имеющиеся ресурсы не проверяются по сети. Возвращает список ресурсов, которые скачать не удалось.
+    """
+    import nltk
+
+    unknown = [name for name in (names or ()) if name not in RESOURCES]
+    if unknown:
+        raise ValueError(f"Неизвестные ресурсы NLTK: {', '.join(unknown)}")
+
+    failed = []
+    for name in missing_resources(names):
+        logging.info(f"Загрузка пакета NLTK {name}...")
+        if nltk.download(name, quiet=True):
+            logging.info(f"Пакет {name} загружен.")
+        else:
+            logging.error(f"Не удалось загрузить пакет {name}.")
+            failed.append(name)
+        _available.pop(name, None)
+    return failed
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer():
+    """Возвращает функцию токенизации word_tokenize."""
+    # Новые версии NLTK используют punkt_tab, старые — punkt
+    require("punkt_tab", "punkt")
+    from nltk.tokenize import word_tokenize
+
+    return word_tokenize
+
+
+def word_tokenize(text):
+    """Делит текст на токены токенизатором NLTK (Punkt + Treebank)."""
+    return get_tokenizer()(text)
+
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """Возвращает множество английских стоп-слов; корпус читается один раз на процесс."""
+    require("stopwords")
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words("english"))
+
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    """Возвращает лемматизатор WordNet; словарь WordNet загружается при первом обращении."""
+    require("wordnet")
+    from nltk.stem import WordNetLemmatizer
+
+    return WordNetLemmatizer()
+
+
+def get_gutenberg():
+    """Возвращает корпус Gutenberg."""
+    require("gutenberg")
+    from nltk.corpus import gutenberg
+
+    return gutenberg
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(1 if prepare(sys.argv[1:] or None) else 0)
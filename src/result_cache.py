@@ -0,0 +1,236 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Кеш результатов анализа для REST API. Ключ — хеш текста, параметр top_n и способ ранжирования, значение — результат в JSON.
+# Объем кеша ограничен в байтах (вытесняются давно не использованные записи), записи могут иметь срок жизни.
+# MemoryCache хранит записи в памяти процесса, SQLiteCache — в файле SQLite, общем для нескольких процессов сервера.
+
+
+def cache_key(text, top_n, ranking="count", tokenizer="nltk", matrix_version=None):
+    """
+    Возвращает ключ кеша для текста, параметра top_n, способа ранжирования ключевых слов и токенизатора.
+    matrix_version — версия матрицы терминов, по которой посчитаны веса TF-IDF: после перестроения матрицы
+    прежние результаты не используются.
+    """
+    digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    key = f"{digest}:{top_n}"
+    if ranking != "count":
+        key += f":{ranking}"
+    if tokenizer != "nltk":
+        key += f":{tokenizer}"
+    if matrix_version is not None:
+        key += f":{matrix_version}"
+    return key
+
+
+class CacheBackend:
+    """
+    Базовый класс хранилища кеша. Наследники реализуют _get, _set и _clear,
+    а счетчики попаданий, промахов и вытеснений ведутся здесь (под блокировкой: кеш общий для потоков сервера).
+    """
+
+    name = "base"
+
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counters_lock = threading.Lock()
+
+    def get(self, key):
+        """Возвращает сохраненный результат или None."""
+        value = self._get(key, time.time())
+        with self._counters_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, result):
+        """Сохраняет результат. Записи больше max_bytes не кешируются."""
+        value = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        if len(value) > self.max_bytes:
+            return
+        expires = time.time() + self.ttl if self.ttl else None
+        evicted = self._set(key, value, expires)
+        with self._counters_lock:
+            self.evictions += evicted
+
+    def clear(self):
+        """Удаляет все записи."""
+        self._clear()
+
+    def stats(self):
+        """Возвращает счетчики кеша."""
+        with self._counters_lock:
+            return {
+                "backend": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+    def _get(self, key, now):
+        raise NotImplementedError
+
+    def _set(self, key, value, expires):
+        """Сохраняет запись и возвращает количество вытесненных записей."""
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """LRU-кеш в памяти процесса."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes, ttl=None):
+        super().__init__(max_bytes, ttl)
+        self._entries = OrderedDict()  # ключ -> (значение, срок жизни)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= now:
+                del self._entries[key]
+                self._bytes -= len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, expires):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (value, expires)
+            self._bytes += len(value)
+
+            evicted = 0
+            while self._bytes > self.max_bytes:
+                _, (old_value, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_value)
+                evicted += 1
+            return evicted
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["entries"] = len(self._entries)
+        stats["bytes"] = self._bytes
+        return stats
+
+
+class SQLiteCache(CacheBackend):
+    """
+    LRU-кеш в файле SQLite, общий для нескольких процессов сервера на одной машине.
+    Счетчики попаданий и промахов ведутся отдельно в каждом процессе.
+    Объем и число записей хранятся в таблице cache_meta и обновляются триггерами в той же транзакции,
+    что и изменение записи, поэтому при вставке не нужно суммировать размеры всех записей.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, max_bytes, ttl=None):
+        super().__init__(max_bytes, ttl)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, expires REAL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN "
+                "UPDATE cache_meta SET value = value + NEW.size WHERE name = 'bytes'; "
+                "UPDATE cache_meta SET value = value + 1 WHERE name = 'entries'; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN "
+                "UPDATE cache_meta SET value = value - OLD.size WHERE name = 'bytes'; "
+                "UPDATE cache_meta SET value = value - 1 WHERE name = 'entries'; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache BEGIN "
+                "UPDATE cache_meta SET value = value + NEW.size - OLD.size WHERE name = 'bytes'; END"
+            )
+            # Счетчики заполняются после создания триггеров, поэтому в файле кеша прежней версии
+            # записи, вставленные другими процессами в это время, тоже будут учтены
+            conn.execute("INSERT OR IGNORE INTO cache_meta SELECT 'bytes', COALESCE(SUM(size), 0) FROM cache")
+            conn.execute("INSERT OR IGNORE INTO cache_meta SELECT 'entries', COUNT(*) FROM cache")
+
+    def _connection(self):
+        """Возвращает соединение текущего потока (соединения SQLite нельзя делить между потоками)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key, now):
+        with self._connection() as conn:
+            row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires is not None and expires <= now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def _set(self, key, value, expires):
+        with self._connection() as conn:
+            # UPSERT вместо INSERT OR REPLACE: замена строки при REPLACE не вызывает триггер удаления
+            conn.execute(
+                "INSERT INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires = excluded.expires, accessed = excluded.accessed",
+                (key, value, len(value), expires, time.time()),
+            )
+
+            evicted = 0
+            total = self._meta(conn, "bytes")
+            while total > self.max_bytes:
+                old_key, size = conn.execute("SELECT key, size FROM cache ORDER BY accessed LIMIT 1").fetchone()
+                conn.execute("DELETE FROM cache WHERE key = ?", (old_key,))
+                total -= size
+                evicted += 1
+            return evicted
+
+    def _clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache")
+
+    @staticmethod
+    def _meta(conn, name):
+        return conn.execute("SELECT value FROM cache_meta WHERE name = ?", (name,)).fetchone()[0]
+
+    def stats(self):
+        stats = super().stats()
+        with self._connection() as conn:
+            stats["entries"], stats["bytes"] = self._meta(conn, "entries"), self._meta(conn, "bytes")
+        return stats
@@ -0,0 +1,139 @@
+import os
+import operator
+import importlib.util
+import pandas as pd
+
+# Хранилище результатов анализа в колоночном формате (Parquet, Feather или CSV) с типизированными столбцами.
+# Excel используется только как необязательный экспорт в конце обработки.
+
+RESULTS_DIR = "results"
+
+# Расширения файлов для поддерживаемых форматов (в порядке предпочтения при поиске)
+FORMATS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "csv": ".csv",
+}
+
+# Типы столбцов таблицы результатов
+COLUMN_TYPES = {
+    "num_chars": "int64",
+    "num_chars_no_spaces": "int64",
+    "num_words": "int64",
+    "num_lines": "int64",
+    "spam_ratio": "float64",
+    "num_keywords": "int64",
+    "file": "string",
+    "duplicate_of": "string",
+}
+
+# Операторы сравнения для фильтров вида (столбец, оператор, значение)
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+def default_format():
+    """Возвращает формат по умолчанию: Parquet, если установлен pyarrow, иначе CSV."""
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv"
+
+
+def result_path(name, fmt):
+    """Возвращает путь к файлу результатов name в формате fmt."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат результатов: {fmt}")
+    return os.path.join(RESULTS_DIR, name + FORMATS[fmt])
+
+
+def find_format(name):
+    """Возвращает формат, в котором сохранены результаты name, или None, если их нет."""
+    for fmt in FORMATS:
+        if os.path.exists(result_path(name, fmt)):
+            return fmt
+    return None
+
+
+def _apply_types(df):
+    """Приводит известные столбцы к типам из COLUMN_TYPES."""
+    types = {column: dtype for column, dtype in COLUMN_TYPES.items() if column in df.columns}
+    return df.astype(types)
+
+
+def write_results(df, name, fmt=None):
+    """Сохраняет таблицу результатов name в формате fmt (по умолчанию default_format()) и возвращает путь."""
+    fmt = fmt or default_format()
+    path = result_path(name, fmt)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
+    # Удаляем результаты с тем же именем в других форматах, чтобы не читать устаревшие данные
+    for other in FORMATS:
+        if other != fmt and os.path.exists(result_path(name, other)):
+            os.remove(result_path(name, other))
+
+    df = _apply_types(df)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def read_results(name, fmt=None, filters=None):
+    """
+    Читает таблицу результатов name. filters — список условий (столбец, оператор, значение),
+    объединяемых через "и". Для Parquet условия передаются в pyarrow и применяются при чтении
+    (predicate pushdown), для остальных форматов — к прочитанной таблице.
+    """
+    fmt = fmt or find_format(name)
+    if fmt is None:
+        raise FileNotFoundError(f"Результаты {name} не найдены в {RESULTS_DIR}")
+    path = result_path(name, fmt)
+
+    if fmt == "parquet":
+        return _apply_types(pd.read_parquet(path, filters=filters or None))
+
+    if fmt == "feather":
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path, dtype={column: dtype for column, dtype in COLUMN_TYPES.items()})
+    return apply_filters(_apply_types(df), filters)
+
+
+def read_columns(name, fmt=None):
+    """Возвращает имена столбцов таблицы результатов name; для Parquet читается только схема файла."""
+    fmt = fmt or find_format(name)
+    if fmt is None:
+        raise FileNotFoundError(f"Результаты {name} не найдены в {RESULTS_DIR}")
+    path = result_path(name, fmt)
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    if fmt == "feather":
+        return list(pd.read_feather(path).columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def apply_filters(df, filters):
+    """Оставляет строки таблицы, удовлетворяющие всем условиям (столбец, оператор, значение)."""
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        mask &= OPERATORS[op](df[column], value)
+    return df[mask].reset_index(drop=True)
+
+
+def export_excel(df, name):
+    """Экспортирует таблицу результатов name в Excel и возвращает путь к файлу."""
+    path = os.path.join(RESULTS_DIR, name + ".xlsx")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    df.to_excel(path, index=False)
+    return path
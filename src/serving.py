@@ -0,0 +1,91 @@
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# Продакшн-режим REST API: анализ выполняется в ограниченном пуле процессов, потоки сервера только ждут результата.
+# Число задач в работе и в очереди ограничено; при переполнении запрос сразу отклоняется (503),
+# а долгие задачи прерываются по таймауту ожидания (504).
+
+
+class Overloaded(Exception):
+    """Очередь анализа заполнена, новая задача не принята."""
+
+
+class AnalysisDispatcher:
+    """
+    Пул процессов для анализа текстов с ограничением числа принятых задач.
+    max_pending — сколько задач может одновременно выполняться и ждать в очереди (по умолчанию 4 * workers),
+    timeout — сколько секунд запрос ждет результата (None — без ограничения).
+    """
+
+    def __init__(self, workers, max_pending=None, timeout=None, initializer=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+        self.max_pending = max_pending or 4 * workers
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def acquire(self, count=1):
+        """Занимает count мест в очереди или выбрасывает Overloaded, если столько мест нет (тогда не занимает ни одного)."""
+        for taken in range(count):
+            if not self._slots.acquire(blocking=False):
+                self.release(taken)
+                raise Overloaded()
+
+    def release(self, count=1):
+        """Освобождает count мест в очереди."""
+        for _ in range(count):
+            self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """Контекст, занимающий одно место в очереди на время выполнения блока."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def submit(self, fn, *args, slots=1):
+        """
+        Отправляет задачу в пул; задача занимает slots мест в очереди (например, по месту на документ пакета).
+        Места освобождаются, когда задача завершится, даже если запрос перестал ждать ее по таймауту:
+        процесс остается занят до конца анализа.
+        """
+        self.acquire(slots)
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.release(slots)
+            raise
+        future.add_done_callback(lambda _: self.release(slots))
+        return future
+
+    def run(self, fn, *args):
+        """Выполняет задачу в пуле и ждет результат не дольше timeout секунд (иначе TimeoutError)."""
+        return self.submit(fn, *args).result(timeout=self.timeout)
+
+    def shutdown(self):
+        """Останавливает пул процессов."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(app, host="0.0.0.0", port=5000, threads=8):
+    """
+    Запускает приложение на многопоточном WSGI-сервере: waitress, если он установлен,
+    иначе многопоточный сервер werkzeug.
+    """
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        waitress_serve = None
+
+    if waitress_serve is not None:
+        logging.info(f"Запуск сервера waitress на {host}:{port} ({threads} потоков).")
+        waitress_serve(app, host=host, port=port, threads=threads)
+    else:
+        from werkzeug.serving import run_simple
+
+        logging.warning("waitress не установлен, используется многопоточный сервер werkzeug.")
+        run_simple(host, port, app, threaded=True)
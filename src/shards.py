@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+
+try:
+    from . import result_store
+    from . import term_matrix
+    from . import manifest as manifest_store
+except ImportError:
+    import result_store
+    import term_matrix
+    import manifest as manifest_store
+
+# Шардированный пакетный анализ: список файлов data/text детерминированно делится на N шардов
+# (по хешу имени файла или по диапазонам отсортированного списка). Каждый шард анализируется отдельным
+# процессом — на той же или другой машине с общей директорией — и сохраняет в results/shards частичные результаты:
+#     shard-002-of-004.parquet   статистика текстов шарда (в формате хранилища результатов)
+#     shard-002-of-004.npz       частоты лемм текстов шарда (матрица документ-термин)
+#     shard-002-of-004.json      описание шарда; записывается последним и означает, что шард готов
+# Шаг объединения собирает все частичные результаты в итоговую таблицу, матрицу терминов и рейтинг ключевых слов корпуса.
+
+SHARD_DIR = os.path.join(result_store.RESULTS_DIR, "shards")
+
+# Способы деления файлов на шарды
+METHODS = ("hash", "range")
+
+
+def parse_shard(spec):
+    """Разбирает строку "I/N" (номер шарда с нуля и количество шардов). Возвращает (I, N) или выбрасывает ValueError."""
+    try:
+        shard, num_shards = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Шард задается в виде I/N, например 0/4: {spec}") from None
+    if num_shards < 1 or not 0 <= shard < num_shards:
+        raise ValueError(f"Номер шарда должен быть от 0 до {num_shards - 1}: {spec}")
+    return shard, num_shards
+
+
+def shard_of(file, num_shards):
+    """Номер шарда файла при делении по хешу: не зависит от процесса и машины (в отличие от hash())."""
+    return int.from_bytes(hashlib.sha1(file.encode("utf-8")).digest()[:8], "big") % num_shards
+
+
+def select_files(files, shard, num_shards, method="hash"):
+    """
+    Возвращает отсортированный список файлов шарда shard из num_shards.
+    "hash" — по хешу имени (добавление файла не перемещает остальные между шардами),
+    "range" — непрерывный диапазон отсортированного списка (шарды равного размера).
+    """
+    files = sorted(files)
+    if method == "hash":
+        return [file for file in files if shard_of(file, num_shards) == shard]
+    if method == "range":
+        return files[len(files) * shard // num_shards:len(files) * (shard + 1) // num_shards]
+    raise ValueError(f"Неизвестный способ деления на шарды: {method}")
+
+
+def shard_name(shard, num_shards):
+    return f"shard-{shard:03d}-of-{num_shards:03d}"
+
+
+def _meta_path(shard, num_shards):
+    return os.path.join(SHARD_DIR, shard_name(shard, num_shards) + ".json")
+
+
+def _results_name(shard, num_shards):
+    """Имя таблицы шарда в хранилище результатов (относительно results/)."""
+    return os.path.join(os.path.basename(SHARD_DIR), shard_name(shard, num_shards))
+
+
+def write_partial(shard, num_shards, method, files, df, matrix, result_format=None):
+    """
+    Сохраняет частичные результаты шарда с файлами files: таблицу статистики df и матрицу частот лемм matrix.
+    Описание шарда записывается последним, поэтому прерванный шард не будет принят при объединении.
+    """
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    if os.path.exists(_meta_path(shard, num_shards)):
+        os.remove(_meta_path(shard, num_shards))
+
+    name = shard_name(shard, num_shards)
+    result_format = result_format or result_store.default_format()
+    result_store.write_results(df, _results_name(shard, num_shards), result_format)
+    matrix.save(os.path.join(SHARD_DIR, name + ".npz"))
+    manifest_store.save_manifest({
+        "shard": shard,
+        "num_shards": num_shards,
+        "method": method,
+        "format": result_format,
+        "files": list(files),
+    }, _meta_path(shard, num_shards))
+
+
+def load_partials(num_shards):
+    """
+    Читает частичные результаты всех num_shards шардов. Возвращает список (описание, таблица, матрица).
+    Если какой-то шард не готов, выбрасывает FileNotFoundError; если шарды из разных делений — ValueError.
+    """
+    missing = [shard for shard in range(num_shards) if not os.path.exists(_meta_path(shard, num_shards))]
+    if missing:
+        raise FileNotFoundError(f"Не готовы шарды {', '.join(map(str, missing))} из {num_shards} в {SHARD_DIR}")
+
+    partials = []
+    seen = set()
+    for shard in range(num_shards):
+        with open(_meta_path(shard, num_shards), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if partials and meta["method"] != partials[0][0]["method"]:
+            raise ValueError(f"Шарды разделены разными способами: {partials[0][0]['method']} и {meta['method']}")
+        overlap = seen.intersection(meta["files"])
+        if overlap:
+            raise ValueError(f"Файлы входят в несколько шардов: {', '.join(sorted(overlap))}")
+        seen.update(meta["files"])
+
+        df = result_store.read_results(_results_name(shard, num_shards), meta["format"])
+        matrix = term_matrix.TermMatrix.load(os.path.join(SHARD_DIR, shard_name(shard, num_shards) + ".npz"))
+        partials.append((meta, df, matrix))
+    return partials
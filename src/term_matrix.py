@@ -0,0 +1,235 @@
+import os
+import numpy as np
+
+# Матрица документ-термин по корпусу в разреженном формате CSR на массивах NumPy.
+# Строится один раз по частотам лемм всех документов, сохраняется в results/term_matrix.npz
+# и используется для ранжирования ключевых слов по TF-IDF или BM25 сразу для всех документов,
+# а таблица IDF — для ранжирования в REST API.
+
+MATRIX_PATH = "results/term_matrix.npz"
+
+# Способы взвешивания терминов
+WEIGHTINGS = ("tfidf", "bm25")
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class TermMatrix:
+    """
+    Разреженная матрица частот: строка — документ, столбец — термин словаря.
+    indptr, indices и counts — массивы формата CSR, fingerprints — отпечатки файлов (размер, время изменения),
+    по которым проверяется, что матрица соответствует текущему корпусу, tokenizer — токенизатор,
+    которым посчитаны частоты (см. text_analyzer.TOKENIZERS).
+    """
+
+    def __init__(self, files, vocabulary, indptr, indices, counts, fingerprints=None, tokenizer="nltk"):
+        self.files = list(files)
+        self.vocabulary = list(vocabulary)
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self.fingerprints = fingerprints if fingerprints is not None else np.zeros((len(self.files), 2), dtype=np.int64)
+        self.tokenizer = tokenizer
+
+    @classmethod
+    def from_counters(cls, files, counters, fingerprints=None, tokenizer="nltk"):
+        """Строит матрицу по частотам терминов (Counter) для каждого документа; словарь общий для корпуса."""
+        term_ids = {}
+        indptr = np.zeros(len(counters) + 1, dtype=np.int64)
+        indices = []
+        counts = []
+        for row, counter in enumerate(counters):
+            # Идентификаторы терминов назначаются в порядке первого появления в корпусе
+            ids = [term_ids.setdefault(term, len(term_ids)) for term in counter]
+            indices.append(np.array(ids, dtype=np.int32))
+            counts.append(np.fromiter(counter.values(), dtype=np.int32, count=len(counter)))
+            indptr[row + 1] = indptr[row] + len(counter)
+
+        return cls(
+            files,
+            term_ids,
+            indptr,
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+            np.concatenate(counts) if counts else np.zeros(0, dtype=np.int32),
+            None if fingerprints is None else np.asarray(fingerprints, dtype=np.int64).reshape(-1, 2),
+            tokenizer,
+        )
+
+    @classmethod
+    def merge(cls, matrices):
+        """
+        Объединяет матрицы частичных корпусов (например, шардов) в одну: словари объединяются
+        в порядке первого появления, строки упорядочиваются по имени файла, как при построении по всему корпусу.
+        Частоты всех матриц должны быть посчитаны одним токенизатором, иначе выбрасывается ValueError.
+        """
+        matrices = list(matrices)
+        tokenizers = {matrix.tokenizer for matrix in matrices}
+        if len(tokenizers) > 1:
+            raise ValueError(f"Матрицы посчитаны разными токенизаторами: {', '.join(sorted(tokenizers))}")
+        tokenizer = tokenizers.pop() if tokenizers else "nltk"
+        term_ids = {}
+        files = []
+        indices = []
+        counts = []
+        lengths = []
+        fingerprints = []
+        for matrix in matrices:
+            # Перевод идентификаторов терминов матрицы в идентификаторы общего словаря
+            mapping = np.array([term_ids.setdefault(term, len(term_ids)) for term in matrix.vocabulary], dtype=np.int32)
+            indices.append(mapping[matrix.indices] if len(mapping) else matrix.indices.astype(np.int32))
+            counts.append(matrix.counts)
+            lengths.append(np.diff(matrix.indptr))
+            files.extend(matrix.files)
+            fingerprints.append(matrix.fingerprints)
+
+        if not files:
+            return cls([], [], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32),
+                       tokenizer=tokenizer)
+        indices = np.concatenate(indices)
+        counts = np.concatenate(counts)
+        lengths = np.concatenate(lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        # Перестановка строк CSR: элементы каждой строки копируются одним векторным индексированием
+        order = np.argsort(np.array(files, dtype=str), kind="stable")
+        new_lengths = lengths[order]
+        indptr = np.concatenate(([0], np.cumsum(new_lengths))).astype(np.int64)
+        positions = np.arange(indptr[-1]) + np.repeat(starts[order] - indptr[:-1], new_lengths)
+        indices = indices[positions]
+
+        # Идентификаторы терминов переназначаются в порядке первого появления в новом порядке строк,
+        # чтобы результат совпадал с матрицей, построенной по всему корпусу (и порядок равных весов тоже)
+        vocabulary = list(term_ids)
+        terms, first = np.unique(indices, return_index=True)
+        terms = terms[np.argsort(first, kind="stable")]
+        new_ids = np.zeros(len(vocabulary), dtype=np.int32)
+        new_ids[terms] = np.arange(len(terms), dtype=np.int32)
+
+        return cls(
+            [files[i] for i in order],
+            [vocabulary[term] for term in terms.tolist()],
+            indptr,
+            new_ids[indices],
+            counts[positions],
+            np.concatenate(fingerprints)[order],
+            tokenizer,
+        )
+
+    @property
+    def num_docs(self):
+        return len(self.files)
+
+    def term_totals(self):
+        """Возвращает для каждого термина суммарную частоту по корпусу."""
+        return np.bincount(self.indices, weights=self.counts, minlength=len(self.vocabulary)).astype(np.int64)
+
+    def corpus_keywords(self, top_n=10):
+        """
+        Возвращает топ-N терминов корпуса [(термин, частота, документов), ...] по убыванию суммарной частоты;
+        при равной частоте термины идут в порядке словаря.
+        """
+        totals = self.term_totals()
+        document_frequency = self.document_frequency()
+        order = np.argsort(-totals, kind="stable")[:top_n]
+        return [(self.vocabulary[i], int(totals[i]), int(document_frequency[i])) for i in order.tolist()]
+
+    def document_frequency(self):
+        """Возвращает для каждого термина количество документов, в которых он встречается."""
+        return np.bincount(self.indices, minlength=len(self.vocabulary))
+
+    def idf(self, weighting="tfidf"):
+        """Возвращает IDF для каждого термина: сглаженный (как в scikit-learn) для TF-IDF или вариант BM25."""
+        df = self.document_frequency()
+        if weighting == "bm25":
+            return np.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+        return np.log((1 + self.num_docs) / (1 + df)) + 1
+
+    def scores(self, weighting="tfidf"):
+        """Возвращает веса всех ненулевых элементов матрицы (в порядке массива indices)."""
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Неизвестный способ взвешивания: {weighting}")
+
+        tf = self.counts.astype(np.float64)
+        idf = self.idf(weighting)[self.indices]
+        if weighting == "tfidf":
+            return tf * idf
+
+        rows = np.repeat(np.arange(self.num_docs), np.diff(self.indptr))
+        doc_lengths = np.bincount(rows, weights=tf, minlength=self.num_docs)
+        avg_length = doc_lengths.mean() if self.num_docs else 0.0
+        lengths = doc_lengths[rows]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length) if avg_length else BM25_K1
+        return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def top_keywords(self, top_n=10, weighting="tfidf"):
+        """
+        Возвращает для каждого документа топ-N терминов [(термин, вес), ...] по убыванию веса.
+        Все документы ранжируются одной сортировкой: по документу, затем по весу, затем по порядку термина в словаре.
+        """
+        scores = self.scores(weighting)
+        lengths = np.diff(self.indptr)
+        rows = np.repeat(np.arange(self.num_docs), lengths)
+        order = np.lexsort((self.indices, -scores, rows))
+
+        # Позиция элемента внутри своей строки после сортировки
+        positions = np.arange(len(order)) - self.indptr[rows[order]]
+        selected = order[positions < top_n]
+        selected_rows = rows[selected]
+        bounds = np.searchsorted(selected_rows, np.arange(self.num_docs + 1))
+
+        vocabulary = self.vocabulary
+        terms = self.indices[selected]
+        weights = scores[selected]
+        return [
+            [(vocabulary[terms[i]], float(weights[i])) for i in range(bounds[row], bounds[row + 1])]
+            for row in range(self.num_docs)
+        ]
+
+    def idf_table(self, weighting="tfidf"):
+        """Возвращает таблицу IDF {термин: вес}."""
+        return dict(zip(self.vocabulary, self.idf(weighting).tolist()))
+
+    def default_idf(self, weighting="tfidf"):
+        """Возвращает IDF термина, которого нет в корпусе."""
+        if weighting == "bm25":
+            return float(np.log(1 + (self.num_docs + 0.5) / 0.5))
+        return float(np.log(1 + self.num_docs) + 1)
+
+    def save(self, path=MATRIX_PATH):
+        """Сохраняет матрицу в сжатый файл NumPy (.npz)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            files=np.array(self.files, dtype=str),
+            vocabulary=np.array(self.vocabulary, dtype=str),
+            indptr=self.indptr,
+            indices=self.indices,
+            counts=self.counts,
+            fingerprints=self.fingerprints,
+            tokenizer=np.array(self.tokenizer),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MATRIX_PATH):
+        """Загружает матрицу из файла, сохраненного save(). В файлах прежних версий токенизатор не записан: это "nltk"."""
+        with np.load(path) as data:
+            return cls(
+                data["files"].tolist(),
+                data["vocabulary"].tolist(),
+                data["indptr"],
+                data["indices"],
+                data["counts"],
+                data["fingerprints"],
+                str(data["tokenizer"]) if "tokenizer" in data.files else "nltk",
+            )
+
+
+def rank_terms(counts, idf_table, default_idf, top_n=10):
+    """Ранжирует термины одного документа (Counter частот) по TF-IDF с заданной таблицей IDF."""
+    scored = [(term, count * idf_table.get(term, default_idf)) for term, count in counts.items()]
+    scored.sort(key=lambda item: -item[1])
+    return scored[:top_n]
@@ -0,0 +1,11 @@
+import pytest
+from text_analysis_project.src import nltk_resources
+
+
+@pytest.fixture(scope="session", autouse=True)
+def nltk_data():
+    """
+    Фикстура, скачивающая недостающие ресурсы NLTK один раз перед запуском тестов.
+    Если все ресурсы уже есть локально, сетевых запросов нет.
+    """
+    nltk_resources.prepare()
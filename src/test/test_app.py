@@ -1,5 +1,8 @@
+import os
+import sys
 import pytest
 import json
+import subprocess
 from text_analysis_project.src.data_analysis_with_api import app, analyze_text, extract_keywords  # Замените your_module на имя вашего файла с приложением
 
 
@@ -139,3 +142,126 @@ def test_api_invalid_json(client):
     data = response.get_json()
     assert "error" in data
     assert data["error"] == "Произошла ошибка при обработке текста"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_api_analyze_batch(client, monkeypatch, workers):
+    """
+    Тестирует пакетный анализ: результаты возвращаются в порядке документов
+    и совпадают с результатами одиночного анализа, ошибки изолированы по документам.
+    """
+    monkeypatch.setitem(app.config, "ANALYSIS_WORKERS", workers)
+    texts = ["This is a test text to analyze", "", "The fox and the dog"]
+    documents = [{"text": text} for text in texts] + [{}]
+
+    response = client.post("/analyze/batch", data=json.dumps({"documents": documents}), content_type="application/json")
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert len(results) == 4
+    for text, result in zip(texts, results):
+        assert result["analysis"] == json.loads(json.dumps(analyze_text(text)))
+    assert results[3]["error"] == "Поле 'text' отсутствует в документе"
+
+
+def test_api_analyze_batch_missing_documents(client):
+    """
+    Тестирует пакетный запрос без поля 'documents'.
+    """
+    response = client.post("/analyze/batch", data=json.dumps({"text": "abc"}), content_type="application/json")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_api_analyze_stream(client, monkeypatch, workers):
+    """
+    Тестирует потоковый анализ NDJSON: для каждой непустой строки возвращается результат с номером строки.
+    """
+    monkeypatch.setitem(app.config, "ANALYSIS_WORKERS", workers)
+    texts = ["This is a test text to analyze", "The fox and the dog"] * 5
+    body = "\n".join(json.dumps({"text": text}) for text in texts) + "\n\nnot json\n"
+
+    response = client.post("/analyze/stream", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    results = {line["index"]: line for line in lines}
+    assert sorted(results) == list(range(len(texts))) + [len(texts) + 1]
+    for index, text in enumerate(texts):
+        assert results[index]["analysis"]["num_words"] == len(text.split())
+    assert "error" in results[len(texts) + 1]
+
+
+def test_api_analyze_tfidf(client, monkeypatch, tmp_path):
+    """
+    Тестирует ранжирование ключевых слов по TF-IDF с таблицей IDF из сохраненной матрицы терминов.
+    """
+    from collections import Counter
+    from text_analysis_project.src import data_analysis_with_api
+    from text_analysis_project.src.term_matrix import TermMatrix
+
+    path = str(tmp_path / "term_matrix.npz")
+    monkeypatch.setitem(app.config, "TERM_MATRIX_PATH", path)
+    monkeypatch.setitem(app.config, "CACHE_MAX_BYTES", 0)
+    monkeypatch.setattr(data_analysis_with_api, "_idf", None)
+    text = "The fox and the dog. A fox, a dog and a fox and a cat."
+
+    # Пока матрица не построена, ранжирование по TF-IDF недоступно
+    response = client.post("/analyze", data=json.dumps({"text": text, "ranking": "tfidf"}), content_type="application/json")
+    assert response.status_code == 503
+
+    # "dog" встречается во всех документах корпуса, поэтому уступает более редкому в тексте "cat"
+    TermMatrix.from_counters(["a", "b"], [Counter({"dog": 3, "fox": 1}), Counter({"dog": 1})]).save(path)
+    response = client.post("/analyze", data=json.dumps({"text": text, "ranking": "tfidf", "top_n": 3}),
+                           content_type="application/json")
+    assert response.status_code == 200
+    keywords = [word for word, _ in response.get_json()["analysis"]["keywords"]]
+    assert keywords == ["fox", "cat", "dog"]
+
+    response = client.post("/analyze", data=json.dumps({"text": text, "ranking": "bogus"}), content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_api_analyze_tfidf_cache_after_rebuild(client, monkeypatch, tmp_path):
+    """
+    Тестирует, что закешированные веса TF-IDF не используются после перестроения матрицы терминов.
+    """
+    from collections import Counter
+    from text_analysis_project.src import data_analysis_with_api
+    from text_analysis_project.src.term_matrix import TermMatrix
+
+    path = str(tmp_path / "term_matrix.npz")
+    monkeypatch.setitem(app.config, "TERM_MATRIX_PATH", path)
+    monkeypatch.setitem(app.config, "CACHE_MAX_BYTES", 1 << 20)
+    monkeypatch.setitem(app.config, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(data_analysis_with_api, "_cache", None)
+    monkeypatch.setattr(data_analysis_with_api, "_idf", None)
+    text = "The fox and the dog. A fox, a dog and a fox and a cat."
+
+    def keywords():
+        response = client.post("/analyze", json={"text": text, "ranking": "tfidf", "top_n": 3})
+        return [word for word, _ in response.get_json()["analysis"]["keywords"]]
+
+    TermMatrix.from_counters(["a", "b"], [Counter({"dog": 3, "fox": 1}), Counter({"dog": 1})]).save(path)
+    assert keywords() == ["fox", "cat", "dog"]
+    TermMatrix.from_counters(["a", "b", "c"], [Counter({"fox": 3}), Counter({"fox": 1, "cat": 2}),
+                                               Counter({"cat": 1})]).save(path)
+    assert keywords() == ["dog", "fox", "cat"]
+
+
+# ===== ТЕСТ ЗАПУСКА =====
+
+def test_import_does_not_load_nltk():
+    """
+    Тестирует, что импорт модуля API не импортирует NLTK и не обращается к сети:
+    ресурсы загружаются лениво при первом анализе текста.
+    """
+    code = (
+        "import sys\n"
+        "import text_analysis_project.src.data_analysis_with_api\n"
+        "print('nltk' in sys.modules)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+
+    assert output.strip() == "False"
@@ -0,0 +1,49 @@
+import os
+from text_analysis_project.src.benchmarks.bench_pipeline import compare, make_corpus, CORPUS_DIR
+from text_analysis_project.src.benchmarks.bench_tokenizer import conformance, keyword_rankings, load_corpus
+
+
+def test_compare_with_baseline():
+    """
+    Тестирует поиск регрессий: ухудшение сверх порога отмечается и для метрик «больше — лучше»,
+    и для метрик «меньше — лучше», улучшения и замеры без базовой линии не отмечаются.
+    """
+    baseline = {"results": [
+        {"name": "analyze_texts", "scale": 1, "mb_per_s": 10.0, "peak_rss_mb": 100.0},
+        {"name": "api_analyze", "scale": 1, "p95_ms": 2.0, "requests_per_s": 500.0},
+    ]}
+    results = [
+        {"name": "analyze_texts", "scale": 1, "mb_per_s": 7.0, "peak_rss_mb": 90.0},
+        {"name": "api_analyze", "scale": 1, "p95_ms": 2.3, "requests_per_s": 600.0},
+        {"name": "analyze_texts", "scale": 10, "mb_per_s": 1.0},
+    ]
+
+    regressions = compare(results, baseline, threshold=0.2)
+    assert [(item["name"], item["metric"]) for item in regressions] == [("analyze_texts", "mb_per_s")]
+    assert regressions[0]["change"] == -0.3
+
+    # При более строгом пороге отмечается и рост задержки на 15%
+    regressions = compare(results, baseline, threshold=0.1)
+    assert ("api_analyze", "p95_ms") in [(item["name"], item["metric"]) for item in regressions]
+
+
+def test_make_corpus(tmp_path):
+    """
+    Тестирует создание увеличенного корпуса: scale копий каждого текста.
+    """
+    make_corpus(str(tmp_path), 3)
+    files = os.listdir(tmp_path / "data" / "text")
+    assert len(files) == 3 * len(os.listdir(CORPUS_DIR))
+
+
+def test_regex_tokenizer_conformance():
+    """
+    Тестирует быстрый токенизатор на текстах Gutenberg: рейтинги ключевых слов почти совпадают с рейтингами
+    через word_tokenize (в среднем не менее 95% общих слов в топ-10, в каждом тексте не менее 80%).
+    """
+    texts = load_corpus(max_chars=200000)
+    reference, _ = keyword_rankings(texts, "nltk")
+    rankings, _ = keyword_rankings(texts, "regex")
+    overlaps = [item["overlap"] for item in conformance(reference, rankings).values()]
+    assert sum(overlaps) / len(overlaps) >= 0.95
+    assert min(overlaps) >= 0.8
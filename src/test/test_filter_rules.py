@@ -0,0 +1,83 @@
+import json
+import pytest
+import pandas as pd
+from text_analysis_project.src.filter_rules import apply_rules, compile_rules, load_rules, pushdown_filters
+
+
+@pytest.fixture
+def results_df():
+    """
+    Фикстура с небольшой таблицей результатов анализа.
+    """
+    return pd.DataFrame({
+        "num_chars": [500, 2000, 3000, 4000],
+        "num_words": [100, 400, 500, 900],
+        "num_lines": [10, 40, 50, 10],
+        "spam_ratio": [10.0, 20.5, 30.25, 60.0],
+        "num_keywords": [10, 3, 80, 7],
+        "file": ["a.txt", "b.txt", "c.txt", "d.txt"],
+    }).astype({"file": "string"})
+
+
+def test_apply_rules(results_df):
+    """
+    Тестирует вычисление правил: все правила объединяются через "и", поддерживаются арифметика,
+    цепочки сравнений, логические операции и строковые столбцы.
+    """
+    def files(rules):
+        return list(apply_rules(results_df, rules)["file"])
+
+    assert files(["num_chars > 1000", "num_keywords > 5"]) == ["c.txt", "d.txt"]
+    assert files(["num_words >= 20 * num_lines"]) == ["d.txt"]
+    assert files(["1000 < num_chars <= 3000"]) == ["b.txt", "c.txt"]
+    assert files(["spam_ratio < 25 or not num_keywords > 50", "file != 'd.txt'"]) == ["a.txt", "b.txt"]
+
+    # Условия прежнего вида (столбец, оператор, значение) тоже поддерживаются
+    assert files([("num_chars", ">", 1000), ("num_keywords", ">", 5)]) == ["c.txt", "d.txt"]
+    assert files([]) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+
+
+def test_rules_on_nullable_column(results_df):
+    """
+    Тестирует правила над столбцом duplicate_of (строки с пропусками): пропуск не равен ни одной строке.
+    """
+    results_df["duplicate_of"] = pd.array([None, "a.txt", None, "b.txt"], dtype="string")
+
+    assert list(apply_rules(results_df, ["duplicate_of != 'a.txt'"])["file"]) == ["a.txt", "c.txt", "d.txt"]
+    assert list(apply_rules(results_df, ["duplicate_of == 'b.txt' or num_chars < 1000"])["file"]) == ["a.txt", "d.txt"]
+
+
+def test_invalid_rules(results_df):
+    """
+    Тестирует, что недопустимые правила отклоняются с ValueError: вызовы функций, атрибуты,
+    синтаксические ошибки, неизвестные столбцы и выражения без логического результата.
+    """
+    for rule in ["__import__('os').system('ls')", "file.upper() == 'A'", "num_chars >", "num_chars = 1",
+                 "9 ** 9 ** 9 ** 9 > num_chars", "'a' * 10000000000 == file"]:
+        with pytest.raises(ValueError):
+            compile_rules([rule])
+
+    for rule in ["unknown > 1", "num_chars + 1", "num_words > 1 // 0", "num_words % 2 == 7 % 0"]:
+        with pytest.raises(ValueError):
+            apply_rules(results_df, [rule])
+
+
+def test_pushdown_and_config(tmp_path):
+    """
+    Тестирует выбор правил для фильтрации при чтении Parquet и чтение правил из JSON-файла.
+    """
+    rules = ["num_chars > 1000", "num_words >= 20 * num_lines", "file == 'a.txt'"]
+    assert pushdown_filters(rules) == [("num_chars", ">", 1000), ("file", "==", "a.txt")]
+    # Столбцы проверяются по схеме файла до передачи условий в pyarrow
+    columns = ["num_chars", "num_words", "num_lines", "file"]
+    assert pushdown_filters(rules, columns) == [("num_chars", ">", 1000), ("file", "==", "a.txt")]
+    with pytest.raises(ValueError, match="Неизвестный столбец"):
+        pushdown_filters(["bogus > 1"], columns)
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+    assert load_rules(str(path)) == rules
+
+    path.write_text(json.dumps({"rules": "num_chars > 1"}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_rules(str(path))
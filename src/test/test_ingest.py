@@ -0,0 +1,70 @@
+import os
+import gzip
+import tarfile
+import zipfile
+import pytest
+from text_analysis_project.src.ingest import ingest, open_source, ArchiveSource, DirectorySource, GzipFileSource
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """
+    Фикстура с источниками всех видов: директория с вложенной папкой и сжатым файлом, архивы tar.gz и zip, файл .gz.
+    """
+    tree = tmp_path / "tree"
+    (tree / "nested").mkdir(parents=True)
+    (tree / "a.txt").write_text("alpha", encoding="utf-8")
+    (tree / "nested" / "b.txt").write_text("beta", encoding="utf-8")
+    (tree / ".hidden").write_text("skip", encoding="utf-8")
+    with gzip.open(tree / "c.txt.gz", "wb") as f:
+        f.write("gamma".encode("utf-8"))
+
+    members = tmp_path / "members"
+    members.mkdir()
+    (members / "d.txt").write_text("delta", encoding="utf-8")
+    with tarfile.open(tmp_path / "texts.tar.gz", "w:gz") as archive:
+        archive.add(members / "d.txt", arcname="books/d.txt")
+    with zipfile.ZipFile(tmp_path / "texts.zip", "w") as archive:
+        archive.writestr("e.txt", "epsilon")
+    with gzip.open(tmp_path / "f.txt.gz", "wb") as f:
+        f.write("phi".encode("utf-8"))
+
+    return [str(tree), str(tmp_path / "texts.tar.gz"), str(tmp_path / "texts.zip"), str(tmp_path / "f.txt.gz")]
+
+
+def test_open_source(sources):
+    """
+    Тестирует выбор источника по строке и имена документов: вложенные пути — через "__", без расширения .gz.
+    """
+    assert [type(open_source(spec)) for spec in sources] == [DirectorySource, ArchiveSource, ArchiveSource, GzipFileSource]
+    assert [document.name for document in open_source(sources[0]).documents()] == ["a.txt", "c.txt", "nested__b.txt"]
+    with pytest.raises(ValueError):
+        open_source("missing/path")
+
+
+def test_ingest_skips_unchanged_and_resumes(sources, tmp_path):
+    """
+    Тестирует загрузку: все источники сохраняются, повторный запуск не читает источники и не перезаписывает файлы,
+    без контрольной точки совпадающее содержимое определяется по хешу, измененный источник записывается заново.
+    """
+    target = tmp_path / "data" / "text"
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    counts = ingest(sources, str(target), threads=4, checkpoint_path=checkpoint)
+    assert counts == {"written": 6, "unchanged": 0, "skipped": 0, "failed": 0}
+    assert sorted(os.listdir(target)) == ["a.txt", "books__d.txt", "c.txt", "e.txt", "f.txt", "nested__b.txt"]
+    assert (target / "c.txt").read_text(encoding="utf-8") == "gamma"
+    mtime = os.stat(target / "a.txt").st_mtime_ns
+
+    assert ingest(sources, str(target), threads=4, checkpoint_path=checkpoint)["skipped"] == 6
+
+    # Контрольная точка потеряна (например, загрузка прервана до ее сохранения): файлы сравниваются по хешу
+    os.remove(checkpoint)
+    assert ingest(sources, str(target), threads=4, checkpoint_path=checkpoint)["unchanged"] == 6
+    assert os.stat(target / "a.txt").st_mtime_ns == mtime
+
+    (tmp_path / "tree" / "a.txt").write_text("alpha, revised", encoding="utf-8")
+    counts = ingest(sources, str(target), threads=4, checkpoint_path=checkpoint)
+    assert (counts["written"], counts["skipped"]) == (1, 5)
+    assert (target / "a.txt").read_text(encoding="utf-8") == "alpha, revised"
+    assert not [file for file in os.listdir(target) if file.endswith(".tmp")]
@@ -0,0 +1,126 @@
+import json
+import numpy as np
+import pytest
+from collections import Counter
+from text_analysis_project.src import data_analysis_with_api
+from text_analysis_project.src.data_analysis_with_api import app
+from text_analysis_project.src.inverted_index import (
+    InvertedIndex,
+    build_index,
+    decode_varints,
+    encode_varints,
+    parse_query,
+)
+from text_analysis_project.src.term_matrix import TermMatrix
+
+
+DOCUMENTS = {
+    "moby.txt": Counter({"whale": 8, "sea": 5, "ship": 3}),
+    "emma.txt": Counter({"love": 4, "letter": 2}),
+    "persuasion.txt": Counter({"love": 2, "sea": 2, "navy": 3}),
+    "bible.txt": Counter({"sea": 1, "lord": 9}),
+}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """
+    Фикстура, строящая инвертированный индекс по небольшому корпусу.
+    """
+    matrix = TermMatrix.from_counters(list(DOCUMENTS), list(DOCUMENTS.values()))
+    path = str(tmp_path / "index")
+    build_index(matrix, path)
+    return path
+
+
+def test_varint_round_trip():
+    """
+    Тестирует кодирование varint: числа разной длины восстанавливаются без потерь, малые числа занимают один байт.
+    """
+    values = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 31 - 1, 2 ** 40]
+    data, offsets = encode_varints(values)
+
+    assert decode_varints(data).tolist() == values
+    assert np.diff(offsets).tolist() == [1, 1, 1, 2, 2, 2, 3, 5, 6]
+    assert decode_varints(data[offsets[3]:offsets[5]]).tolist() == [128, 300]
+
+
+def test_postings(index_path):
+    """
+    Тестирует, что списки документов совпадают с частотами исходного корпуса.
+    """
+    index = InvertedIndex(index_path)
+    files = list(DOCUMENTS)
+
+    for term in ["sea", "love", "whale", "lord"]:
+        docs, freqs = index.postings(term)
+        expected = [(file, counts[term]) for file, counts in DOCUMENTS.items() if term in counts]
+        assert [(files[doc], freq) for doc, freq in zip(docs, freqs)] == expected
+
+    assert len(index.postings("unknown")[0]) == 0
+
+
+def test_boolean_search(index_path):
+    """
+    Тестирует булевы запросы и ранжирование результатов по BM25.
+    """
+    index = InvertedIndex(index_path)
+
+    def found(query):
+        return {file for file, _ in index.search(query, top_k=10, normalize=str.lower)[1]}
+
+    assert found("sea") == {"moby.txt", "persuasion.txt", "bible.txt"}
+    assert found("sea AND love") == {"persuasion.txt"}
+    assert found("sea love") == {"persuasion.txt"}
+    assert found("whale OR letter") == {"moby.txt", "emma.txt"}
+    assert found("sea AND NOT (whale OR lord)") == {"persuasion.txt"}
+    assert found("NOT sea") == {"emma.txt"}
+    assert found("unknown") == set()
+
+    # Документ с наибольшей частотой термина — первый; top_k ограничивает ответ
+    total, results = index.search("sea", top_k=2, normalize=str.lower)
+    assert total == 3
+    assert [file for file, _ in results] == ["moby.txt", "persuasion.txt"]
+
+    for query in ["", "sea AND", "(sea", "OR love"]:
+        with pytest.raises(ValueError):
+            parse_query(query)
+
+
+def test_search_ties_ordered_by_document(tmp_path):
+    """
+    Тестирует, что документы с одинаковой оценкой попадают в top_k в порядке номеров документов.
+    """
+    files = [f"{i:02d}.txt" for i in range(50)]
+    matrix = TermMatrix.from_counters(files, [Counter({"sea": 1}) for _ in files])
+    path = str(tmp_path / "index")
+    build_index(matrix, path)
+
+    total, results = InvertedIndex(path).search("sea", top_k=3)
+    assert total == 50
+    assert [file for file, _ in results] == ["00.txt", "01.txt", "02.txt"]
+
+
+def test_api_search(monkeypatch, index_path):
+    """
+    Тестирует эндпоинт /search.
+    """
+    client = app.test_client()
+    monkeypatch.setattr(data_analysis_with_api, "_index", None)
+    monkeypatch.setitem(app.config, "INDEX_PATH", index_path + "-missing")
+    assert client.get("/search?q=sea").status_code == 503
+
+    monkeypatch.setitem(app.config, "INDEX_PATH", index_path)
+    response = client.get("/search?q=sea%20AND%20NOT%20whale&k=1")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total"] == 2
+    assert len(data["results"]) == 1
+
+    assert client.get("/search?q=sea%20AND").status_code == 400
+    assert client.get("/search?q=sea&k=abc").status_code == 400
+
+    # Перестроенный индекс загружается заново
+    documents = dict(DOCUMENTS, **{"new.txt": Counter({"sea": 1, "storm": 2})})
+    build_index(TermMatrix.from_counters(list(documents), list(documents.values())), index_path)
+    assert client.get("/search?q=storm").get_json()["total"] == 1
@@ -0,0 +1,76 @@
+import json
+import pytest
+from text_analysis_project.src import metrics
+from text_analysis_project.src.data_analysis_with_api import app
+from text_analysis_project.src.text_analyzer import extract_keywords
+
+
+@pytest.fixture
+def collecting():
+    """
+    Фикстура, включающая сбор метрик с чистого листа и восстанавливающая прежнее состояние.
+    """
+    was_enabled = metrics.enabled
+    metrics.enable()
+    metrics.reset()
+    yield
+    metrics.reset()
+    metrics.enable(was_enabled)
+
+
+def test_disabled_metrics_are_noop():
+    """
+    Тестирует, что при выключенных метриках таймер этапа — пустой контекст, а счетчики не меняются.
+    """
+    was_enabled = metrics.enabled
+    metrics.enable(False)
+    try:
+        metrics.reset()
+        with metrics.stage("tokenize"):
+            metrics.inc("tokens_total", 10)
+        assert metrics.snapshot() == {"counters": [], "histograms": []}
+    finally:
+        metrics.enable(was_enabled)
+
+
+def test_stages_counters_and_report(collecting, tmp_path):
+    """
+    Тестирует сбор этапов и счетчиков при анализе текста, объединение метрик процессов и JSON-отчет.
+    """
+    extract_keywords("The fox and the dog. The fox ran.", lemmatize=True)
+
+    report = metrics.report()
+    assert report["stages"]["tokenize"]["calls"] == 1
+    assert report["stages"]["lemmatize"]["wall_seconds"] >= 0
+    assert report["counters"]["tokens_total"] == 10
+    assert report["counters"]["unique_words_total"] == 6
+    assert report["counters"]["lemma_cache_hits_total"] + report["counters"]["lemma_cache_misses_total"] == 3
+
+    # Метрики дочернего процесса добавляются к метрикам текущего
+    metrics.merge(metrics.snapshot())
+    assert metrics.report()["counters"]["tokens_total"] == 20
+
+    with metrics.stage("process_file", histogram="file_seconds"):
+        pass
+    path = tmp_path / "report.json"
+    metrics.write_report(str(path), workers=1)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["workers"] == 1
+    assert data["histograms"]["file_seconds[stage=process_file]"]["count"] == 1
+
+
+def test_metrics_endpoint(collecting):
+    """
+    Тестирует эндпоинт /metrics: формат Prometheus, задержки и счетчики запросов, этапы анализа.
+    """
+    client = app.test_client()
+    client.post("/analyze", data=json.dumps({"text": "The fox and the dog."}), content_type="application/json")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert "# TYPE text_analysis_http_request_seconds histogram" in text
+    assert 'text_analysis_http_requests_total{endpoint="analyze_api",status="200"} 1' in text
+    assert 'text_analysis_http_request_seconds_bucket{endpoint="analyze_api",le="+Inf"} 1' in text
+    assert 'text_analysis_stage_calls_total{stage="analyze_request"} 1' in text
+    assert "text_analysis_lemma_memo_size" in text
@@ -0,0 +1,150 @@
+import os
+import random
+import pytest
+from text_analysis_project.src import data_analysis_static, data_analysis_with_api, minhash, result_store
+from text_analysis_project.src.data_analysis_with_api import app
+
+
+def _words(seed, count=400):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(300)]
+    return [rng.choice(vocabulary) for _ in range(count)]
+
+
+BASE = _words(1)
+# Почти дубликат BASE: заменены 10 слов из 400
+NEAR = BASE[:200] + ["changed"] * 10 + BASE[210:]
+OTHER = _words(2)
+
+
+def test_signature_similarity():
+    """
+    Тестирует сигнатуры: обновление по фрагментам не меняет сигнатуру, почти дубликаты похожи,
+    разные тексты — нет, у текста без слов сигнатуры нет.
+    """
+    signature = minhash.signature(BASE)
+    parts = minhash.MinHash()
+    for start in range(0, len(BASE), 37):
+        parts.update(BASE[start:start + 37])
+    assert (parts.digest() == signature).all()
+
+    assert minhash.similarity(signature, minhash.signature(NEAR)) >= minhash.THRESHOLD
+    assert minhash.similarity(signature, minhash.signature(OTHER)) < 0.2
+    assert minhash.signature(["short", "text"]) is not None
+    assert minhash.signature([]) is None
+
+
+def test_lsh_index(tmp_path):
+    """
+    Тестирует LSH-индекс: группы почти дубликатов с представителем, запрос похожих текстов, сохранение и загрузку.
+    """
+    files = ["c.txt", "a.txt", "b.txt"]
+    index = minhash.LSHIndex(files, [minhash.signature(words) for words in (NEAR, OTHER, BASE)])
+    assert index.clusters() == {"c.txt": "b.txt"}
+    assert [file for file, _ in index.query(minhash.signature(BASE), top_k=2, threshold=0.5)] == ["b.txt", "c.txt"]
+
+    path = str(tmp_path / "lsh.npz")
+    index.save(path)
+    loaded = minhash.LSHIndex.load(path)
+    assert loaded.files == files
+    assert loaded.clusters() == index.clusters()
+    assert minhash.LSHIndex([], []).clusters() == {}
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """Фикстура с корпусом в data/text: два почти одинаковых текста и один отличающийся."""
+    (tmp_path / "data" / "text").mkdir(parents=True)
+    for file, words in {"a.txt": BASE, "b.txt": NEAR, "c.txt": OTHER}.items():
+        (tmp_path / "data" / "text" / file).write_text(" ".join(words), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_analyze_and_filter_duplicates(corpus, monkeypatch):
+    """
+    Тестирует поиск дубликатов при анализе (столбец duplicate_of, в том числе в инкрементальном режиме)
+    и фильтрацию: при "reuse" ключевые слова дубликата берутся у представителя, при "skip" дубликат не сохраняется.
+    """
+    data_analysis_static.analyze_texts(export_excel=False, dedup=True)
+    df = result_store.read_results("data_analysis").sort_values("file")
+    assert df["duplicate_of"].tolist()[1] == "a.txt"
+    assert df["duplicate_of"].isna().tolist() == [True, False, True]
+    assert os.path.exists(minhash.LSH_PATH)
+
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+    df = result_store.read_results("data_analysis").sort_values("file")
+    assert df["duplicate_of"].tolist()[1] == "a.txt"
+
+    extracted = []
+    extract_keywords = data_analysis_static.extract_keywords
+    monkeypatch.setattr(data_analysis_static, "extract_keywords",
+                        lambda text, top_n=10: extracted.append(text) or extract_keywords(text, top_n))
+    data_analysis_static.filter_texts(export_excel=False, rules=[], duplicates="reuse")
+    assert len(extracted) == 2
+    with open("data/processed_texts/a.txt", encoding="utf-8") as a, open("data/processed_texts/b.txt", encoding="utf-8") as b:
+        assert a.readlines()[1] == b.readlines()[1]
+
+    data_analysis_static.filter_texts(export_excel=False, rules=[], duplicates="skip")
+    assert sorted(result_store.read_results("filtered_data")["file"]) == ["a.txt", "c.txt"]
+    with pytest.raises(ValueError):
+        data_analysis_static.filter_texts(rules=[], duplicates="drop")
+    with pytest.raises(ValueError, match="Неизвестный столбец"):
+        data_analysis_static.filter_texts(rules=["bogus > 1"])
+
+
+def test_incremental_dedup_skips_texts_without_words(corpus, monkeypatch):
+    """
+    Тестирует, что текст без слов (у него нет сигнатуры) при повторном инкрементальном анализе с dedup=True
+    не анализируется заново.
+    """
+    (corpus / "data" / "text" / "d.txt").write_text("", encoding="utf-8")
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+
+    analyzed = []
+    analyze_file = data_analysis_static._analyze_file
+    monkeypatch.setattr(data_analysis_static, "_analyze_file",
+                        lambda file, **kwargs: analyzed.append(file) or analyze_file(file, **kwargs))
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+    assert analyzed == []
+    assert sorted(result_store.read_results("data_analysis")["file"]) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+
+
+def test_incremental_dedup_after_run_without_dedup(corpus):
+    """
+    Тестирует, что сигнатура файла, измененного между запусками с dedup=True запуском без dedup,
+    не берется из устаревшего LSH-индекса.
+    """
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+    df = result_store.read_results("data_analysis").sort_values("file")
+    assert df["duplicate_of"].tolist()[1] == "a.txt"
+
+    (corpus / "data" / "text" / "b.txt").write_text(" ".join(_words(3)), encoding="utf-8")
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False)
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False, dedup=True)
+    df = result_store.read_results("data_analysis")
+    assert df["duplicate_of"].isna().all()
+
+
+def test_api_similar(corpus, monkeypatch):
+    """
+    Тестирует эндпоинт /similar.
+    """
+    client = app.test_client()
+    monkeypatch.setattr(data_analysis_with_api, "_lsh_index", None)
+    monkeypatch.setitem(app.config, "LSH_PATH", str(corpus / "missing.npz"))
+    assert client.post("/similar", json={"text": "the sea"}).status_code == 503
+
+    data_analysis_static.analyze_texts(export_excel=False, dedup=True)
+    monkeypatch.setitem(app.config, "LSH_PATH", str(corpus / minhash.LSH_PATH))
+    response = client.post("/similar", json={"text": " ".join(NEAR), "k": 1})
+    assert response.status_code == 200
+    assert [result["file"] for result in response.get_json()["results"]] == ["b.txt"]
+
+    response = client.post("/similar", json={"file": "a.txt", "threshold": 0.5})
+    assert [result["file"] for result in response.get_json()["results"]] == ["b.txt"]
+
+    assert client.post("/similar", json={"file": "missing.txt"}).status_code == 404
+    assert client.post("/similar", json={"text": "sea", "k": -1}).status_code == 400
+    assert client.post("/similar", json={"text": "sea", "threshold": 2}).status_code == 400
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from text_analysis_project.src import data_analysis_with_api
+from text_analysis_project.src.data_analysis_with_api import app
+from text_analysis_project.src.result_cache import MemoryCache, SQLiteCache, cache_key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    """
+    Фикстура, создающая кеш выбранного типа; для SQLite все кеши используют один файл.
+    """
+    def make(max_bytes, ttl=None):
+        if request.param == "sqlite":
+            return SQLiteCache(str(tmp_path / "cache.sqlite"), max_bytes, ttl)
+        return MemoryCache(max_bytes, ttl)
+    return make
+
+
+def test_cache_key():
+    """
+    Тестирует, что ключ зависит от текста, top_n и версии матрицы терминов.
+    """
+    assert cache_key("text", 10) == cache_key("text", 10)
+    assert cache_key("text", 10) != cache_key("text", 5)
+    assert cache_key("text", 10) != cache_key("other", 10)
+    assert cache_key("text", 10, "tfidf", matrix_version="1") != cache_key("text", 10, "tfidf", matrix_version="2")
+
+
+def test_cache_lru_eviction(make_cache):
+    """
+    Тестирует вытеснение давно не использованных записей при превышении объема в байтах.
+    """
+    value = {"data": "x" * 40}
+    size = len(json.dumps(value).encode("utf-8"))
+    cache = make_cache(max_bytes=2 * size)
+
+    cache.set("a", value)
+    cache.set("b", value)
+    assert cache.get("a") == value  # "a" становится последней использованной записью
+    cache.set("c", value)  # вытесняет "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 2 * size
+
+
+def test_cache_ttl(make_cache, monkeypatch):
+    """
+    Тестирует, что записи с истекшим сроком жизни не возвращаются.
+    """
+    now = [1000.0]
+    monkeypatch.setattr("text_analysis_project.src.result_cache.time.time", lambda: now[0])
+    cache = make_cache(max_bytes=1024, ttl=10)
+
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    """
+    Тестирует, что кеш SQLite общий для нескольких экземпляров (процессов) с одним файлом.
+    """
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path, 1024).set("a", {"value": 1})
+    assert SQLiteCache(path, 1024).get("a") == {"value": 1}
+
+
+def test_cache_size_tracking(make_cache, monkeypatch):
+    """
+    Тестирует учет объема и числа записей при замене, истечении срока жизни и очистке,
+    а также то, что счетчики не теряют обращения из нескольких потоков.
+    """
+    now = [1000.0]
+    monkeypatch.setattr("text_analysis_project.src.result_cache.time.time", lambda: now[0])
+    cache = make_cache(max_bytes=1024, ttl=10)
+
+    cache.set("a", {"value": 1})
+    cache.set("a", {"value": "longer"})
+    cache.set("b", {"value": 2})
+    size = len(json.dumps({"value": "longer"}).encode("utf-8")) + len(json.dumps({"value": 2}).encode("utf-8"))
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (2, size)
+
+    now[0] += 11
+    assert cache.get("a") is None
+    cache.clear()
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (0, 0)
+
+    cache.set("c", {"value": 3})
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: cache.get("c"), range(400)))
+    assert cache.stats()["hits"] == 400
+
+
+def test_sqlite_cache_upgrades_old_file(tmp_path):
+    """
+    Тестирует, что объем кеша в файле прежней версии (без таблицы cache_meta) считается при открытии.
+    """
+    path = str(tmp_path / "cache.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                     "expires REAL, accessed REAL NOT NULL)")
+        conn.execute("INSERT INTO cache VALUES ('a', x'00', 100, NULL, 0)")
+    cache = SQLiteCache(path, 1024)
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (1, 100)
+
+
+def test_api_uses_cache(monkeypatch):
+    """
+    Тестирует, что повторный запрос с тем же текстом и top_n берется из кеша, а счетчики доступны в /cache/stats.
+    """
+    monkeypatch.setitem(app.config, "CACHE_BACKEND", "memory")
+    monkeypatch.setitem(app.config, "CACHE_MAX_BYTES", 1024 * 1024)
+    monkeypatch.setattr(data_analysis_with_api, "_cache", None)
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        body = json.dumps({"text": "The quick brown fox jumps over the lazy dog", "top_n": 3})
+        first = client.post("/analyze", data=body, content_type="application/json")
+        second = client.post("/analyze", data=body, content_type="application/json")
+        stats = client.get("/cache/stats").get_json()
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json() == second.get_json()
+    assert len(first.get_json()["analysis"]["keywords"]) == 3
+    assert stats["enabled"] is True
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
@@ -0,0 +1,60 @@
+import pytest
+import pandas as pd
+from text_analysis_project.src import result_store
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    """
+    Фикстура, перенаправляющая хранилище результатов во временную директорию.
+    """
+    monkeypatch.setattr(result_store, "RESULTS_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def results_df():
+    """
+    Фикстура с небольшой таблицей результатов анализа.
+    """
+    return pd.DataFrame({
+        "num_chars": [500, 2000, 3000],
+        "num_chars_no_spaces": [400, 1600, 2500],
+        "num_words": [100, 400, 500],
+        "num_lines": [10, 40, 50],
+        "spam_ratio": [10.0, 20.5, 30.25],
+        "num_keywords": [10, 3, 80],
+        "file": ["a.txt", "b.txt", "c.txt"],
+    })
+
+
+@pytest.mark.parametrize("fmt", ["csv", "feather", "parquet"])
+def test_round_trip_with_filters(results_dir, results_df, fmt):
+    """
+    Тестирует запись и чтение результатов с фильтрами: типы столбцов сохраняются,
+    а в выборку попадают только строки, удовлетворяющие всем условиям.
+    """
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+
+    result_store.write_results(results_df, "data_analysis", fmt)
+    assert result_store.find_format("data_analysis") == fmt
+
+    df = result_store.read_results("data_analysis", filters=[("num_chars", ">", 1000), ("num_keywords", ">", 5)])
+
+    assert list(df["file"]) == ["c.txt"]
+    assert df["num_chars"].dtype == "int64"
+    assert df["spam_ratio"].dtype == "float64"
+
+
+def test_write_replaces_other_formats(results_dir, results_df):
+    """
+    Тестирует, что при сохранении в новом формате результаты в прежнем формате удаляются.
+    """
+    pytest.importorskip("pyarrow")
+
+    result_store.write_results(results_df, "data_analysis", "parquet")
+    result_store.write_results(results_df, "data_analysis", "csv")
+
+    assert result_store.find_format("data_analysis") == "csv"
+    assert not (results_dir / "data_analysis.parquet").exists()
@@ -0,0 +1,177 @@
+import json
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from text_analysis_project.src.serving import AnalysisDispatcher, Overloaded
+from text_analysis_project.src import data_analysis_with_api
+from text_analysis_project.src.data_analysis_with_api import app
+
+
+@pytest.fixture
+def dispatcher():
+    """
+    Фикстура с пулом из одного процесса и очередью на одну задачу.
+    """
+    dispatcher = AnalysisDispatcher(1, max_pending=1, timeout=0.1)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def test_dispatcher_rejects_when_full(dispatcher):
+    """
+    Тестирует, что при заполненной очереди новая задача сразу отклоняется,
+    а после завершения задачи место освобождается.
+    """
+    future = dispatcher.submit(time.sleep, 0.3)
+    with pytest.raises(Overloaded):
+        dispatcher.submit(time.sleep, 0)
+
+    future.result()
+    time.sleep(0.05)  # Колбэк освобождения места выполняется после завершения задачи
+    assert dispatcher.submit(abs, -1).result() == 1
+
+
+def test_dispatcher_timeout(dispatcher):
+    """
+    Тестирует, что ожидание результата прерывается по таймауту.
+    """
+    with pytest.raises(TimeoutError):
+        dispatcher.run(time.sleep, 1)
+
+
+@pytest.fixture
+def serving_client(monkeypatch):
+    """
+    Фикстура тестового клиента в продакшн-режиме: длинные тексты отправляются в пул из двух процессов
+    с очередью на одну задачу.
+    """
+    monkeypatch.setitem(app.config, "ANALYSIS_WORKERS", 2)
+    monkeypatch.setitem(app.config, "MAX_PENDING", 1)
+    monkeypatch.setitem(app.config, "REQUEST_TIMEOUT", 10)
+    monkeypatch.setitem(app.config, "INLINE_MAX_CHARS", 10)
+    monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 1024)
+    monkeypatch.setattr(data_analysis_with_api, "_dispatcher", None)
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+    data_analysis_with_api.get_dispatcher().shutdown()
+
+
+def test_get_dispatcher_concurrent(serving_client):
+    """
+    Тестирует, что потоки сервера, одновременно обратившиеся к пулу, получают один и тот же пул.
+    """
+    with ThreadPoolExecutor(8) as executor:
+        dispatchers = list(executor.map(lambda _: data_analysis_with_api.get_dispatcher(), range(32)))
+    assert all(dispatcher is dispatchers[0] for dispatcher in dispatchers)
+
+
+def test_api_offloads_long_texts(serving_client):
+    """
+    Тестирует, что результат анализа в пуле совпадает с анализом в потоке запроса.
+    """
+    text = "This is a test text to analyze"
+    response = serving_client.post("/analyze", data=json.dumps({"text": text}), content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.get_json()["analysis"]["num_words"] == 7
+
+
+def test_api_overloaded(serving_client):
+    """
+    Тестирует, что при заполненной очереди API возвращает 503, а короткие тексты по-прежнему анализируются.
+    """
+    dispatcher = data_analysis_with_api.get_dispatcher()
+    dispatcher.acquire()
+    try:
+        response = serving_client.post("/analyze", data=json.dumps({"text": "x" * 100}), content_type="application/json")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+        response = serving_client.post("/analyze", data=json.dumps({"text": "short"}), content_type="application/json")
+        assert response.status_code == 200
+    finally:
+        dispatcher.release()
+
+
+def test_api_request_too_large(serving_client):
+    """
+    Тестирует, что запрос больше MAX_CONTENT_LENGTH отклоняется с кодом 413.
+    """
+    response = serving_client.post("/analyze", data=json.dumps({"text": "x" * 2048}), content_type="application/json")
+
+    assert response.status_code == 413
+    assert "error" in response.get_json()
+
+
+def test_api_batch_backpressure(serving_client):
+    """
+    Тестирует, что пакет занимает место в очереди на каждый документ: при очереди на одну задачу пакет
+    обрабатывается по одному документу, а при заполненной чужими задачами очереди отклоняется с кодом 503.
+    """
+    documents = [{"text": f"Document number {i}"} for i in range(5)]
+    response = serving_client.post("/analyze/batch", json={"documents": documents})
+    assert response.status_code == 200
+    assert [result["analysis"]["num_words"] for result in response.get_json()["results"]] == [3] * 5
+
+    dispatcher = data_analysis_with_api.get_dispatcher()
+    dispatcher.acquire()
+    try:
+        assert serving_client.post("/analyze/batch", json={"documents": documents}).status_code == 503
+    finally:
+        dispatcher.release()
+
+
+def test_dispatcher_acquire_several(dispatcher):
+    """
+    Тестирует, что задача на несколько мест очереди либо занимает их все, либо ни одного.
+    """
+    with pytest.raises(Overloaded):
+        dispatcher.submit(abs, -1, slots=2)
+    assert dispatcher.submit(abs, -1, slots=1).result() == 1
+
+
+def test_api_batch_chunks(serving_client, monkeypatch):
+    """
+    Тестирует, что пакет отправляется в пул частями: результаты возвращаются в порядке документов,
+    а при почти заполненной чужими задачами очереди части уменьшаются до одного документа.
+    """
+    monkeypatch.setitem(app.config, "MAX_PENDING", 8)
+    documents = [{"text": " ".join(["word"] * (i + 1))} for i in range(10)] + [{"texts": "missing"}]
+    response = serving_client.post("/analyze/batch", json={"documents": documents})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["analysis"]["num_words"] for result in results[:-1]] == list(range(1, 11))
+    assert "error" in results[-1]
+
+    dispatcher = data_analysis_with_api.get_dispatcher()
+    dispatcher.acquire(7)
+    try:
+        response = serving_client.post("/analyze/batch", json={"documents": documents})
+        assert response.status_code == 200
+        assert len(response.get_json()["results"]) == len(documents)
+    finally:
+        dispatcher.release(7)
+
+
+def test_api_stream_releases_slot_and_times_out(serving_client):
+    """
+    Тестирует потоковый анализ: место в очереди освобождается, даже если клиент закрыл ответ, не читая его,
+    а документ, не проанализированный за REQUEST_TIMEOUT, возвращается с ошибкой таймаута.
+    """
+    body = "\n".join(json.dumps({"text": "Some text"}) for _ in range(3))
+    response = serving_client.post("/analyze/stream", data=body, buffered=False)
+    response.close()
+    dispatcher = data_analysis_with_api.get_dispatcher()
+    dispatcher.acquire()
+    dispatcher.release()
+
+    # Оба процесса пула заняты, поэтому документы не успевают проанализироваться
+    busy = [dispatcher.executor.submit(time.sleep, 0.5) for _ in range(2)]
+    dispatcher.timeout = 0.05
+    response = serving_client.post("/analyze/stream", data=body)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all(line["error"] == data_analysis_with_api.TIMEOUT_ERROR for line in lines)
+    for future in busy:
+        future.result()
@@ -0,0 +1,99 @@
+import os
+import sys
+import subprocess
+import pytest
+from text_analysis_project.src import data_analysis_static, manifest, result_store, shards, term_matrix, text_analyzer
+from text_analysis_project.src.data_analysis_static import _corpus_term_matrix, _count_file_terms, merge_shards
+
+TEXTS = {
+    "a.txt": "The whale swam in the sea. The sea was calm and the whale was happy.",
+    "b.txt": "Love letters were written by the sea. Letters of love and hope.",
+    "c.txt": "A ship sailed across the sea. The ship carried letters.",
+    "d.txt": "Ahab hunted the white whale across every sea.",
+    "e.txt": "Poems about love, hope and the quiet sea.",
+}
+
+
+def test_select_files():
+    """
+    Тестирует деление файлов на шарды: каждый файл попадает ровно в один шард при обоих способах деления,
+    а номер шарда задается в виде I/N.
+    """
+    files = [f"{i:03d}.txt" for i in range(50)]
+    for method in shards.METHODS:
+        parts = [shards.select_files(reversed(files), shard, 4, method) for shard in range(4)]
+        assert sorted(file for part in parts for file in part) == files
+        assert all(parts)
+    assert [len(shards.select_files(files, shard, 4, "range")) for shard in range(4)] == [12, 13, 12, 13]
+
+    assert shards.parse_shard("2/4") == (2, 4)
+    for spec in ["4/4", "1", "a/b", "-1/3"]:
+        with pytest.raises(ValueError):
+            shards.parse_shard(spec)
+
+
+def test_shard_processes_and_merge(tmp_path, monkeypatch):
+    """
+    Тестирует шардированный режим: два процесса анализируют свои шарды в общей директории,
+    а объединение дает ту же таблицу и ту же матрицу терминов, что и анализ всего корпуса.
+    """
+    (tmp_path / "data" / "text").mkdir(parents=True)
+    for file, text in TEXTS.items():
+        (tmp_path / "data" / "text" / file).write_text(text, encoding="utf-8")
+
+    script = os.path.abspath(data_analysis_static.__file__)
+    processes = [subprocess.Popen([sys.executable, script, "--shard", f"{shard}/2", "--shard-method", "range",
+                                   "--format", "csv"], cwd=tmp_path) for shard in range(2)]
+    assert [process.wait(timeout=300) for process in processes] == [0, 0]
+
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        merge_shards(3)
+    merge_shards(2, export_excel=False)
+
+    df = result_store.read_results("data_analysis")
+    assert list(df["file"]) == sorted(TEXTS)
+    assert df.loc[df["file"] == "a.txt", "num_words"].item() == len(TEXTS["a.txt"].split())
+
+    # Объединенная матрица совпадает с построенной по всему корпусу и принимается как актуальная
+    merged, reused = _corpus_term_matrix()
+    assert reused
+    full = term_matrix.TermMatrix.from_counters(sorted(TEXTS), [_count_file_terms(file) for file in sorted(TEXTS)])
+    assert merged.vocabulary == full.vocabulary
+    assert merged.indices.tolist() == full.indices.tolist()
+    assert merged.counts.tolist() == full.counts.tolist()
+
+    keywords = result_store.read_results("corpus_keywords")
+    assert keywords.iloc[0].tolist() == ["sea", 6, 5]
+
+    # Матрица, посчитанная другим токенизатором, строится заново
+    monkeypatch.setattr(text_analyzer, "tokenizer", "regex")
+    matrix, reused = _corpus_term_matrix()
+    assert not reused and matrix.tokenizer == "regex"
+    assert term_matrix.TermMatrix.load().tokenizer == "regex"
+
+
+def test_incremental_filter_tracks_tokenizer(tmp_path, monkeypatch):
+    """
+    Тестирует, что манифест запоминает токенизатор: после его смены инкрементальная фильтрация
+    извлекает ключевые слова заново, а повторный запуск с тем же токенизатором файлы пропускает.
+    """
+    (tmp_path / "data" / "text").mkdir(parents=True)
+    for file, text in TEXTS.items():
+        (tmp_path / "data" / "text" / file).write_text(text, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    data_analysis_static.analyze_texts(incremental=True, export_excel=False)
+    data_analysis_static.filter_texts(incremental=True, export_excel=False, rules=[])
+    assert {entry["tokenizer"] for entry in manifest.load_manifest().values()} == {"nltk"}
+
+    extracted = []
+    extract_keywords = data_analysis_static.extract_keywords
+    monkeypatch.setattr(data_analysis_static, "extract_keywords",
+                        lambda text, top_n=10: extracted.append(text) or extract_keywords(text, top_n))
+    monkeypatch.setattr(text_analyzer, "tokenizer", "regex")
+    data_analysis_static.filter_texts(incremental=True, export_excel=False, rules=[])
+    assert len(extracted) == len(TEXTS)
+    assert {entry["tokenizer"] for entry in manifest.load_manifest().values()} == {"regex"}
+
+    data_analysis_static.filter_texts(incremental=True, export_excel=False, rules=[])
+    assert len(extracted) == len(TEXTS)
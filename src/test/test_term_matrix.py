@@ -0,0 +1,95 @@
+import math
+import pytest
+from collections import Counter
+from text_analysis_project.src.term_matrix import TermMatrix, rank_terms
+
+
+DOCUMENTS = [
+    Counter({"whale": 5, "sea": 3, "ship": 2}),
+    Counter({"sea": 4, "love": 2, "ship": 1}),
+    Counter({"love": 6, "sea": 1, "letter": 3}),
+    Counter(),
+]
+
+
+def make_matrix():
+    return TermMatrix.from_counters(["a.txt", "b.txt", "c.txt", "d.txt"], DOCUMENTS,
+                                    [[10, 1], [20, 2], [30, 3], [0, 4]])
+
+
+def test_top_keywords_tfidf():
+    """
+    Тестирует, что ранжирование всех документов одной сортировкой совпадает с наивным TF-IDF по каждому документу.
+    """
+    matrix = make_matrix()
+    num_docs = len(DOCUMENTS)
+    df = Counter(term for counts in DOCUMENTS for term in counts)
+
+    expected = []
+    for counts in DOCUMENTS:
+        scored = [(term, count * (math.log((1 + num_docs) / (1 + df[term])) + 1)) for term, count in counts.items()]
+        scored.sort(key=lambda item: -item[1])
+        expected.append(scored[:2])
+
+    result = matrix.top_keywords(top_n=2)
+    assert [[term for term, _ in keywords] for keywords in result] == \
+        [[term for term, _ in keywords] for keywords in expected]
+    for keywords, expected_keywords in zip(result, expected):
+        for (_, weight), (_, expected_weight) in zip(keywords, expected_keywords):
+            assert math.isclose(weight, expected_weight)
+
+    # Общее для корпуса слово "sea" уступает словам, характерным для документа
+    assert result[0][0][0] == "whale"
+    assert result[3] == []
+
+
+def test_top_keywords_bm25():
+    """
+    Тестирует ранжирование по BM25: веса положительны и упорядочены по убыванию.
+    """
+    result = make_matrix().top_keywords(top_n=3, weighting="bm25")
+
+    assert [len(keywords) for keywords in result] == [3, 3, 3, 0]
+    for keywords in result:
+        weights = [weight for _, weight in keywords]
+        assert all(weight > 0 for weight in weights)
+        assert weights == sorted(weights, reverse=True)
+
+
+def test_save_load_and_rank_terms(tmp_path):
+    """
+    Тестирует сохранение матрицы и ранжирование нового текста по сохраненной таблице IDF.
+    """
+    matrix = make_matrix()
+    path = str(tmp_path / "term_matrix.npz")
+    matrix.save(path)
+    loaded = TermMatrix.load(path)
+
+    assert loaded.files == matrix.files
+    assert loaded.vocabulary == matrix.vocabulary
+    assert loaded.fingerprints.tolist() == matrix.fingerprints.tolist()
+    assert loaded.tokenizer == "nltk"
+    assert loaded.top_keywords(top_n=3) == matrix.top_keywords(top_n=3)
+
+    # Для документа из корпуса ранжирование совпадает с матричным
+    idf_table, default_idf = loaded.idf_table(), loaded.default_idf()
+    assert rank_terms(DOCUMENTS[1], idf_table, default_idf, top_n=3) == matrix.top_keywords(top_n=3)[1]
+
+    # Слово, которого нет в корпусе, получает максимальный IDF
+    assert rank_terms(Counter({"unknown": 1, "sea": 1}), idf_table, default_idf)[0][0] == "unknown"
+
+
+def test_tokenizer_saved_and_merged(tmp_path):
+    """
+    Тестирует, что токенизатор матрицы сохраняется в файле и переходит в объединенную матрицу,
+    а матрицы разных токенизаторов не объединяются.
+    """
+    path = str(tmp_path / "term_matrix.npz")
+    TermMatrix.from_counters(["a.txt"], DOCUMENTS[:1], tokenizer="regex").save(path)
+    loaded = TermMatrix.load(path)
+    assert loaded.tokenizer == "regex"
+
+    other = TermMatrix.from_counters(["b.txt"], DOCUMENTS[1:2], tokenizer="regex")
+    assert TermMatrix.merge([loaded, other]).tokenizer == "regex"
+    with pytest.raises(ValueError):
+        TermMatrix.merge([loaded, make_matrix()])
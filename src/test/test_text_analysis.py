@@ -78,6 +78,51 @@ class TestTextAnalysis(unittest.TestCase):
         # Проверяем наличие ожидаемых колонок
         self.assertIn('num_chars', df.columns, "Колонка num_chars отсутствует в результате анализа.")
 
+    def test_analyze_texts_incremental(self):
+        """
+        Тест инкрементального режима analyze_texts: результат совпадает с полным анализом,
+        а измененный файл анализируется заново.
+        """
+        results_file = os.path.join(self.results_path, "data_analysis.xlsx")
+
+        analyze_texts()  # Полный анализ
+        full_df = pd.read_excel(results_file)
+
+        analyze_texts(incremental=True)  # Первый запуск заполняет манифест
+        analyze_texts(incremental=True)  # Повторный запуск берет статистику из манифеста
+        pd.testing.assert_frame_equal(full_df, pd.read_excel(results_file))
+        self.assertTrue(os.path.exists(os.path.join(self.results_path, "manifest.json")), "Манифест не был создан.")
+
+        # Изменяем один файл: в результатах должна обновиться только его строка
+        file = full_df["file"][0]
+        path = os.path.join(self.data_path, file)
+        with open(path, "r", encoding="utf-8") as f:
+            original = f.read()
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(" extra words")
+            analyze_texts(incremental=True)
+            df = pd.read_excel(results_file)
+            self.assertEqual(df["num_words"][0], full_df["num_words"][0] + 2)
+            pd.testing.assert_frame_equal(full_df[1:].reset_index(drop=True), df[1:].reset_index(drop=True))
+        finally:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(original)
+
+    def test_analyze_texts_parallel(self):
+        """
+        Тест параллельного режима analyze_texts: результат совпадает с последовательным, порядок строк сохраняется.
+        """
+        results_file = os.path.join(self.results_path, "data_analysis.xlsx")
+
+        analyze_texts()  # Последовательный анализ
+        sequential_df = pd.read_excel(results_file)
+
+        analyze_texts(workers=2)  # Анализ в пуле из двух процессов
+        parallel_df = pd.read_excel(results_file)
+
+        pd.testing.assert_frame_equal(sequential_df, parallel_df)
+
     def test_filter_texts(self):
         """
         Тест функции filter_texts: проверка фильтрации текстов и сохранения результатов.
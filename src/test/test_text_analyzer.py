@@ -0,0 +1,163 @@
+import io
+import numpy as np
+from collections import Counter
+from text_analysis_project.src import nltk_resources, text_analyzer
+from text_analysis_project.src.vocabulary import Vocabulary, aggregate
+from text_analysis_project.src.text_analyzer import (
+    analyze_text,
+    analyze_stream,
+    count_keywords,
+    count_keywords_stream,
+    extract_keywords,
+    init_worker,
+    lemma_memo_stats,
+    regex_tokenize,
+)
+
+
+def test_analyze_text_stats():
+    """
+    Тестирует общий анализатор: базовая статистика считается за один проход
+    и совпадает с наивным подсчетом.
+    """
+    text = "The cat and THE dog\nsat on a mat.\n  In  the end"
+    stats = analyze_text(text)
+
+    assert stats["num_chars"] == len(text)
+    assert stats["num_chars_no_spaces"] == len(text.replace(" ", ""))
+    assert stats["num_words"] == len(text.split())
+    assert stats["num_lines"] == 2
+
+    # Служебные слова: The, and, THE, on, a, In, the
+    assert stats["num_keywords"] == 7
+    assert stats["spam_ratio"] == 7 / 12 * 100
+
+    # Без top_n ключевые слова не извлекаются
+    assert "keywords" not in stats
+
+
+def test_analyze_text_keywords():
+    """
+    Тестирует, что при заданном top_n анализатор возвращает те же ключевые слова, что и extract_keywords.
+    """
+    text = "The quick brown fox jumps over the lazy dog. The fox was quick and smart."
+    stats = analyze_text(text, top_n=3, lemmatize=False)
+
+    assert stats["keywords"] == extract_keywords(text, top_n=3, lemmatize=False)
+
+
+def test_analyze_text_empty():
+    """
+    Тестирует анализ пустого текста.
+    """
+    stats = analyze_text("")
+    assert stats["num_words"] == 0
+    assert stats["spam_ratio"] == 0
+
+
+def test_analyze_stream_matches_analyze_text():
+    """
+    Тестирует потоковый анализ: слова и строки, разрезанные границами кусков, считаются так же,
+    как при анализе текста целиком.
+    """
+    text = "The cat and THE dog\nsat on a mat.\n\n  In  the end\n\nof the day" * 20
+    expected = analyze_text(text)
+
+    for chunk_size in (1, 3, 7, 64):
+        stats = analyze_stream(io.StringIO(text), chunk_size=chunk_size)
+        assert stats == expected
+
+
+def test_analyze_term_counts():
+    """
+    Тестирует подсчет частот слов за тот же проход, что и статистика: результат совпадает с count_keywords.
+    """
+    text = "The whales swam.\n\nA whale and the ships sailed across the sea of ships." * 5
+    expected = count_keywords(text_analyzer.tokenize(text))
+
+    stats = analyze_text(text, top_n=2, term_counts=True)
+    assert stats["term_counts"] == expected
+    assert stats["keywords"] == analyze_text(text, top_n=2)["keywords"]
+    assert analyze_stream(io.StringIO(text), chunk_size=16, term_counts=True)["term_counts"] == expected
+
+
+def test_count_keywords_matches_per_token_lemmatization():
+    """
+    Тестирует, что подсчет с лемматизацией уникальных слов совпадает с лемматизацией каждого токена,
+    включая порядок слов с одинаковой частотой, а повторные слова берутся из таблицы мемоизации.
+    """
+    tokens = ["cats", "the", "dog", ",", "cat", "dogs", "cats", "running", "ran", "cats"] * 3
+    lemmatizer = nltk_resources.get_lemmatizer()
+    stop_words = nltk_resources.get_stop_words()
+    expected = Counter(lemmatizer.lemmatize(word) for word in tokens if word.isalpha() and word not in stop_words)
+
+    hits_before = lemma_memo_stats()["hits"]
+    result = count_keywords(tokens)
+    assert result.most_common() == expected.most_common()
+
+    count_keywords(tokens)
+    assert lemma_memo_stats()["hits"] > hits_before
+
+
+def test_vocabulary_ids_and_aggregate():
+    """
+    Тестирует словарь идентификаторов: одинаковые слова получают один идентификатор, маска отсекает
+    неучитываемые слова, а суммирование частот лемм сохраняет порядок первых вхождений.
+    """
+    vocab = Vocabulary(str.isalpha, lambda word: word.rstrip("s"))
+    ids = vocab.ids(["dogs", ",", "cat", "dog", "cats"])
+    assert vocab.ids(["cat", "dogs"]).tolist() == [ids[2], ids[0]]
+    assert vocab.keyword_mask(ids).tolist() == [True, False, True, True, True]
+
+    counts = np.array([2, 5, 1, 1, 3])
+    keep = vocab.keyword_mask(ids)
+    lemma_ids, totals = aggregate(vocab.lemma_ids(ids[keep]), counts[keep])
+    assert list(vocab.to_counter_items(lemma_ids, totals)) == [("dog", 3), ("cat", 4)]
+    assert vocab.most_common(lemma_ids, totals, 1) == [("cat", 4)]
+    assert (vocab.lemma_hits, vocab.lemma_misses) == (0, 4)
+
+
+def test_vocabulary_bounded_while_streaming(monkeypatch):
+    """
+    Тестирует, что при потоковом подсчете словарь не растет с длиной файла: числа и знаки препинания
+    в словарь не попадают, а разросшийся посреди файла словарь заменяется без потери частот.
+    """
+    letters = "abcdefghij"
+    words = [a + b + c for a in letters for b in letters for c in letters]
+    text = "\n\n".join(" ".join(words[i:i + 20]) + f" {i} {i}.5 , dog" for i in range(0, len(words), 20))
+    monkeypatch.setattr(text_analyzer, "_vocabulary", None)
+    expected = count_keywords_stream(io.StringIO(text), lemmatize=False, chunk_size=64)
+    assert expected["dog"] == 50 and expected["abc"] == 1
+    assert "0" not in text_analyzer.get_vocabulary().index
+    top = analyze_stream(io.StringIO(text), top_n=3, lemmatize=False, chunk_size=64)["keywords"]
+
+    monkeypatch.setattr(text_analyzer, "VOCABULARY_MAX_SIZE", 100)
+    monkeypatch.setattr(text_analyzer, "_vocabulary", None)
+    assert count_keywords_stream(io.StringIO(text), lemmatize=False, chunk_size=64) == expected
+    assert len(text_analyzer.get_vocabulary()) <= 150
+    assert analyze_stream(io.StringIO(text), top_n=3, lemmatize=False, chunk_size=64)["keywords"] == top
+
+
+def test_regex_tokenize():
+    """
+    Тестирует быстрый токенизатор: генератор буквенных слов в нижнем регистре; слова, склеенные с цифрами,
+    подчеркиваниями или через дефис, пропускаются, а двойной дефис разделяет слова.
+    """
+    tokens = regex_tokenize("The Cat's well-known _Emma_ sat--quietly, at 10am; \"Really?\" Ça va.")
+    assert not isinstance(tokens, list)
+    assert list(tokens) == ["the", "cat", "s", "sat", "quietly", "at", "really", "ça", "va"]
+
+
+def test_init_worker_without_resources(monkeypatch):
+    """
+    Тестирует initializer пула: при отсутствии ресурсов NLTK процесс запускается с выбранным токенизатором,
+    а ошибка откладывается до задачи, которой ресурсы нужны.
+    """
+    def missing():
+        raise LookupError("stopwords")
+
+    monkeypatch.setattr(text_analyzer, "tokenizer", "nltk")
+    monkeypatch.setattr(nltk_resources, "get_stop_words", missing)
+    init_worker("regex")
+    assert text_analyzer.tokenizer == "regex"
+    assert analyze_text("No resources needed here.")["num_words"] == 4
@@ -0,0 +1,352 @@
+import re
+import logging
+from functools import lru_cache
+from collections import Counter
+
+import numpy as np
+
+try:
+    from . import metrics
+    from . import nltk_resources
+    from . import vocabulary
+    from .nltk_resources import word_tokenize
+except ImportError:
+    import metrics
+    import nltk_resources
+    import vocabulary
+    from nltk_resources import word_tokenize
+
+# Общий анализатор текста для пакетной обработки (data_analysis_static) и REST API (data_analysis_with_api)
+
+# Частые служебные слова, по которым считается заспамленность
+COMMON_WORDS = frozenset(["the", "and", "to", "a", "in", "of", "for", "on", "with"])
+
+# Размер куска при потоковом чтении файлов (в символах) и предельный размер необработанного фрагмента
+CHUNK_SIZE = 1 << 20
+MAX_SEGMENT_SIZE = 4 * CHUNK_SIZE
+
+# Размер таблицы мемоизации лемм (словоформа -> лемма), общей для всех документов процесса.
+# У каждого процесса пула своя таблица: общая для процессов таблица (Manager или разделяемая память) требовала бы
+# межпроцессного обращения на каждое уникальное слово документа, а оно дороже промаха, то есть вызова WordNet.
+# Таблицу нельзя и заполнить заранее в родительском процессе: сам он тексты не лемматизирует. Поэтому повторные
+# промахи в процессах пула ограничены числом уникальных слов корпуса на процесс (для Gutenberg ~35 тыс., доли секунды)
+LEMMA_MEMO_SIZE = 1 << 17
+
+# Предельный размер словаря процесса: при превышении словарь создается заново перед следующим документом
+# или следующим фрагментом длинного файла (см. _KeywordAccumulator)
+VOCABULARY_MAX_SIZE = 1 << 20
+
+_vocabulary = None
+
+# Токенизаторы: "nltk" — word_tokenize (Punkt и Treebank), "regex" — одно регулярное выражение,
+# которое сразу выдает буквенные слова (остальные токены все равно отбрасываются при подсчете ключевых слов)
+TOKENIZERS = ("nltk", "regex")
+tokenizer = "nltk"
+
+# Слово из одних букв. Как и в NLTK, слова, склеенные с цифрами, подчеркиваниями или через одиночный дефис
+# ("well-known", "_emma_"), считаются одним небуквенным токеном и пропускаются; двойной дефис ("word--word") разделяет слова
+WORD_RE = re.compile(r"(?<!\w)(?<!\w-)[^\W\d_]+(?!\w)(?!-\w)")
+
+
+def set_tokenizer(name):
+    """Выбирает токенизатор процесса (см. TOKENIZERS)."""
+    global tokenizer
+    if name not in TOKENIZERS:
+        raise ValueError(f"Неизвестный токенизатор: {name}. Допустимые значения: {', '.join(TOKENIZERS)}")
+    tokenizer = name
+
+
+def load_resources(tokenizer_name=None):
+    """
+    Заранее загружает ресурсы NLTK (токенизатор, стоп-слова и WordNet) в текущем процессе.
+    Используется как initializer пула процессов, чтобы каждый процесс загружал ресурсы один раз;
+    tokenizer_name передает процессам пула выбранный токенизатор.
+    """
+    if tokenizer_name is not None:
+        set_tokenizer(tokenizer_name)
+    if tokenizer == "nltk":
+        word_tokenize("Loading resources.")
+    nltk_resources.get_stop_words()
+    nltk_resources.get_lemmatizer().lemmatize("texts")
+
+
+def init_worker(tokenizer_name=None, preload=True):
+    """
+    Initializer пула процессов: выбирает токенизатор и, при preload=True, заранее загружает ресурсы NLTK.
+    Если ресурсов нет, процесс все равно запускается: ошибка возникнет только в задачах, которым ресурсы нужны,
+    и будет обработана для каждого файла или документа отдельно, а не остановит весь пул.
+    """
+    if tokenizer_name is not None:
+        set_tokenizer(tokenizer_name)
+    if preload:
+        try:
+            load_resources()
+        except LookupError as e:
+            logging.warning(f"Ресурсы NLTK не загружены заранее: {e}")
+
+
+@lru_cache(maxsize=LEMMA_MEMO_SIZE)
+def lemmatize_word(word):
+    """Возвращает лемму слова. Результаты запоминаются для всех документов, обрабатываемых процессом."""
+    return nltk_resources.get_lemmatizer().lemmatize(word)
+
+
+def get_vocabulary():
+    """
+    Возвращает словарь процесса (слово -> идентификатор) с признаками ключевых слов и леммами.
+    Если словарь разросся больше VOCABULARY_MAX_SIZE, создается новый.
+    """
+    global _vocabulary
+    if _vocabulary is None or len(_vocabulary) > VOCABULARY_MAX_SIZE:
+        stop_words = nltk_resources.get_stop_words()
+        _vocabulary = vocabulary.Vocabulary(lambda word: word.isalpha() and word not in stop_words, lemmatize_word)
+    return _vocabulary
+
+
+def lemma_memo_stats():
+    """Возвращает статистику таблицы мемоизации лемм текущего процесса: попадания, промахи, размер и долю попаданий."""
+    info = lemmatize_word.cache_info()
+    # Леммы, найденные в словаре процесса, тоже попадания: до lemmatize_word такие слова не доходят
+    hits = info.hits + (_vocabulary.lemma_hits if _vocabulary is not None else 0)
+    total = hits + info.misses
+    return {
+        "hits": hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def count_keyword_ids(tokens, lemmatize=True, vocab=None):
+    """
+    Подсчитывает частоты слов в списке токенов, исключая стоп-слова и знаки препинания,
+    и возвращает их как пару массивов (идентификаторы слов словаря vocab, частоты) в порядке первых вхождений.
+    tokens — любая последовательность или генератор токенов, уже приведенных к нижнему регистру.
+    """
+    # Токены считаются в C-коде Counter, после чего каждое уникальное учитываемое слово заменяется идентификатором
+    # (остальные токены в словарь не попадают): лемматизация — таблица идентификаторов лемм,
+    # суммирование частот лемм — векторно в NumPy. Промежуточных списков строк не создается.
+    vocab = vocab if vocab is not None else get_vocabulary()
+    # Токенизатор "regex" выдает токены генератором: они разбираются во время подсчета
+    with metrics.stage("count_tokens"):
+        token_counts = Counter(tokens)
+    if metrics.enabled:
+        metrics.inc("tokens_total", sum(token_counts.values()))
+        metrics.inc("unique_words_total", len(token_counts))
+
+    ids, counts = vocab.keyword_ids(token_counts)
+
+    # Лемматизация слов (в API исторически не используется)
+    if not lemmatize:
+        return ids, counts
+
+    hits, misses = vocab.lemma_hits, vocab.lemma_misses
+    with metrics.stage("lemmatize"):
+        ids, counts = vocabulary.aggregate(vocab.lemma_ids(ids), counts)
+    if metrics.enabled:
+        metrics.inc("lemma_cache_hits_total", vocab.lemma_hits - hits)
+        metrics.inc("lemma_cache_misses_total", vocab.lemma_misses - misses)
+    return ids, counts
+
+
+def count_keywords(tokens, lemmatize=True):
+    """
+    Подсчитывает частоту слов в списке токенов, исключая стоп-слова и знаки препинания.
+    Токены должны быть уже приведены к нижнему регистру.
+    """
+    vocab = get_vocabulary()
+    return Counter(dict(vocab.to_counter_items(*count_keyword_ids(tokens, lemmatize, vocab))))
+
+
+def regex_tokenize(text):
+    """Генератор буквенных слов текста в нижнем регистре (быстрый токенизатор без NLTK)."""
+    return map(re.Match.group, WORD_RE.finditer(text.lower()))
+
+
+def tokenize(text):
+    """
+    Приводит текст к нижнему регистру и делит на токены выбранным токенизатором (время учитывается в этапе "tokenize").
+    Токенизатор "regex" возвращает генератор буквенных слов, "nltk" — список всех токенов.
+    """
+    if tokenizer == "regex":
+        return regex_tokenize(text)
+    with metrics.stage("tokenize"):
+        return word_tokenize(text.lower())
+
+
+def extract_keywords(text, top_n=10, lemmatize=True):
+    """Извлекает топ-N популярных слов из текста, исключая стоп-слова и знаки препинания"""
+    vocab = get_vocabulary()
+    # Строки создаются только для топ-N слов
+    return vocab.most_common(*count_keyword_ids(tokenize(text), lemmatize, vocab), top_n)
+
+
+def _count_spam(words):
+    """Считает служебные слова (COMMON_WORDS) в списке слов без учета регистра."""
+    # Частоты считаются в C-коде Counter, поэтому lower() вызывается один раз
+    # на уникальное слово, а не на каждое вхождение
+    word_counts = Counter(words)
+    return sum(count for word, count in word_counts.items() if word.lower() in COMMON_WORDS)
+
+
+def _make_stats(num_chars, num_spaces, num_words, num_lines, spam_count):
+    """Собирает словарь с параметрами текста из накопленных счетчиков."""
+    spam_ratio = spam_count / num_words * 100 if num_words > 0 else 0
+
+    return {
+        "num_chars": num_chars,
+        "num_chars_no_spaces": num_chars - num_spaces,
+        "num_words": num_words,
+        "num_lines": num_lines,
+        "spam_ratio": spam_ratio,
+        "num_keywords": spam_count,
+    }
+
+
+def analyze_text(text, top_n=None, lemmatize=True, minhash=None, term_counts=False):
+    """
+    Анализирует текст за один проход и возвращает словарь с параметрами текста:
+    количество символов, символов без пробелов, слов, строк, заспамленность и количество ключевых слов.
+    Если задан top_n, в результат добавляется список популярных слов ("keywords").
+    Если задан minhash (объект minhash.MinHash), он обновляется словами текста для поиска почти дубликатов.
+    При term_counts=True в результат добавляются частоты слов (Counter, "term_counts"), как у count_keywords.
+    """
+    # Единственное разбиение текста на слова
+    words = text.split()
+    if minhash is not None:
+        minhash.update(words)
+
+    # Считаем пробелы вместо text.replace(" ", ""), чтобы не копировать весь текст
+    stats = _make_stats(len(text), text.count(" "), len(words), text.count("\n"), _count_spam(words))
+
+    if term_counts:
+        counts = count_keywords(tokenize(text), lemmatize)
+        stats["term_counts"] = counts
+        if top_n is not None:
+            stats["keywords"] = counts.most_common(top_n)
+    elif top_n is not None:
+        stats["keywords"] = extract_keywords(text, top_n=top_n, lemmatize=lemmatize)
+
+    return stats
+
+
+def iter_segments(f, chunk_size=CHUNK_SIZE):
+    """
+    Читает текстовый файл кусками по chunk_size символов и выдает фрагменты, разрезанные по границам абзацев.
+    Если абзац длиннее MAX_SEGMENT_SIZE, фрагмент режется по последнему переводу строки или пробелу,
+    а при их отсутствии — жестко, чтобы расход памяти не зависел от размера файла.
+    """
+    pending = ""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+
+        # Граница абзаца не разрывает ни слова, ни предложения
+        cut = pending.rfind("\n\n")
+        if cut <= 0 and len(pending) >= MAX_SEGMENT_SIZE:
+            cut = max(pending.rfind("\n"), pending.rfind(" "), pending.rfind("\t"))
+            if cut <= 0:
+                cut = len(pending)
+
+        if cut > 0:
+            yield pending[:cut]
+            pending = pending[cut:]
+
+    if pending:
+        yield pending
+
+
+def analyze_stream(f, top_n=None, lemmatize=True, chunk_size=CHUNK_SIZE, minhash=None, term_counts=False):
+    """
+    Потоковый вариант analyze_text: читает открытый текстовый файл кусками и обновляет счетчики инкрементально,
+    поэтому пиковый расход памяти не зависит от размера файла.
+    Статистика совпадает с analyze_text; ключевые слова и частоты слов (term_counts) считаются по абзацам.
+    """
+    num_chars = num_spaces = num_words = num_lines = spam_count = 0
+    keyword_counts = _KeywordAccumulator(lemmatize) if top_n is not None or term_counts else None
+    # Заканчивался ли предыдущий фрагмент посреди слова (только при жестком разрезе)
+    in_word = False
+
+    for segment in iter_segments(f, chunk_size):
+        words = segment.split()
+
+        num_chars += len(segment)
+        num_spaces += segment.count(" ")
+        num_words += len(words)
+        num_lines += segment.count("\n")
+        spam_count += _count_spam(words)
+        if minhash is not None:
+            minhash.update(words)
+
+        # Слово, разрезанное на границе фрагментов, считаем один раз
+        if in_word and not segment[0].isspace():
+            num_words -= 1
+        in_word = not segment[-1].isspace()
+
+        if keyword_counts is not None:
+            keyword_counts.add(tokenize(segment))
+
+    stats = _make_stats(num_chars, num_spaces, num_words, num_lines, spam_count)
+
+    if top_n is not None:
+        stats["keywords"] = keyword_counts.most_common(top_n)
+    if term_counts:
+        stats["term_counts"] = keyword_counts.counter()
+
+    return stats
+
+
+class _KeywordAccumulator:
+    """
+    Частоты слов по фрагментам файла: массивы (идентификаторы, частоты) фрагментов копятся
+    и суммируются векторно, как только их становится больше COMPACT_PARTS, и в конце.
+    Если словарь разросся больше VOCABULARY_MAX_SIZE посреди файла, накопленные частоты переводятся в строки
+    (words) и дальше считаются в новом словаре, поэтому память не растет с длиной файла.
+    """
+
+    COMPACT_PARTS = 64
+
+    def __init__(self, lemmatize):
+        self.lemmatize = lemmatize
+        # Идентификаторы фрагментов сопоставимы, пока словарь не сменился
+        self.vocab = get_vocabulary()
+        self.parts = []
+        self.words = Counter()
+
+    def add(self, tokens):
+        self.parts.append(count_keyword_ids(tokens, self.lemmatize, self.vocab))
+        if len(self.vocab) > VOCABULARY_MAX_SIZE:
+            self.words.update(dict(self.vocab.to_counter_items(*vocabulary.concatenate(self.parts))))
+            self.parts = []
+            self.vocab = get_vocabulary()
+        elif len(self.parts) > self.COMPACT_PARTS:
+            self.parts = [vocabulary.concatenate(self.parts)]
+
+    def counter(self):
+        counts = Counter(self.words)
+        counts.update(dict(self.vocab.to_counter_items(*vocabulary.concatenate(self.parts))))
+        return counts
+
+    def most_common(self, top_n):
+        if self.words:
+            return self.counter().most_common(top_n)
+        return self.vocab.most_common(*vocabulary.concatenate(self.parts), top_n)
+
+
+def count_keywords_stream(f, lemmatize=True, chunk_size=CHUNK_SIZE):
+    """Потоковый вариант count_keywords: частоты слов открытого текстового файла, посчитанные по абзацам."""
+    keyword_counts = _KeywordAccumulator(lemmatize)
+    for segment in iter_segments(f, chunk_size):
+        keyword_counts.add(tokenize(segment))
+    return keyword_counts.counter()
+
+
+def extract_keywords_stream(f, top_n=10, lemmatize=True, chunk_size=CHUNK_SIZE):
+    """Потоковый вариант extract_keywords для открытого текстового файла."""
+    keyword_counts = _KeywordAccumulator(lemmatize)
+    for segment in iter_segments(f, chunk_size):
+        keyword_counts.add(tokenize(segment))
+    return keyword_counts.most_common(top_n)
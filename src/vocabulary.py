@@ -0,0 +1,129 @@
+import threading
+import numpy as np
+
+# Словарь процесса: слово <-> целочисленный идентификатор. Частоты слов документа хранятся
+# как пара массивов NumPy (идентификаторы, частоты) вместо словарей строк: фильтрация стоп-слов
+# и знаков препинания выполняется маской по идентификаторам, суммирование частот лемм — сортировкой
+# и np.add.reduceat, а строки создаются только для итогового результата.
+
+# Идентификатор леммы, которая еще не вычислена
+NO_LEMMA = np.iinfo(np.uint32).max
+
+# Начальная емкость таблиц признаков слов (увеличивается вдвое при заполнении)
+INITIAL_CAPACITY = 1 << 12
+
+
+class Vocabulary:
+    """
+    Словарь слов с признаками, вычисляемыми один раз на слово:
+    is_keyword(word) — учитывается ли слово (не стоп-слово и состоит из букв),
+    lemmatize(word) — лемма слова; вычисляется лениво, при первом запросе лемматизации.
+    Новые слова добавляются под блокировкой (REST API обрабатывает запросы в нескольких потоках),
+    известные слова читаются без нее.
+    """
+
+    def __init__(self, is_keyword, lemmatize):
+        self._is_keyword = is_keyword
+        self._lemmatize = lemmatize
+        self.index = {}
+        self.words = []
+        self._keyword = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._lemma = np.full(INITIAL_CAPACITY, NO_LEMMA, dtype=np.uint32)
+        self._lock = threading.Lock()
+        # Статистика таблицы лемм: леммы, найденные в словаре, и вычисленные заново
+        self.lemma_hits = 0
+        self.lemma_misses = 0
+
+    def __len__(self):
+        return len(self.words)
+
+    def _add(self, word):
+        """Добавляет слово в словарь (под блокировкой) и возвращает его идентификатор."""
+        word_id = self.index.get(word)
+        if word_id is not None:
+            return word_id
+        word_id = len(self.words)
+        if word_id == len(self._keyword):
+            self._keyword = np.concatenate([self._keyword, np.zeros(word_id, dtype=bool)])
+            self._lemma = np.concatenate([self._lemma, np.full(word_id, NO_LEMMA, dtype=np.uint32)])
+        # Слово попадает в index последним: другие потоки видят его уже с признаками
+        self._keyword[word_id] = self._is_keyword(word)
+        self.words.append(word)
+        self.index[word] = word_id
+        return word_id
+
+    def ids(self, words):
+        """Возвращает массив идентификаторов слов (uint32); новые слова добавляются в словарь."""
+        index = self.index
+        try:
+            return np.fromiter(map(index.__getitem__, words), dtype=np.uint32, count=len(words))
+        except KeyError:
+            add = self._add
+            with self._lock:
+                return np.fromiter((index[word] if word in index else add(word) for word in words),
+                                   dtype=np.uint32, count=len(words))
+
+    def keyword_ids(self, word_counts):
+        """
+        Возвращает пару массивов (идентификаторы, частоты) учитываемых слов из словаря {слово: частота}.
+        В словарь добавляются только учитываемые слова: числа, знаки препинания и стоп-слова,
+        которых в длинном файле может быть сколько угодно разных, словарь не увеличивают.
+        """
+        is_keyword = self._is_keyword
+        words = [word for word in word_counts if is_keyword(word)]
+        counts = np.fromiter(map(word_counts.__getitem__, words), dtype=np.int64, count=len(words))
+        return self.ids(words), counts
+
+    def keyword_mask(self, ids):
+        """Маска учитываемых слов (не стоп-слов и не знаков препинания) для массива идентификаторов."""
+        return self._keyword[ids]
+
+    def lemma_ids(self, ids):
+        """Возвращает идентификаторы лемм слов ids; леммы новых слов вычисляются и запоминаются."""
+        missing = np.unique(ids[self._lemma[ids] == NO_LEMMA])
+        self.lemma_misses += len(missing)
+        self.lemma_hits += len(ids) - len(missing)
+        if len(missing):
+            with self._lock:
+                for word_id in missing.tolist():
+                    self._lemma[word_id] = self._add(self._lemmatize(self.words[word_id]))
+        return self._lemma[ids]
+
+    def to_counter_items(self, ids, counts):
+        """Возвращает пары (слово, частота) в порядке массивов."""
+        words = self.words
+        return zip([words[word_id] for word_id in ids.tolist()], counts.tolist())
+
+    def most_common(self, ids, counts, top_n=None):
+        """
+        Топ-N слов по частоте, как Counter.most_common: при равной частоте раньше идет слово,
+        встретившееся в массивах первым.
+        """
+        order = np.argsort(-counts, kind="stable")
+        if top_n is not None:
+            order = order[:top_n]
+        return list(self.to_counter_items(ids[order], counts[order]))
+
+
+def aggregate(ids, counts):
+    """
+    Суммирует частоты одинаковых идентификаторов: одна устойчивая сортировка и np.add.reduceat по группам.
+    Идентификаторы возвращаются в порядке первого вхождения, чтобы порядок слов с равной частотой не менялся.
+    """
+    if len(ids) == 0:
+        return ids, counts.astype(np.int64)
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1])))
+    totals = np.add.reduceat(counts[order], starts)
+    # Устойчивая сортировка: первый элемент группы — первое вхождение идентификатора
+    first = order[starts]
+    by_first = np.argsort(first)
+    return sorted_ids[starts][by_first], totals[by_first]
+
+
+def concatenate(parts):
+    """Объединяет список пар (идентификаторы, частоты) и суммирует частоты одинаковых идентификаторов."""
+    if not parts:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64)
+    return aggregate(np.concatenate([ids for ids, _ in parts]), np.concatenate([counts for _, counts in parts]))